@@ -11,8 +11,59 @@ class Settings(BaseSettings):
     uploads_dir_name: str = "uploads"
     reports_dir_name: str = "reports"
     alerts_dir_name: str = "alerts"
+    cache_dir_name: str = "cache"
+    upload_chunk_size_bytes: int = 1024 * 1024
+    max_upload_size_mb: int = 2048
+
+    # Background analysis jobs: worker threads, in-flight cap, finished jobs kept for polling.
+    analysis_worker_count: int = 2
+    analysis_queue_limit: int = 16
+    analysis_job_history_limit: int = 200
+
+    # Anytime analysis: default upload deadline (0 = none), share of it spent scanning,
+    # and the minimum remaining budget needed to still ask the LLM for evidence.
+    analysis_deadline_ms: int = 0
+    deadline_scan_share: float = 0.8
+    deadline_llm_min_ms: int = 15000
+    anytime_coarse_samples: int = 32
+    anytime_max_samples: int = 2000
+
+    # Segment-parallel upload analysis (0/1 = sequential scan of the first frames only).
+    parallel_analysis_workers: int = 0
+    parallel_min_segment_seconds: float = 10.0
+
+    # Content-addressed result cache for re-uploaded videos.
+    result_cache_enabled: bool = True
+    result_cache_max_mb: int = 256
+    result_cache_max_age_hours: float = 72.0
+    # Local LLM classification cache: summaries are keyed with numbers rounded to
+    # llm_cache_significant_digits, so near-identical signal summaries share one response.
+    llm_cache_enabled: bool = True
+    llm_cache_memory_entries: int = 512
+    llm_cache_max_mb: int = 32
+    llm_cache_max_age_hours: float = 168.0
+    llm_cache_significant_digits: int = 2
+
+    # Deferred LLM enrichment: uploads return the fast-path report and LLM evidence is
+    # added by background workers; report event streams wait up to the given seconds.
+    llm_enrichment_deferred: bool = True
+    llm_enrichment_workers: int = 1
+    llm_enrichment_wait_seconds: float = 30.0
+
+    # Live stream monitoring (RTSP / webcam / real-time file playback).
+    stream_max_active: int = 4
+    stream_ring_buffer_size: int = 256
+    stream_window_hop: int = 8
+    stream_incident_threshold: float = 0.6
+    stream_incident_cooldown_seconds: float = 10.0
+    stream_recent_incident_limit: int = 50
 
     emergency_latency_target_ms: int = 100
+    # Closed-loop quality controller: sliding p95 window, degrade/recover thresholds as fractions of the target.
+    latency_controller_window: int = 30
+    latency_degrade_ratio: float = 0.9
+    latency_recover_ratio: float = 0.6
+    latency_recover_frames: int = 30
     video_never_leaves_device: bool = True
     offline_mode: bool = True
 
@@ -22,9 +73,45 @@ class Settings(BaseSettings):
     local_gemma_model_path: str = ""
     local_gemma_endpoint: str = "http://127.0.0.1:11434/api/generate"
     local_gemma_model_name: str = "gemma3n:e4b"
+    # Pooled keep-alive connections to the local LLM endpoint, with a health probe path
+    # (GET, same host) and a circuit breaker that skips the LLM while it is down.
+    local_gemma_pool_size: int = 4
+    local_gemma_connect_timeout_seconds: float = 1.0
+    local_gemma_read_timeout_seconds: float = 15.0
+    local_gemma_refine_timeout_seconds: float = 8.0
+    local_gemma_health_path: str = "/"
+    local_gemma_breaker_failures: int = 3
+    local_gemma_breaker_reset_seconds: float = 30.0
+    # Send the incident JSON schema as `format` so the server constrains decoding to it
+    # (serve_peft_model.py and Ollama structured outputs).
+    local_gemma_structured_output: bool = True
 
     pose_event_model_path: str = "models/pose_event_detector.keras"
     pose_event_label_path: str = "models/pose_event_labels.json"
+    # "keras" (TensorFlow) or "tflite" (export with app.training.export_pose_event_model).
+    pose_event_runtime: str = "keras"
+    pose_event_tflite_path: str = "models/pose_event_detector_int8.tflite"
+    # Local single-person pose model (.tflite / .onnx, MoveNet-style I/O) filling keypoint slots 0..50; empty = off.
+    keypoint_model_path: str = ""
+    keypoint_batch_size: int = 8
+    # Square input size for keypoint models whose input shape is dynamic (MoveNet Lightning: 192, Thunder: 256).
+    keypoint_input_size: int = 192
+    # PoseLift keypoints are in source-frame pixels; set True for models trained on normalized coordinates.
+    keypoint_normalized_coords: bool = False
+    # Detection cascade bands (IncidentAnalysisAgent): motion gate -> pose model -> LLM.
+    # Clips with motion_mean below the gate exit as "none" before the pose model (0 disables the gate).
+    cascade_motion_gate: float = 0.3
+    # Pose-model candidates below this confidence are not reported.
+    cascade_report_min_confidence: float = 0.4
+    # Candidates at or above this confidence skip the LLM; only the band between escalates.
+    cascade_llm_max_confidence: float = 0.75
+    # Stride between scored windows when sliding over a whole clip.
+    pose_window_hop: int = 8
+    # Sample rate of the pose model's training windows; clip tracks are resampled to it before windowing (0 = raw samples).
+    pose_window_sample_hz: float = 30.0
+    # Micro-batcher for pose event inference across concurrent requests and streams.
+    pose_batch_max_size: int = 32
+    pose_batch_max_wait_ms: float = 2.0
 
     # Tunable decision thresholds (helps reduce shoplifting->fainting confusion).
     threshold_fainting_fast: float = 0.8
@@ -1,15 +1,26 @@
+import asyncio
+import json
 import time
 from pathlib import Path
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.config import settings
-from app.schemas import AnalyzeResponse
+from app.schemas import AnalysisJob, EnrichmentState, IncidentReport, JobSubmitResponse, StreamStartRequest, StreamStatus
+from app.services.analysis_pipeline import AnalysisPipeline
 from app.services.frame_stream_analyzer import FrameStreamAnalyzer
 from app.services.gemma_agent import IncidentAnalysisAgent
+from app.services.job_queue import AnalysisJobQueue, JobQueueFullError
+from app.services.llm_cache import LLMResponseCache
 from app.services.notifier import AlertNotifier
-from app.services.storage import StorageService
+from app.services.report_enricher import ReportEnricher
+from app.services.result_cache import ResultCache
+from app.services.startup import StartupTracker
+from app.services.storage import StorageService, UploadTooLargeError
+from app.services.stream_monitor import StreamMonitorRegistry
 
 app = FastAPI(title=settings.app_name, version="0.1.0")
 
@@ -24,9 +35,93 @@ app.add_middleware(
 )
 
 storage = StorageService()
-frame_stream_analyzer = FrameStreamAnalyzer()
-agent = IncidentAnalysisAgent()
+frame_stream_analyzer = FrameStreamAnalyzer(
+    parallel_workers=settings.parallel_analysis_workers,
+    min_segment_seconds=settings.parallel_min_segment_seconds,
+)
+agent = IncidentAnalysisAgent(
+    llm_cache=(
+        LLMResponseCache(
+            root=storage.cache / "llm",
+            max_entries=settings.llm_cache_memory_entries,
+            max_bytes=settings.llm_cache_max_mb * 1024 * 1024,
+            max_age_seconds=settings.llm_cache_max_age_hours * 3600.0,
+            significant_digits=settings.llm_cache_significant_digits,
+        )
+        if settings.llm_cache_enabled
+        else None
+    )
+)
 notifier = AlertNotifier(storage=storage)
+result_cache = (
+    ResultCache(
+        root=storage.cache,
+        max_bytes=settings.result_cache_max_mb * 1024 * 1024,
+        max_age_seconds=settings.result_cache_max_age_hours * 3600.0,
+    )
+    if settings.result_cache_enabled
+    else None
+)
+enricher = (
+    ReportEnricher(agent=agent, storage=storage, max_workers=settings.llm_enrichment_workers, cache=result_cache)
+    if settings.llm_enrichment_deferred
+    else None
+)
+pipeline = AnalysisPipeline(
+    storage=storage,
+    frame_stream_analyzer=frame_stream_analyzer,
+    agent=agent,
+    notifier=notifier,
+    cache=result_cache,
+    enricher=enricher,
+)
+job_queue = AnalysisJobQueue(
+    max_workers=settings.analysis_worker_count,
+    queue_limit=settings.analysis_queue_limit,
+    history_limit=settings.analysis_job_history_limit,
+)
+
+streams = StreamMonitorRegistry(
+    analyzer=frame_stream_analyzer,
+    detector=agent.pose_event_detector,
+    on_incident=notifier.notify_stream_incident,
+    max_active=settings.stream_max_active,
+)
+
+
+def _preload_llm_backend() -> dict:
+    if settings.model_mode == "gemini" and settings.gemini_api_key and not settings.offline_mode:
+        import langchain_google_genai  # noqa: F401
+
+        return {"mode": "gemini", "preloaded": True}
+    if settings.model_mode == "mock":
+        return {"mode": "mock", "preloaded": False}
+    client = agent.local_gemma_client
+    # Warms a pooled connection and seeds the circuit breaker with the endpoint's health.
+    healthy = client.probe() if client.configured() else False
+    return {"mode": settings.model_mode, "preloaded": False, "local_llm_healthy": healthy}
+
+
+startup = StartupTracker()
+startup.register("pose_event_detector", agent.pose_event_detector.warm_up)
+startup.register("frame_stream_analyzer", frame_stream_analyzer.warm_up)
+startup.register("llm_backend", _preload_llm_backend, required=False)
+
+
+@app.on_event("startup")
+def start_background_loading() -> None:
+    startup.start()
+
+
+@app.on_event("shutdown")
+def shutdown_workers() -> None:
+    streams.stop_all()
+    job_queue.shutdown()
+    if enricher is not None:
+        enricher.shutdown()
+    frame_stream_analyzer.close()
+    agent.pose_event_detector.close()
+    agent.local_gemma_client.close()
 
 
 @app.get("/health")
@@ -43,6 +138,12 @@ def health() -> dict:
     }
 
 
+@app.get("/ready")
+def ready() -> JSONResponse:
+    status = startup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
 @app.get("/api/v1/positioning")
 def positioning() -> dict:
     return {
@@ -60,59 +161,103 @@ def positioning() -> dict:
     }
 
 
-@app.post("/api/v1/analyze/upload", response_model=AnalyzeResponse)
-async def analyze_uploaded_video(file: UploadFile = File(...)) -> AnalyzeResponse:
+@app.post("/api/v1/analyze/upload", response_model=JobSubmitResponse, status_code=202)
+async def analyze_uploaded_video(
+    file: UploadFile = File(...),
+    deadline_ms: int | None = Form(default=None, ge=0),
+) -> JobSubmitResponse:
     if not file.filename:
         raise HTTPException(status_code=400, detail="Missing filename.")
     if Path(file.filename).suffix.lower() not in {".mp4", ".mov", ".avi", ".mkv"}:
         raise HTTPException(status_code=400, detail="Unsupported file format.")
 
-    content = await file.read()
-    if not content:
+    try:
+        stored = await run_in_threadpool(
+            storage.save_upload_stream,
+            file.filename,
+            file.file,
+            settings.max_upload_size_mb * 1024 * 1024,
+            settings.upload_chunk_size_bytes,
+        )
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=f"Upload too large (max {settings.max_upload_size_mb} MB).") from exc
+    finally:
+        await file.close()
+    if stored.size_bytes == 0:
+        stored.path.unlink(missing_ok=True)
         raise HTTPException(status_code=400, detail="Empty upload.")
 
+    source_filename = file.filename
+    saved_path = stored.path
+    budget_ms = deadline_ms if deadline_ms is not None else settings.analysis_deadline_ms
+    submitted_at = time.perf_counter()
     try:
-        saved_path = storage.save_upload(file.filename, content)
-
-        start = time.perf_counter()
-        signal_bundle = frame_stream_analyzer.analyze(saved_path)
-        total_elapsed_ms = (time.perf_counter() - start) * 1000.0
-
-        frame_latency = signal_bundle["latency"]
-        if not frame_latency.get("met_target", False):
-            raise HTTPException(
-                status_code=503,
-                detail=(
-                    "Frame-by-frame latency target not met (<100ms). "
-                    "Reduce input resolution/fps or increase hardware capacity."
-                ),
-            )
-
-        effective_latency_ms = float(frame_latency["p95_ms"])
-        signals = {
-            "video": signal_bundle["video"],
-            "pose": signal_bundle["pose"],
-            "audio": signal_bundle["audio"],
-            "latency": {
-                **frame_latency,
-                "total_analysis_ms": total_elapsed_ms,
-            },
-        }
-
-        report = agent.analyze(source_filename=file.filename, signals=signals, processing_time_ms=effective_latency_ms)
-        storage.save_report(report.report_id, report.model_dump(mode="json"))
-        notifier.notify_if_needed(report)
-
-        return AnalyzeResponse(
-            message="Video analyzed successfully with local-first incident agent.",
-            report=report,
+        job = job_queue.submit(
+            source_filename,
+            lambda progress: pipeline.run(
+                source_filename,
+                saved_path,
+                progress,
+                content_sha256=stored.sha256,
+                deadline_ms=budget_ms or None,
+                submitted_at=submitted_at,
+            ),
         )
-    except HTTPException:
-        raise
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    except JobQueueFullError as exc:
+        saved_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=503, detail="Analysis queue is full. Retry shortly.") from exc
+
+    return JobSubmitResponse(message="Video queued for analysis.", job=job)
+
+
+@app.get("/api/v1/jobs/{job_id}", response_model=AnalysisJob)
+def get_job(job_id: str) -> AnalysisJob:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+@app.post("/api/v1/streams", response_model=StreamStatus, status_code=201)
+def start_stream(request: StreamStartRequest) -> StreamStatus:
+    try:
+        monitor = streams.start(request.source, realtime=request.realtime)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return monitor.status()
+
+
+@app.get("/api/v1/streams")
+def list_streams() -> dict:
+    return {"streams": [m.status().model_dump(mode="json") for m in streams.monitors()]}
+
+
+@app.get("/api/v1/streams/{stream_id}", response_model=StreamStatus)
+def get_stream(stream_id: str) -> StreamStatus:
+    monitor = streams.get(stream_id)
+    if monitor is None:
+        raise HTTPException(status_code=404, detail=f"Stream not found: {stream_id}")
+    return monitor.status()
+
+
+@app.delete("/api/v1/streams/{stream_id}", response_model=StreamStatus)
+def stop_stream(stream_id: str) -> StreamStatus:
+    monitor = streams.stop(stream_id)
+    if monitor is None:
+        raise HTTPException(status_code=404, detail=f"Stream not found: {stream_id}")
+    return monitor.status()
+
+
+@app.get("/api/v1/metrics/inference")
+def inference_metrics() -> dict:
+    llm_cache = agent.local_gemma_client.cache
+    return {
+        "pose_event_detector": agent.pose_event_detector.metrics(),
+        "cascade": agent.cascade_metrics(),
+        "llm_cache": llm_cache.metrics() if llm_cache is not None else None,
+        "llm_endpoint": agent.local_gemma_client.metrics(),
+        "enrichment": enricher.metrics() if enricher is not None else None,
+    }
 
 
 @app.get("/api/v1/reports")
@@ -129,3 +274,41 @@ def get_report(report_id: str) -> dict:
         return storage.load_report(report_id)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=f"Report not found: {report_id}") from exc
+
+
+@app.get("/api/v1/reports/{report_id}/events")
+async def report_events(report_id: str) -> StreamingResponse:
+    """
+    Server-sent events for one report: the stored version now and, if LLM
+    enrichment is pending, the enriched version once it is saved. Clients
+    reconnect (EventSource retry) if enrichment outlasts the wait.
+    """
+    try:
+        stored = storage.load_report(report_id)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=f"Report not found: {report_id}") from exc
+
+    def event(payload: dict) -> str:
+        return f"retry: 2000\nevent: report\ndata: {json.dumps(payload, default=str)}\n\n"
+
+    async def stream():
+        yield event(stored)
+        if stored.get("enrichment_state") != EnrichmentState.pending.value or enricher is None:
+            return
+        if not enricher.is_pending(report_id):
+            # Enrichment may have finished since `stored` was read: the enricher saves
+            # before it stops tracking a report, so a reload now shows the final state.
+            current = storage.load_report(report_id)
+            if current.get("enrichment_state") != EnrichmentState.pending.value:
+                yield event(current)
+                return
+            # Stored as pending but not queued (e.g. after a restart): enrich it now.
+            enricher.submit(IncidentReport.model_validate(current))
+        waited = 0.0
+        while not enricher.wait(report_id, 0) and waited < settings.llm_enrichment_wait_seconds:
+            await asyncio.sleep(0.25)
+            waited += 0.25
+        if not enricher.is_pending(report_id):
+            yield event(storage.load_report(report_id))
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
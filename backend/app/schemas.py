@@ -2,7 +2,9 @@ from datetime import datetime
 from enum import Enum
 from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer
+
+from app.services.signals import to_jsonable
 
 
 class IncidentType(str, Enum):
@@ -19,10 +21,32 @@ class Incident(BaseModel):
     incident_type: IncidentType
     confidence: float = Field(ge=0, le=1)
     timestamp_seconds: float = Field(ge=0)
+    end_timestamp_seconds: float | None = Field(default=None, ge=0)
     evidence: str
     recommended_action: str
 
 
+class EnrichmentState(str, Enum):
+    not_needed = "not_needed"
+    pending = "pending"
+    done = "done"
+    failed = "failed"
+
+
+class AnalysisCoverage(BaseModel):
+    mode: str
+    deadline_ms: int | None = None
+    frames_analyzed: int
+    total_frames: int
+    sampled_fraction: float
+    span_fraction: float
+    max_gap_seconds: float
+    downscale_min: float
+    stride_max: int
+    llm_evidence_requested: bool
+    degraded_reasons: list[str] = Field(default_factory=list)
+
+
 class IncidentReport(BaseModel):
     report_id: str
     source_filename: str
@@ -35,9 +59,62 @@ class IncidentReport(BaseModel):
     summary: str
     incidents: list[Incident]
     timeline: list[dict[str, Any]]
+    # May hold NumPy arrays internally; rounded to plain lists only when dumped to JSON.
     raw_signals: dict[str, Any]
+    degraded: bool = False
+    coverage: AnalysisCoverage | None = None
+    # "pending" while deferred LLM evidence is being generated for this report.
+    enrichment_state: EnrichmentState = EnrichmentState.not_needed
+
+    @field_serializer("raw_signals", when_used="json")
+    def _serialize_raw_signals(self, raw_signals: dict[str, Any]) -> dict[str, Any]:
+        return to_jsonable(raw_signals)
 
 
 class AnalyzeResponse(BaseModel):
     message: str
     report: IncidentReport
+
+
+class JobState(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class AnalysisJob(BaseModel):
+    job_id: str
+    source_filename: str
+    state: JobState
+    stage: str = "queued"
+    progress: float = Field(default=0.0, ge=0, le=1)
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    report: IncidentReport | None = None
+    error: str | None = None
+
+
+class JobSubmitResponse(BaseModel):
+    message: str
+    job: AnalysisJob
+
+
+class StreamStartRequest(BaseModel):
+    source: str = Field(description="RTSP/HTTP URL, camera device index, or local video path.")
+    realtime: bool = True
+
+
+class StreamStatus(BaseModel):
+    stream_id: str
+    source: str
+    state: str
+    started_at: datetime
+    frames_processed: int
+    windows_scored: int
+    last_timestamp_seconds: float
+    detection_latency_p95_ms: float
+    detection_latency_budget_ms: int
+    recent_incidents: list[Incident]
+    error: str | None = None
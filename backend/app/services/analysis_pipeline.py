@@ -0,0 +1,165 @@
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+from uuid import uuid4
+
+from app.config import settings
+from app.schemas import AnalysisCoverage, EnrichmentState, IncidentReport
+from app.services.frame_stream_analyzer import FrameStreamAnalyzer
+from app.services.gemma_agent import IncidentAnalysisAgent
+from app.services.notifier import AlertNotifier
+from app.services.report_enricher import ReportEnricher
+from app.services.result_cache import ResultCache
+from app.services.storage import StorageService
+
+ProgressCallback = Callable[[str, float], None]
+
+
+class AnalysisPipeline:
+    """
+    Blocking upload pipeline: frame analysis -> incident agent -> report
+    persistence -> local alerting. Runs on a job-queue worker thread.
+    With a ResultCache, re-uploads of identical content skip decode and inference.
+    With a deadline, the best report reachable within it is returned and marked
+    degraded instead of failing. With a ReportEnricher, LLM evidence is added
+    after the fast-path report has been saved and alerted.
+    """
+
+    def __init__(
+        self,
+        storage: StorageService,
+        frame_stream_analyzer: FrameStreamAnalyzer,
+        agent: IncidentAnalysisAgent,
+        notifier: AlertNotifier,
+        cache: ResultCache | None = None,
+        enricher: ReportEnricher | None = None,
+    ) -> None:
+        self.storage = storage
+        self.frame_stream_analyzer = frame_stream_analyzer
+        self.agent = agent
+        self.notifier = notifier
+        self.cache = cache
+        self.enricher = enricher
+
+    def run(
+        self,
+        source_filename: str,
+        video_path: Path,
+        progress: ProgressCallback | None = None,
+        content_sha256: str | None = None,
+        deadline_ms: int | None = None,
+        submitted_at: float | None = None,
+    ) -> IncidentReport:
+        """`deadline_ms` counts from `submitted_at` (a time.perf_counter() value), so queue wait is included."""
+        report_progress = progress or (lambda stage, fraction: None)
+        deadline = (submitted_at or time.perf_counter()) + deadline_ms / 1000.0 if deadline_ms else None
+
+        def compute() -> dict:
+            return self._compute(source_filename, video_path, report_progress, deadline, deadline_ms)
+
+        key, hit = None, False
+        if self.cache is None or not content_sha256:
+            payload = compute()
+        elif deadline is None:
+            key = self.cache.key_for(content_sha256)
+            payload, hit = self.cache.get_or_compute(key, compute)
+        else:
+            # A deadline run may still reuse a full result, but must not wait on
+            # someone else's in-flight computation or cache its partial one.
+            key = self.cache.key_for(content_sha256)
+            cached = self.cache.get(key)
+            payload, hit = (cached, True) if cached is not None else (compute(), False)
+
+        # Fresh results carry the in-memory report (arrays intact); cache hits carry its JSON form.
+        report = payload["report"]
+        if not isinstance(report, IncidentReport):
+            report = IncidentReport.model_validate(report)
+        if hit:
+            # Same content, new submission: keep the cached findings under a fresh report identity.
+            report = report.model_copy(
+                update={
+                    "report_id": str(uuid4()),
+                    "source_filename": source_filename,
+                    "created_at": datetime.now(tz=timezone.utc),
+                    "raw_signals": {**report.raw_signals, "cache": {"hit": True, "key": key}},
+                }
+            )
+
+        report_progress("alerting", 0.95)
+        self.storage.save_report(report.report_id, report.model_dump(mode="json"))
+        self.notifier.notify_if_needed(report)
+        if report.enrichment_state == EnrichmentState.pending and self.enricher is not None:
+            # A hit is only still pending if the first enrichment failed or is in flight; the
+            # enricher shares an in-flight result by cache key, and a finished one is already cached.
+            self.enricher.submit(report, cache_key=key)
+        return report
+
+    def _compute(
+        self,
+        source_filename: str,
+        video_path: Path,
+        report_progress: ProgressCallback,
+        deadline: float | None = None,
+        deadline_ms: int | None = None,
+    ) -> dict:
+        report_progress("decoding", 0.0)
+        start = time.perf_counter()
+        on_progress = lambda fraction: report_progress("decoding", 0.8 * fraction)  # noqa: E731
+        if deadline is None:
+            signal_bundle = self.frame_stream_analyzer.analyze(video_path, progress=on_progress)
+            mode = "parallel" if "segments" in signal_bundle["latency"] else "sequential"
+        else:
+            scan_deadline = start + (deadline - start) * settings.deadline_scan_share
+            signal_bundle = self.frame_stream_analyzer.analyze_anytime(video_path, scan_deadline, progress=on_progress)
+            mode = "anytime"
+        total_elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        frame_latency = signal_bundle["latency"]
+        effective_latency_ms = float(frame_latency["p95_ms"])
+        signals = {
+            "video": signal_bundle["video"],
+            "pose": signal_bundle["pose"],
+            "audio": signal_bundle["audio"],
+            "track": signal_bundle["track"],
+            "latency": {
+                **frame_latency,
+                "total_analysis_ms": total_elapsed_ms,
+            },
+        }
+
+        # Deferred enrichment runs after the response, so the deadline does not limit it.
+        defer_llm = self.enricher is not None
+        allow_llm = (
+            defer_llm
+            or deadline is None
+            or (deadline - time.perf_counter()) * 1000.0 >= settings.deadline_llm_min_ms
+        )
+        reasons = []
+        if not frame_latency.get("met_target", False):
+            reasons.append(
+                f"Frame latency p95 {effective_latency_ms:.1f}ms exceeds the "
+                f"{settings.emergency_latency_target_ms}ms target."
+            )
+        if frame_latency.get("deadline_hit"):
+            reasons.append(f"Deadline of {deadline_ms}ms reached before the whole video was refined.")
+        if not allow_llm:
+            reasons.append("LLM evidence skipped to stay within the deadline.")
+
+        report_progress("detecting", 0.8)
+        report = self.agent.analyze(
+            source_filename=source_filename,
+            signals=signals,
+            processing_time_ms=effective_latency_ms,
+            allow_llm=allow_llm,
+            defer_llm=defer_llm,
+        )
+        coverage = AnalysisCoverage(
+            mode=mode,
+            deadline_ms=deadline_ms,
+            llm_evidence_requested=allow_llm,
+            degraded_reasons=reasons,
+            **signal_bundle["coverage"],
+        )
+        report = report.model_copy(update={"degraded": bool(reasons), "coverage": coverage})
+        return {"signal_bundle": signal_bundle, "report": report}
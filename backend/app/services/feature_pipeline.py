@@ -0,0 +1,267 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.services.frame_sampler import FrameSampler
+from app.services.keypoint_extractor import KEYPOINT_FEATURES, KeypointModel, get_keypoint_model, letterbox
+
+
+class FrameContext:
+    """
+    Shared per-frame buffers. Each intermediate (resized frame, gray, blur,
+    Otsu mask, largest contour box) is computed on first use and reused by
+    every later stage on the same frame.
+    """
+
+    __slots__ = ("frame", "downscale", "_small", "_gray", "_blur", "_mask", "_box")
+
+    def __init__(self, frame: np.ndarray, downscale: float = 1.0) -> None:
+        self.frame = frame
+        self.downscale = downscale
+        self._small: np.ndarray | None = None
+        self._gray: np.ndarray | None = None
+        self._blur: dict[int, np.ndarray] = {}
+        self._mask: dict[int, np.ndarray] = {}
+        self._box: dict[int, tuple[int, int, int, int] | None] = {}
+
+    @property
+    def small(self) -> np.ndarray:
+        if self._small is None:
+            if self.downscale == 1.0:
+                self._small = self.frame
+            else:
+                self._small = cv2.resize(
+                    self.frame, None, fx=self.downscale, fy=self.downscale, interpolation=cv2.INTER_AREA
+                )
+        return self._small
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    def blur(self, kernel: int = 3) -> np.ndarray:
+        if kernel not in self._blur:
+            self._blur[kernel] = cv2.GaussianBlur(self.gray, (kernel, kernel), 0)
+        return self._blur[kernel]
+
+    def otsu_mask(self, kernel: int = 3) -> np.ndarray:
+        if kernel not in self._mask:
+            _, self._mask[kernel] = cv2.threshold(self.blur(kernel), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return self._mask[kernel]
+
+    def largest_contour_box(self, kernel: int = 3) -> tuple[int, int, int, int] | None:
+        """Bounding box (x, y, w, h) of the largest external contour of the Otsu mask."""
+        if kernel not in self._box:
+            contours, _ = cv2.findContours(self.otsu_mask(kernel), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            self._box[kernel] = cv2.boundingRect(max(contours, key=cv2.contourArea)) if contours else None
+        return self._box[kernel]
+
+
+class FeatureStage(ABC):
+    """
+    One feature computation in the per-frame chain. `outputs` names the
+    values `process` returns; stages may keep state across frames (for
+    example the previous frame) and must clear it in `reset`. Stages that
+    gain from batching (model inference) override `process_batch` and set
+    `batch_size` above 1.
+    """
+
+    outputs: tuple[str, ...] = ()
+    batch_size: int = 1
+
+    @abstractmethod
+    def process(self, ctx: FrameContext) -> dict[str, float]: ...
+
+    def process_batch(self, ctxs: list[FrameContext]) -> list[dict[str, float]]:
+        """Consecutive frames in decode order."""
+        return [self.process(ctx) for ctx in ctxs]
+
+    def reset(self) -> None:
+        pass
+
+
+class BrightnessStage(FeatureStage):
+    outputs = ("brightness",)
+
+    def process(self, ctx: FrameContext) -> dict[str, float]:
+        return {"brightness": float(ctx.gray.mean())}
+
+
+class MotionStage(FeatureStage):
+    """Mean absolute gray-level difference to the previous frame."""
+
+    outputs = ("motion",)
+
+    def __init__(self) -> None:
+        self._prev_gray: np.ndarray | None = None
+
+    def process(self, ctx: FrameContext) -> dict[str, float]:
+        gray = ctx.gray
+        # After a downscale change the previous frame no longer lines up; restart the diff.
+        if self._prev_gray is None or self._prev_gray.shape != gray.shape:
+            motion = 0.0
+        else:
+            motion = float(cv2.absdiff(gray, self._prev_gray).mean())
+        self._prev_gray = gray
+        return {"motion": motion}
+
+    def reset(self) -> None:
+        self._prev_gray = None
+
+
+class ContourPostureStage(FeatureStage):
+    """Posture proxy from the largest Otsu contour: aspect ratio, horizontal probability, area change."""
+
+    outputs = ("aspect_ratio", "horizontal", "area", "area_change")
+
+    def __init__(self, blur_kernel: int = 3) -> None:
+        self.blur_kernel = blur_kernel
+        self._prev_area = 0.0
+
+    def process(self, ctx: FrameContext) -> dict[str, float]:
+        box = ctx.largest_contour_box(self.blur_kernel)
+        if box is not None:
+            _, _, w, h = box
+            aspect_ratio = float(w) / max(float(h), 1.0)
+            area = float(w * h)
+        else:
+            aspect_ratio = 0.0
+            area = 0.0
+        area_change = abs(area - self._prev_area)
+        self._prev_area = area
+        return {
+            "aspect_ratio": aspect_ratio,
+            "horizontal": float(1.0 / (1.0 + np.exp(-(aspect_ratio - 1.4) * 3.0))),
+            "area": area,
+            "area_change": area_change,
+        }
+
+    def reset(self) -> None:
+        self._prev_area = 0.0
+
+
+class KeypointStage(FeatureStage):
+    """
+    17 COCO keypoints per frame from a local pose model, in the
+    (x, y, score) layout the pose event model was trained on. Runs on the
+    downscaled frame; coordinates are mapped back to source-frame pixels
+    (or kept normalized to [0, 1]) so they do not move with the latency
+    controller's downscale level.
+    """
+
+    outputs = KEYPOINT_FEATURES
+
+    def __init__(
+        self,
+        model_path: str | Path,
+        batch_size: int = 8,
+        normalized: bool = False,
+        input_size: int = 192,
+    ) -> None:
+        self.model_path = str(model_path)
+        self.batch_size = max(1, batch_size)
+        self.normalized = normalized
+        self.input_size = input_size
+        self._model: KeypointModel | None = None
+
+    def process(self, ctx: FrameContext) -> dict[str, float]:
+        return self.process_batch([ctx])[0]
+
+    def process_batch(self, ctxs: list[FrameContext]) -> list[dict[str, float]]:
+        # Loaded on first use so the stage stays picklable for process-pool workers.
+        if self._model is None:
+            self._model = get_keypoint_model(self.model_path, self.input_size)
+        size = self._model.input_size
+        boxes = [letterbox(ctx.small, size) for ctx in ctxs]
+        keypoints = self._model.infer(np.stack([square for square, _, _, _ in boxes]))
+
+        rows = []
+        for ctx, (_, scale, pad_x, pad_y), kps in zip(ctxs, boxes, keypoints):
+            h, w = ctx.small.shape[:2]
+            x = (kps[:, 1] * size - pad_x) / scale
+            y = (kps[:, 0] * size - pad_y) / scale
+            if self.normalized:
+                x, y = x / w, y / h
+            else:
+                x, y = x / ctx.downscale, y / ctx.downscale
+            flat = np.stack([x, y, kps[:, 2]], axis=1).reshape(-1)
+            rows.append(dict(zip(KEYPOINT_FEATURES, flat.tolist())))
+        return rows
+
+
+class FeaturePipeline:
+    """
+    Ordered chain of feature stages run over one decoded frame. Stages share a
+    FrameContext, so adding a feature adds only its own compute, never another
+    decode or another resize/gray/blur of the same frame.
+    """
+
+    def __init__(self, stages: list[FeatureStage]) -> None:
+        seen: set[str] = set()
+        for stage in stages:
+            clash = seen.intersection(stage.outputs)
+            if clash:
+                raise ValueError(f"Duplicate feature outputs: {sorted(clash)}")
+            seen.update(stage.outputs)
+        self.stages = stages
+
+    @classmethod
+    def default(cls) -> "FeaturePipeline":
+        """Stages behind FrameStreamAnalyzer's video/pose signals, plus keypoints when a local pose model is configured."""
+        stages: list[FeatureStage] = [BrightnessStage(), MotionStage(), ContourPostureStage()]
+        if settings.keypoint_model_path and Path(settings.keypoint_model_path).exists():
+            stages.append(
+                KeypointStage(
+                    settings.keypoint_model_path,
+                    batch_size=settings.keypoint_batch_size,
+                    normalized=settings.keypoint_normalized_coords,
+                    input_size=settings.keypoint_input_size,
+                )
+            )
+        return cls(stages)
+
+    @property
+    def outputs(self) -> tuple[str, ...]:
+        return tuple(name for stage in self.stages for name in stage.outputs)
+
+    @property
+    def batch_size(self) -> int:
+        """Frames worth buffering before `process_batch`; 1 when no stage batches."""
+        return max(stage.batch_size for stage in self.stages) if self.stages else 1
+
+    def process(self, frame: np.ndarray, downscale: float = 1.0) -> dict[str, float]:
+        ctx = FrameContext(frame, downscale)
+        features: dict[str, float] = {}
+        for stage in self.stages:
+            features.update(stage.process(ctx))
+        return features
+
+    def process_batch(self, frames: list[np.ndarray], downscale: float = 1.0) -> list[dict[str, float]]:
+        ctxs = [FrameContext(frame, downscale) for frame in frames]
+        rows: list[dict[str, float]] = [{} for _ in frames]
+        for stage in self.stages:
+            for row, features in zip(rows, stage.process_batch(ctxs)):
+                row.update(features)
+        return rows
+
+    def reset(self) -> None:
+        for stage in self.stages:
+            stage.reset()
+
+    def scan(self, video_path: Path, max_samples: int, downscale: float = 1.0) -> dict[str, list[float]]:
+        """Single decode pass over `max_samples` frames spread across the video; one series per output."""
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            raise ValueError(f"Unable to open video: {video_path}")
+        self.reset()
+        series: dict[str, list[float]] = {name: [] for name in self.outputs}
+        for _, _, frame in FrameSampler.spread(cap, max_samples):
+            for name, value in self.process(frame, downscale).items():
+                series[name].append(value)
+        cap.release()
+        return series
@@ -0,0 +1,100 @@
+from typing import Iterator
+
+import cv2
+import numpy as np
+
+
+class FrameSampler:
+    """
+    Decode-aware frame iterator over an open cv2.VideoCapture.
+
+    Frames that will be discarded are only `grab()`bed, which skips the BGR
+    conversion and buffer copy that `read()` pays for; only sampled frames are
+    `retrieve()`d. On seekable files, gaps of at least `seek_min_gap` frames are
+    crossed by seeking (the decoder restarts from the nearest keyframe) instead
+    of stepping through every frame.
+
+    Sampling is stride-based (`stride`, which callers may change mid-iteration
+    for adaptive skipping) or time-based (`interval_seconds`), over the frame
+    range [`start_frame`, `end_frame`).
+    """
+
+    def __init__(
+        self,
+        cap: cv2.VideoCapture,
+        stride: int = 1,
+        interval_seconds: float | None = None,
+        max_samples: int | None = None,
+        seek_min_gap: int = 120,
+        start_frame: int = 0,
+        end_frame: int | None = None,
+    ) -> None:
+        self.cap = cap
+        self.stride = max(1, stride)
+        self.interval_seconds = interval_seconds
+        self.max_samples = max_samples
+        self.seek_min_gap = seek_min_gap
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self.seekable = self.total_frames > 0 and seek_min_gap > 0
+        self.start_frame = max(0, start_frame)
+        self.end_frame = end_frame if end_frame is not None else (self.total_frames or None)
+
+        self.frames_decoded = 0
+        self.frames_grabbed = 0
+        self.seeks = 0
+
+    @classmethod
+    def spread(cls, cap: cv2.VideoCapture, max_samples: int, **kwargs) -> "FrameSampler":
+        """Stride chosen so roughly `max_samples` frames span the whole video."""
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        stride = max(1, total_frames // max_samples) if total_frames else 1
+        return cls(cap, stride=stride, **kwargs)
+
+    def __iter__(self) -> Iterator[tuple[int, float, np.ndarray]]:
+        """Yields (frame_index, timestamp_seconds, frame) for each sampled frame."""
+        next_idx = self.start_frame
+        position = 0
+        if next_idx > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, next_idx)
+            self.seeks += 1
+            position = next_idx
+        samples = 0
+        while self.max_samples is None or samples < self.max_samples:
+            if self.end_frame is not None and next_idx >= self.end_frame:
+                return
+            gap = next_idx - position
+            if self.seekable and gap >= self.seek_min_gap:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, next_idx)
+                self.seeks += 1
+                position = next_idx
+            else:
+                while position < next_idx:
+                    if not self.cap.grab():
+                        return
+                    self.frames_grabbed += 1
+                    position += 1
+
+            if not self.cap.grab():
+                return
+            ok, frame = self.cap.retrieve()
+            if not ok:
+                return
+            position += 1
+            self.frames_decoded += 1
+            samples += 1
+            yield next_idx, next_idx / self.fps, frame
+
+            next_idx = self._next_index(next_idx, samples)
+
+    def stats(self) -> dict:
+        return {
+            "frames_decoded": self.frames_decoded,
+            "frames_grabbed_only": self.frames_grabbed,
+            "seeks": self.seeks,
+        }
+
+    def _next_index(self, current: int, samples: int) -> int:
+        if self.interval_seconds:
+            return max(current + 1, self.start_frame + int(round(samples * self.interval_seconds * self.fps)))
+        return current + self.stride
@@ -1,103 +1,291 @@
+import heapq
+import multiprocessing
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import Callable, Iterator
 
 import cv2
 import numpy as np
 
 from app.config import settings
+from app.services.feature_pipeline import FeaturePipeline
+from app.services.frame_sampler import FrameSampler
+from app.services.keypoint_extractor import KEYPOINT_FEATURES
+from app.services.latency_controller import LatencyController
+from app.services.signals import SignalTrack
+
+# Scan keys consumed by _summarize; any other pipeline output is reported as a mean under extra_features.
+SUMMARIZED_KEYS = {
+    "motion",
+    "brightness",
+    "horizontal",
+    "area_change",
+    "aspect_ratio",
+    "area",
+    "latency_ms",
+    "downscale_final",
+    "skip_stride_final",
+    "decode",
+    "controller",
+    "frame_index",
+    "min_stride",
+    *KEYPOINT_FEATURES,
+}
 
 
 class FrameStreamAnalyzer:
     """
     Frame-by-frame analyzer with latency-aware adaptive processing.
     Keeps per-frame compute lightweight to stay within sub-100ms targets.
+    Every feature comes from one decode pass through a FeaturePipeline; with
+    `parallel_workers` > 1, long videos are scanned segment-wise across cores,
+    and `analyze_anytime` trades coverage for a wall-clock deadline.
     """
 
-    def __init__(self, max_frames: int = 600) -> None:
+    def __init__(
+        self,
+        max_frames: int = 600,
+        progress_every: int = 30,
+        reconnect_attempts: int = 5,
+        reconnect_delay_seconds: float = 2.0,
+        parallel_workers: int = 0,
+        min_segment_seconds: float = 10.0,
+        pipeline_factory: Callable[[], FeaturePipeline] = FeaturePipeline.default,
+        anytime_coarse_samples: int = 32,
+        anytime_max_samples: int = 2000,
+    ) -> None:
         self.max_frames = max_frames
+        self.progress_every = max(1, progress_every)
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnect_delay_seconds = reconnect_delay_seconds
+        self.parallel_workers = parallel_workers
+        self.min_segment_seconds = min_segment_seconds
+        # Must be picklable (module-level callable) for parallel mode.
+        self.pipeline_factory = pipeline_factory
+        self.anytime_coarse_samples = max(2, anytime_coarse_samples)
+        self.anytime_max_samples = anytime_max_samples
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
 
-    def analyze(self, video_path: Path) -> dict:
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            raise ValueError(f"Unable to open video: {video_path}")
-
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    def analyze(self, video_path: Path, progress: Callable[[float], None] | None = None) -> dict:
+        fps, total_frames = _probe(video_path)
         duration_seconds = (total_frames / fps) if fps > 0 else 0.0
+        if self.parallel_workers > 1 and duration_seconds >= 2 * self.min_segment_seconds:
+            try:
+                return self.analyze_parallel(video_path, progress=progress)
+            except BrokenProcessPool:
+                # A worker died (OOM kill, crash in a decoder): rebuild the pool next time, scan here now.
+                self._reset_pool()
 
-        motion_scores: list[float] = []
-        brightness_scores: list[float] = []
-        horizontal_scores: list[float] = []
-        area_changes: list[float] = []
-        frame_latencies_ms: list[float] = []
+        # Spread the `max_frames` budget over the whole clip instead of stopping after the first
+        # `max_frames` frames; only a stream without a frame count falls back to a head cap.
+        scan = _scan_range(
+            str(video_path),
+            start_frame=0,
+            end_frame=None,
+            max_samples=None if total_frames > 0 else self.max_frames,
+            progress=progress,
+            progress_every=self.progress_every,
+            pipeline=self.pipeline_factory(),
+            min_stride=self._min_stride(total_frames),
+        )
+        return self._summarize(fps, total_frames, [scan])
 
-        prev_gray = None
-        prev_area = 0.0
+    def analyze_parallel(self, video_path: Path, progress: Callable[[float], None] | None = None) -> dict:
+        """
+        Split the whole video into contiguous frame segments and scan them in a
+        process pool (one decoder per core). Segments sample the same frames as a
+        sequential scan (the `max_frames` stride, boundaries on stride multiples)
+        and each is seeded with the sample just before its start so motion is
+        continuous across boundaries; the per-segment series are concatenated in
+        order and summarized as a sequential scan would be. The latency
+        controller still runs per segment, so degraded levels can differ.
+        """
+        fps, total_frames = _probe(video_path)
+        if total_frames <= 0:
+            raise ValueError(f"Parallel analysis needs a seekable video with a frame count: {video_path}")
 
-        downscale = 0.5
-        skip_stride = 1
-        frame_idx = 0
-        processed_count = 0
-        target_ms = float(settings.emergency_latency_target_ms)
+        min_segment_frames = max(1, int(self.min_segment_seconds * fps))
+        n_segments = max(1, min(self.parallel_workers, total_frames // min_segment_frames))
+        min_stride = self._min_stride(total_frames)
+        bounds = np.linspace(0, total_frames, n_segments + 1, dtype=np.int64) // min_stride * min_stride
+        bounds[-1] = total_frames
 
-        while processed_count < self.max_frames:
-            ok, frame = cap.read()
-            if not ok:
-                break
+        pool = self._get_pool()
+        futures = {
+            pool.submit(
+                _scan_range,
+                str(video_path),
+                int(bounds[i]),
+                int(bounds[i + 1]),
+                None,
+                pipeline=self.pipeline_factory(),
+                min_stride=min_stride,
+            ): i
+            for i in range(n_segments)
+        }
+        scans: list[dict | None] = [None] * n_segments
+        for done, future in enumerate(as_completed(futures), start=1):
+            scans[futures[future]] = future.result()
+            if progress is not None:
+                progress(done / n_segments)
 
-            if frame_idx % skip_stride != 0:
-                frame_idx += 1
-                continue
+        bundle = self._summarize(fps, total_frames, [scan for scan in scans if scan is not None])
+        bundle["latency"]["segments"] = n_segments
+        bundle["latency"]["parallel_workers"] = self.parallel_workers
+        return bundle
+
+    def analyze_anytime(
+        self,
+        video_path: Path,
+        deadline: float,
+        progress: Callable[[float], None] | None = None,
+    ) -> dict:
+        """
+        Deadline-bounded coarse-to-fine scan; `deadline` is a time.perf_counter()
+        value. A uniform coarse pass covers the whole clip first, then the
+        remaining budget probes the midpoints of the gaps with the most motion
+        per unexplored frame. Each probe decodes two consecutive frames so motion
+        is measured locally. Whatever was analyzed by the deadline is summarized
+        in temporal order; `latency.deadline_hit` tells whether refinement was
+        cut short.
+        """
+        fps, total_frames = _probe(video_path)
+        if total_frames < 2:
+            return self.analyze(video_path, progress=progress)
 
+        cap = self._open_capture(str(video_path))
+        pipeline = self.pipeline_factory()
+        controller = LatencyController.from_settings()
+        probes: dict[int, dict] = {}
+        started = time.perf_counter()
+        budget = max(deadline - started, 1e-6)
+        probe_cost = 0.0
+
+        def probe(frame_idx: int) -> bool:
+            nonlocal probe_cost
+            t0 = time.perf_counter()
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+            ok, first = cap.read()
+            if not ok:
+                return False
+            ok_next, second = cap.read()
             start = time.perf_counter()
-            small = cv2.resize(frame, None, fx=downscale, fy=downscale, interpolation=cv2.INTER_AREA)
-            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
-            blur = cv2.GaussianBlur(gray, (3, 3), 0)
-
-            brightness_scores.append(float(gray.mean()))
-            if prev_gray is None:
-                motion_scores.append(0.0)
-            else:
-                diff = cv2.absdiff(gray, prev_gray)
-                motion_scores.append(float(diff.mean()))
-
-            _, th = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            contours, _ = cv2.findContours(th, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            if contours:
-                cnt = max(contours, key=cv2.contourArea)
-                x, y, w, h = cv2.boundingRect(cnt)
-                aspect_ratio = float(w) / max(float(h), 1.0)
-                area = float(w * h)
-            else:
-                aspect_ratio = 0.0
-                area = 0.0
-
-            horizontal_prob = float(1.0 / (1.0 + np.exp(-(aspect_ratio - 1.4) * 3.0)))
-            horizontal_scores.append(horizontal_prob)
-            area_changes.append(abs(area - prev_area))
-
-            prev_area = area
-            prev_gray = gray
+            pipeline.reset()
+            features = pipeline.process(first, controller.downscale)
+            if ok_next:
+                features = pipeline.process(second, controller.downscale)
             elapsed_ms = (time.perf_counter() - start) * 1000.0
-            frame_latencies_ms.append(elapsed_ms)
+            probes[frame_idx] = {**features, "latency_ms": elapsed_ms}
+            controller.observe(elapsed_ms, frame_idx)
+            wall = time.perf_counter() - t0
+            probe_cost = wall if probe_cost == 0.0 else 0.8 * probe_cost + 0.2 * wall
+            if progress is not None:
+                progress(min(1.0, (time.perf_counter() - started) / budget))
+            return True
 
-            if elapsed_ms > target_ms:
-                downscale = max(0.25, downscale - 0.1)
-                skip_stride = min(4, skip_stride + 1)
+        def out_of_time() -> bool:
+            return time.perf_counter() + probe_cost > deadline
 
-            processed_count += 1
-            frame_idx += 1
+        def gap_score(left: int, right: int) -> float:
+            motion = max(probes[left]["motion"], probes[right]["motion"]) if left in probes and right in probes else 0.0
+            return (right - left) * (1.0 + motion)
+
+        coarse = sorted({int(x) for x in np.linspace(0, total_frames - 2, min(self.anytime_coarse_samples, total_frames - 1))})
+        deadline_hit = False
+        for frame_idx in (coarse[i] for i in _spread_order(len(coarse))):
+            if probes and out_of_time():
+                deadline_hit = True
+                break
+            probe(frame_idx)
 
+        probed = sorted(probes)
+        heap = [(-gap_score(a, b), a, b) for a, b in zip(probed, probed[1:]) if b - a > 2]
+        heapq.heapify(heap)
+        while heap and not deadline_hit:
+            if len(probes) >= self.anytime_max_samples or out_of_time():
+                deadline_hit = len(probes) < self.anytime_max_samples
+                break
+            _, left, right = heapq.heappop(heap)
+            mid = (left + right) // 2
+            if not probe(mid):
+                continue
+            for a, b in ((left, mid), (mid, right)):
+                if b - a > 2:
+                    heapq.heappush(heap, (-gap_score(a, b), a, b))
         cap.release()
 
+        if not probes:
+            raise ValueError("No frames processed from uploaded video.")
+        ordered = sorted(probes)
+        scan: dict = {name: [probes[i][name] for i in ordered] for name in probes[ordered[0]]}
+        scan["frame_index"] = ordered
+        scan["downscale_final"] = controller.downscale
+        scan["skip_stride_final"] = 1
+        scan["controller"] = controller.summary()
+        scan["decode"] = {"frames_decoded": 2 * len(ordered), "frames_grabbed_only": 0, "seeks": len(ordered)}
+
+        bundle = self._summarize(fps, total_frames, [scan])
+        bundle["latency"]["deadline_hit"] = deadline_hit
+        bundle["latency"]["scan_ms"] = (time.perf_counter() - started) * 1000.0
+        return bundle
+
+    def warm_up(self) -> dict:
+        """Spawn the segment worker processes up front so the first long upload skips interpreter start-up."""
+        if self.parallel_workers <= 1:
+            return {"parallel_workers": self.parallel_workers}
+        pool = self._get_pool()
+        for future in [pool.submit(_init_segment_worker) for _ in range(self.parallel_workers)]:
+            future.result()
+        return {"parallel_workers": self.parallel_workers}
+
+    def close(self) -> None:
+        self._reset_pool()
+
+    def _min_stride(self, total_frames: int) -> int:
+        """Stride that spreads the `max_frames` budget over the whole clip."""
+        return -(-total_frames // self.max_frames) if total_frames > 0 else 1
+
+    def _reset_pool(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: worker processes must not inherit TensorFlow / thread state from the API process.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.parallel_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_segment_worker,
+                )
+            return self._pool
+
+    @staticmethod
+    def _summarize(fps: float, total_frames: int, scans: list[dict]) -> dict:
+        """Merge ordered range scans into the video/pose/audio/latency bundle the agent expects."""
+        frame_latencies_ms = [x for scan in scans for x in scan["latency_ms"]]
         if not frame_latencies_ms:
             raise ValueError("No frames processed from uploaded video.")
 
+        target_ms = float(settings.emergency_latency_target_ms)
+        duration_seconds = (total_frames / fps) if fps > 0 else 0.0
         latency = np.array(frame_latencies_ms, dtype=np.float32)
-        motion = np.array(motion_scores, dtype=np.float32)
-        bright = np.array(brightness_scores, dtype=np.float32)
-        horizontal = np.array(horizontal_scores, dtype=np.float32)
-        area_delta = np.array(area_changes, dtype=np.float32)
+        motion = _series(scans, "motion")
+        bright = _series(scans, "brightness")
+        horizontal = _series(scans, "horizontal")
+        area_delta = _series(scans, "area_change")
+        aspect = _series(scans, "aspect_ratio")
+
+        decode_stats: dict[str, int] = {}
+        for scan in scans:
+            for key, value in scan["decode"].items():
+                decode_stats[key] = decode_stats.get(key, 0) + value
 
         latency_summary = {
             "target_ms": int(target_ms),
@@ -106,9 +294,17 @@ class FrameStreamAnalyzer:
             "p95_ms": float(np.percentile(latency, 95)),
             "max_ms": float(np.max(latency)),
             "violations": int(np.sum(latency > target_ms)),
-            "met_target": bool(np.max(latency) <= target_ms),
-            "downscale_final": downscale,
-            "skip_stride_final": skip_stride,
+            "met_target": bool(np.percentile(latency, 95) <= target_ms),
+            "max_within_target": bool(np.max(latency) <= target_ms),
+            "downscale_final": scans[-1]["downscale_final"],
+            "skip_stride_final": scans[-1]["skip_stride_final"],
+            "decode": decode_stats,
+            "controller": {
+                "levels": scans[-1]["controller"]["levels"],
+                "level_final": scans[-1]["controller"]["level_final"],
+                "level_series": [x for scan in scans for x in scan["controller"]["level_series"]],
+                "events": [x for scan in scans for x in scan["controller"]["events"]],
+            },
         }
 
         video_signals = {
@@ -119,22 +315,243 @@ class FrameStreamAnalyzer:
             "brightness_mean": float(np.mean(bright)) if bright.size else 0.0,
             "motion_mean": float(np.mean(motion)) if motion.size else 0.0,
             "motion_std": float(np.std(motion)) if motion.size else 0.0,
-            "motion_series": [round(float(x), 4) for x in motion[:120].tolist()],
+            "motion_series": motion[:120],
         }
         pose_signals = {
-            "pose_sample_count": int(len(horizontal_scores)),
+            "pose_sample_count": int(horizontal.size),
+            "aspect_ratio_mean": float(np.mean(aspect)) if aspect.size else 0.0,
             "horizontal_posture_score": float(np.mean(horizontal)) if horizontal.size else 0.0,
             "area_change_mean": float(np.mean(area_delta)) if area_delta.size else 0.0,
-            "horizontal_series": [round(float(x), 4) for x in horizontal[:120].tolist()],
+            "horizontal_series": horizontal[:120],
         }
+        extra = set(scans[0]) - SUMMARIZED_KEYS
+        if extra:
+            video_signals["extra_features"] = {
+                name: float(np.mean(_series(scans, name))) for name in sorted(extra)
+            }
         audio_signals = {
             "distress_score": min(1.0, float(video_signals["motion_std"]) / 25.0),
             "audio_pipeline_status": "placeholder_from_video_proxy",
         }
 
+        keypoints = None
+        if KEYPOINT_FEATURES[0] in scans[0]:
+            keypoints = np.stack([_series(scans, name) for name in KEYPOINT_FEATURES], axis=1)
+            scores = keypoints[:, 2::3]
+            pose_signals["keypoint_frames"] = int(keypoints.shape[0])
+            pose_signals["keypoint_score_mean"] = float(scores.mean()) if scores.size else 0.0
+
+        frame_index = np.concatenate([np.asarray(scan["frame_index"], dtype=np.int64) for scan in scans])
+        levels = scans[-1]["controller"]["levels"]
+        used_levels = [levels[x] for x in set(latency_summary["controller"]["level_series"])] or [levels[0]]
+        stride_floor = max(scan.get("min_stride", 1) for scan in scans)
+        gaps = np.diff(np.concatenate(([0], frame_index, [max(total_frames, int(frame_index[-1]) + 1)])))
+        coverage = {
+            "frames_analyzed": int(frame_index.size),
+            "total_frames": int(total_frames),
+            "sampled_fraction": float(frame_index.size / total_frames) if total_frames else 1.0,
+            "span_fraction": (
+                float((frame_index[-1] - frame_index[0] + 1) / total_frames) if total_frames else 1.0
+            ),
+            "max_gap_seconds": float(np.max(gaps) / fps) if fps > 0 else 0.0,
+            "downscale_min": float(min(level[0] for level in used_levels)),
+            "stride_max": int(max(stride_floor, *(level[1] for level in used_levels))),
+        }
+
         return {
             "video": video_signals,
             "pose": pose_signals,
             "audio": audio_signals,
             "latency": latency_summary,
+            "coverage": coverage,
+            # Full-length per-sample series for sliding-window detection.
+            "track": SignalTrack(
+                frame_index / fps if fps > 0 else frame_index.astype(np.float64),
+                motion,
+                horizontal,
+                keypoints,
+            ),
         }
+
+    def stream(self, source: str | int, stop_event: threading.Event, realtime: bool = True) -> Iterator[dict]:
+        """
+        Long-running frame loop over an RTSP URL, camera device index or local file.
+        Local files are paced at their native fps when `realtime` is set; live
+        sources are reopened on read failure. Yields one feature sample per
+        processed frame and keeps only the previous frame in memory.
+        """
+        is_file = isinstance(source, str) and Path(source).exists()
+        cap = self._open_capture(source)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        pipeline = self.pipeline_factory()
+        # Stream runs for hours: keep only recent controller history.
+        controller = LatencyController.from_settings(history=16)
+        frame_idx = 0
+        failures = 0
+        started = time.perf_counter()
+
+        try:
+            while not stop_event.is_set():
+                if frame_idx % controller.stride != 0:
+                    if not cap.grab():
+                        break
+                    frame_idx += 1
+                    continue
+
+                ok, frame = cap.read()
+                if not ok:
+                    if is_file or failures >= self.reconnect_attempts:
+                        break
+                    failures += 1
+                    cap.release()
+                    stop_event.wait(self.reconnect_delay_seconds)
+                    cap = self._open_capture(source)
+                    pipeline.reset()
+                    continue
+                failures = 0
+
+                if is_file:
+                    timestamp = frame_idx / fps
+                    if realtime:
+                        ahead = timestamp - (time.perf_counter() - started)
+                        if ahead > 0:
+                            stop_event.wait(ahead)
+                    captured_at = time.perf_counter()
+                else:
+                    captured_at = time.perf_counter()
+                    timestamp = captured_at - started
+
+                downscale = controller.downscale
+                measures = pipeline.process(frame, downscale)
+                elapsed_ms = (time.perf_counter() - captured_at) * 1000.0
+                controller.observe(elapsed_ms, frame_idx)
+
+                yield {
+                    "t": float(timestamp),
+                    "frame_index": frame_idx,
+                    "captured_at": captured_at,
+                    "latency_ms": elapsed_ms,
+                    "downscale": downscale,
+                    "quality_level": controller.level,
+                    **measures,
+                }
+                frame_idx += 1
+        finally:
+            cap.release()
+
+    def _open_capture(self, source: str | int) -> cv2.VideoCapture:
+        cap = cv2.VideoCapture(source if isinstance(source, int) else str(source))
+        if not cap.isOpened():
+            cap.release()
+            raise ValueError(f"Unable to open video source: {source}")
+        return cap
+
+
+def _series(scans: list[dict], name: str) -> np.ndarray:
+    return np.concatenate([np.asarray(scan.get(name, ()), dtype=np.float32) for scan in scans])
+
+
+def _probe(video_path: Path) -> tuple[float, int]:
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise ValueError(f"Unable to open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    cap.release()
+    return fps, total_frames
+
+
+def _spread_order(n: int) -> list[int]:
+    """Bit-reversal permutation of range(n): every prefix is spread evenly over the range."""
+    bits = max(1, (n - 1).bit_length())
+    order = [int(format(i, f"0{bits}b")[::-1], 2) for i in range(1 << bits)]
+    return [i for i in order if i < n]
+
+
+def _init_segment_worker() -> None:
+    # One decoder per process already saturates a core; avoid OpenCV thread oversubscription.
+    cv2.setNumThreads(1)
+
+
+def _scan_range(
+    video_path: str,
+    start_frame: int,
+    end_frame: int | None,
+    max_samples: int | None,
+    progress: Callable[[float], None] | None = None,
+    progress_every: int = 30,
+    pipeline: FeaturePipeline | None = None,
+    min_stride: int = 1,
+) -> dict:
+    """
+    Adaptive scan of frames [start_frame, end_frame) through one feature pipeline,
+    sampling every `min_stride`-th frame or sparser when the controller degrades.
+    When starting mid-video the sample one stride earlier is run first (not
+    recorded) to seed stateful stages such as the motion diff. Module-level so process-pool
+    workers can run it.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Unable to open video: {video_path}")
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+
+    pipeline = pipeline or FeaturePipeline.default()
+    pipeline.reset()
+    scan: dict = {name: [] for name in pipeline.outputs}
+    scan["latency_ms"] = []
+    scan["frame_index"] = []
+    controller = LatencyController.from_settings()
+    batches = 0
+    min_stride = max(1, min_stride)
+    seed_frame = max(0, start_frame - min_stride)
+    sampler = FrameSampler(
+        cap,
+        stride=max(min_stride, controller.stride),
+        max_samples=None if max_samples is None else max_samples + int(seed_frame < start_frame),
+        start_frame=seed_frame,
+        end_frame=end_frame,
+    )
+
+    # Batching stages (keypoint inference) get up to `batch_size` consecutive frames per call;
+    # each frame is charged the amortized batch time.
+    pending: list[tuple[int, np.ndarray]] = []
+
+    def flush() -> None:
+        start = time.perf_counter()
+        rows = pipeline.process_batch([frame for _, frame in pending], controller.downscale)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0 / len(pending)
+        for (frame_idx, _), row in zip(pending, rows):
+            for name, value in row.items():
+                scan[name].append(value)
+            scan["latency_ms"].append(elapsed_ms)
+            scan["frame_index"].append(frame_idx)
+            controller.observe(elapsed_ms, frame_idx)
+        sampler.stride = max(min_stride, controller.stride)
+        pending.clear()
+
+    for frame_idx, _, frame in sampler:
+        if frame_idx < start_frame:
+            pipeline.process(frame, controller.downscale)
+            continue
+
+        pending.append((frame_idx, frame))
+        if len(pending) < pipeline.batch_size:
+            continue
+        flush()
+        batches += 1
+
+        if progress is not None and batches % max(1, progress_every // pipeline.batch_size) == 0:
+            fraction = len(scan["frame_index"]) / max_samples if max_samples else 0.0
+            if total_frames > 0:
+                fraction = max(fraction, (frame_idx + 1) / total_frames)
+            progress(min(1.0, fraction))
+
+    if pending:
+        flush()
+    cap.release()
+    scan["downscale_final"] = controller.downscale
+    scan["skip_stride_final"] = sampler.stride
+    scan["min_stride"] = min_stride
+    scan["controller"] = controller.summary()
+    scan["decode"] = sampler.stats()
+    return scan
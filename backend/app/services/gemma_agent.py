@@ -1,12 +1,14 @@
 import json
+import threading
+import time
 from datetime import datetime, timezone
 from uuid import uuid4
 
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
+import numpy as np
 
 from app.config import settings
-from app.schemas import Incident, IncidentReport, IncidentType
+from app.schemas import EnrichmentState, Incident, IncidentReport, IncidentType
+from app.services.llm_cache import LLMResponseCache
 from app.services.local_gemma_client import LocalGemmaClient
 from app.services.pose_event_detector import PoseEventDetector
 
@@ -16,32 +18,147 @@ STRIP_TYPES = {IncidentType.fainting, IncidentType.choking}
 class IncidentAnalysisAgent:
     """
     Agentic analyzer focused on shoplifting / suspicious-activity detection.
-    Pipeline:
-      1. Fast-path TF pose detector (primary signal)
-      2. Signal-context heuristics (boost / fallback)
-      3. LoRA-tuned LLM for evidence enrichment only
+    Cost-ordered cascade; each stage's confidence band decides whether the
+    next, more expensive one runs:
+      1. Motion gate (summary statistics): a static scene exits as "none"
+      2. Fast-path TF pose detector + signal-context heuristics: exits below
+         the report threshold or at/above the confident band
+      3. LLM (Gemini classifier or LoRA-tuned evidence) for the uncertain band only,
+         inline or deferred to `enrich` so it stays off the response path
+    Every report records which stages ran and what each cost under raw_signals.cascade.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, llm_cache: LLMResponseCache | None = None) -> None:
         self.pose_event_detector = PoseEventDetector(
-            model_path=settings.pose_event_model_path,
+            model_path=(
+                settings.pose_event_tflite_path
+                if settings.pose_event_runtime == "tflite"
+                else settings.pose_event_model_path
+            ),
             label_path=settings.pose_event_label_path,
+            window_hop=settings.pose_window_hop,
+            sample_hz=settings.pose_window_sample_hz,
+            runtime=settings.pose_event_runtime,
+            max_batch_size=settings.pose_batch_max_size,
+            max_wait_ms=settings.pose_batch_max_wait_ms,
+            lazy=True,
         )
-        self.local_gemma_client = LocalGemmaClient()
+        self.local_gemma_client = LocalGemmaClient(cache=llm_cache)
+        self._cascade_lock = threading.Lock()
+        self._cascade_counts = {
+            "requests": 0,
+            "exit_motion_gate": 0,
+            "exit_pose_model": 0,
+            "llm_calls": 0,
+            "llm_deferred": 0,
+        }
 
-    def analyze(self, source_filename: str, signals: dict, processing_time_ms: float) -> IncidentReport:
-        signals["fast_path"] = self.pose_event_detector.predict(signals)
-        fast_path = signals.get("fast_path", {})
-
-        if settings.model_mode == "gemini" and settings.gemini_api_key and (not settings.offline_mode):
-            incidents = self._gemini_primary_classify(signals)
-            if not incidents:
-                incidents = self._detect_shoplifting(signals, fast_path)
-        elif settings.model_mode == "local_gemma" and self.local_gemma_client.available():
-            incidents = self._detect_shoplifting(signals, fast_path)
+    def cascade_metrics(self) -> dict:
+        with self._cascade_lock:
+            counts = dict(self._cascade_counts)
+        counts["llm_share"] = counts["llm_calls"] / counts["requests"] if counts["requests"] else 0.0
+        return counts
+
+    def analyze(
+        self,
+        source_filename: str,
+        signals: dict,
+        processing_time_ms: float,
+        allow_llm: bool = True,
+        defer_llm: bool = False,
+    ) -> IncidentReport:
+        """
+        With `defer_llm`, an escalated candidate is reported from the fast path
+        with enrichment_state "pending"; `enrich` runs the LLM stage later.
+        """
+        incidents, cascade = self._run_cascade(signals, allow_llm, defer_llm)
+        signals["cascade"] = cascade
+        with self._cascade_lock:
+            self._cascade_counts["requests"] += 1
+            if cascade["exit_stage"] in ("motion_gate", "pose_model"):
+                self._cascade_counts[f"exit_{cascade['exit_stage']}"] += 1
+            self._cascade_counts["llm_calls"] += int(cascade["llm_called"])
+            self._cascade_counts["llm_deferred"] += int(cascade["llm_deferred"])
+
+        incidents = self._finalize_incidents(incidents)
+        # The full per-sample track only feeds detection; the report keeps the window track instead.
+        signals.pop("track", None)
+
+        return IncidentReport(
+            report_id=str(uuid4()),
+            source_filename=source_filename,
+            created_at=datetime.now(tz=timezone.utc),
+            processing_time_ms=processing_time_ms,
+            emergency_latency_target_ms=settings.emergency_latency_target_ms,
+            met_latency_target=processing_time_ms <= settings.emergency_latency_target_ms,
+            offline_mode=settings.offline_mode,
+            video_never_leaves_device=settings.video_never_leaves_device,
+            summary=self._build_summary(incidents),
+            incidents=incidents,
+            timeline=self._build_timeline(incidents),
+            raw_signals=signals,
+            enrichment_state=EnrichmentState.pending if cascade["llm_deferred"] else EnrichmentState.not_needed,
+        )
+
+    def enrich(self, report: IncidentReport) -> IncidentReport:
+        """Run the LLM stage deferred by `analyze(defer_llm=True)` and return the enriched report."""
+        signals = dict(report.raw_signals)
+        cascade = dict(signals.get("cascade") or {})
+        stages = [dict(stage) for stage in cascade.get("stages", [])]
+        candidate = report.incidents[0]
+
+        start = time.perf_counter()
+        classified, llm_evidence, action, backend = self._call_llm(signals, candidate.incident_type)
+        for stage in stages:
+            if stage["stage"] == "llm":
+                if backend:
+                    stage.update(
+                        ran=True,
+                        outcome="done",
+                        reason="deferred",
+                        backend=backend,
+                        elapsed_ms=(time.perf_counter() - start) * 1000.0,
+                    )
+                else:
+                    stage.update(outcome="skipped", reason="unavailable")
+        if backend:
+            signals["cascade"] = {**cascade, "stages": stages, "exit_stage": "llm", "llm_called": True}
+        else:
+            signals["cascade"] = {**cascade, "stages": stages}
+        with self._cascade_lock:
+            # A replayed cache hit never went through `analyze`, so it joins the denominator here.
+            if (report.raw_signals.get("cache") or {}).get("hit"):
+                self._cascade_counts["requests"] += 1
+                self._cascade_counts["llm_deferred"] += 1
+            self._cascade_counts["llm_calls"] += int(bool(backend))
+
+        if classified:
+            incidents = self._finalize_incidents(classified)
+        elif llm_evidence:
+            incidents = [
+                candidate.model_copy(
+                    update={
+                        "evidence": f"{candidate.evidence} LLM: {llm_evidence}".strip(),
+                        "recommended_action": action or candidate.recommended_action,
+                    }
+                ),
+                *report.incidents[1:],
+            ]
         else:
-            incidents = self._detect_shoplifting(signals, fast_path)
+            return report.model_copy(update={"raw_signals": signals, "enrichment_state": EnrichmentState.failed})
+
+        return report.model_copy(
+            update={
+                "summary": self._build_summary(incidents),
+                "incidents": incidents,
+                "timeline": self._build_timeline(incidents),
+                "raw_signals": signals,
+                "enrichment_state": EnrichmentState.done,
+            }
+        )
 
+    @staticmethod
+    def _finalize_incidents(incidents: list[Incident]) -> list[Incident]:
         incidents = [i for i in incidents if i.incident_type not in STRIP_TYPES]
 
         # Final hard filter: never emit fainting or choking (shoplifting-only pipeline)
@@ -65,17 +182,20 @@ class IncidentAnalysisAgent:
                     incident_type=IncidentType.none,
                     confidence=0.8,
                     timestamp_seconds=inc.timestamp_seconds,
+                    end_timestamp_seconds=inc.end_timestamp_seconds,
                     evidence="No critical event (pipeline is shoplifting-only).",
                     recommended_action="Continue monitoring.",
                 )
             return inc
 
-        incidents = [_sanitize(i) for i in incidents]
+        return [_sanitize(i) for i in incidents]
 
-        summary = self._build_summary(incidents)
-        timeline = [
+    @staticmethod
+    def _build_timeline(incidents: list[Incident]) -> list[dict]:
+        return [
             {
                 "t": inc.timestamp_seconds,
+                "t_end": inc.end_timestamp_seconds,
                 "type": inc.incident_type.value,
                 "confidence": inc.confidence,
                 "note": inc.evidence,
@@ -83,26 +203,104 @@ class IncidentAnalysisAgent:
             for inc in incidents
         ]
 
-        return IncidentReport(
-            report_id=str(uuid4()),
-            source_filename=source_filename,
-            created_at=datetime.now(tz=timezone.utc),
-            processing_time_ms=processing_time_ms,
-            emergency_latency_target_ms=settings.emergency_latency_target_ms,
-            met_latency_target=processing_time_ms <= settings.emergency_latency_target_ms,
-            offline_mode=settings.offline_mode,
-            video_never_leaves_device=settings.video_never_leaves_device,
-            summary=summary,
-            incidents=incidents,
-            timeline=timeline,
-            raw_signals=signals,
+    def _run_cascade(self, signals: dict, allow_llm: bool, defer_llm: bool = False) -> tuple[list[Incident], dict]:
+        """Run the stages in cost order; returns (incidents, cascade record)."""
+        stages: list[dict] = []
+        cascade = {"stages": stages, "exit_stage": None, "llm_called": False, "llm_deferred": False}
+
+        start = time.perf_counter()
+        motion_mean = float(signals.get("video", {}).get("motion_mean", 0.0))
+        gate_open = motion_mean >= settings.cascade_motion_gate
+        stages.append(
+            {
+                "stage": "motion_gate",
+                "ran": True,
+                "outcome": "pass" if gate_open else "exit",
+                "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+                "motion_mean": motion_mean,
+            }
         )
+        if not gate_open:
+            signals["fast_path"] = {"available": False, "event_probs": {}, "skipped": "motion_gate"}
+            cascade["exit_stage"] = "motion_gate"
+            return [], cascade
 
-    def _detect_shoplifting(self, signals: dict, fast_path: dict) -> list[Incident]:
-        """
-        Shoplifting-focused detection combining TF detector + signal heuristics.
-        LLM is used only for evidence enrichment.
-        """
+        start = time.perf_counter()
+        signals["fast_path"] = self.pose_event_detector.predict(signals)
+        fast_path = signals["fast_path"]
+        incident_type, confidence, evidence_parts = self._score_candidate(signals, fast_path)
+        if incident_type == IncidentType.none or confidence < settings.cascade_report_min_confidence:
+            outcome = "exit"
+        elif confidence >= settings.cascade_llm_max_confidence:
+            outcome = "confident"
+        else:
+            outcome = "escalate"
+        stages.append(
+            {
+                "stage": "pose_model",
+                "ran": True,
+                "outcome": outcome,
+                "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+                "candidate": incident_type.value,
+                "confidence": confidence,
+            }
+        )
+        if outcome == "exit":
+            cascade["exit_stage"] = "pose_model"
+            return [], cascade
+
+        llm_record = {"stage": "llm", "ran": False, "outcome": "skipped", "elapsed_ms": 0.0}
+        stages.append(llm_record)
+        action = ""
+        if outcome == "confident":
+            llm_record["reason"] = "confident"
+            cascade["exit_stage"] = "pose_model"
+        elif not allow_llm:
+            llm_record["reason"] = "deadline"
+            cascade["exit_stage"] = "pose_model"
+        elif not self._gemini_enabled() and not self.local_gemma_client.available():
+            llm_record["reason"] = "unavailable"
+            cascade["exit_stage"] = "pose_model"
+        elif defer_llm:
+            # Off the critical path: the fast-path incident is reported now and enriched later.
+            llm_record.update(outcome="deferred", reason="deferred")
+            cascade["exit_stage"] = "pose_model"
+            cascade["llm_deferred"] = True
+        else:
+            start = time.perf_counter()
+            classified, llm_evidence, action, backend = self._call_llm(signals, incident_type)
+            if backend:
+                cascade["llm_called"] = True
+                cascade["exit_stage"] = "llm"
+                llm_record.update(
+                    ran=True,
+                    outcome="done",
+                    backend=backend,
+                    elapsed_ms=(time.perf_counter() - start) * 1000.0,
+                )
+            else:
+                llm_record["reason"] = "unavailable"
+                cascade["exit_stage"] = "pose_model"
+            if classified:
+                return classified, cascade
+            if llm_evidence:
+                evidence_parts.append(f"LLM: {llm_evidence}")
+
+        start_s, end_s = self._incident_span(signals, fast_path, incident_type)
+        return [
+            Incident(
+                incident_type=incident_type,
+                confidence=confidence,
+                timestamp_seconds=start_s,
+                end_timestamp_seconds=end_s,
+                evidence=" ".join(evidence_parts),
+                recommended_action=action or self._default_action(incident_type),
+            )
+        ], cascade
+
+    @staticmethod
+    def _score_candidate(signals: dict, fast_path: dict) -> tuple[IncidentType, float, list[str]]:
+        """Shoplifting-focused candidate from the TF detector plus signal heuristics: (type, confidence, evidence)."""
         video = signals.get("video", {})
         pose = signals.get("pose", {})
         audio = signals.get("audio", {})
@@ -162,24 +360,40 @@ class IncidentAnalysisAgent:
                 confidence = min(0.90, 0.4 + motion_std / 40)
                 evidence_parts.append("Abrupt high-variance motion pattern observed.")
 
-        if incident_type != IncidentType.none and confidence >= 0.4:
-            llm_evidence, llm_action = self._get_llm_evidence(signals, incident_type)
-            if llm_evidence:
-                evidence_parts.append(f"LLM: {llm_evidence}")
+        return incident_type, confidence, evidence_parts
 
-            action = llm_action or self._default_action(incident_type)
+    @staticmethod
+    def _incident_span(signals: dict, fast_path: dict, incident_type: IncidentType) -> tuple[float, float | None]:
+        """
+        Start/end seconds for an incident: the strongest detector segment of that
+        type, else the detector's peak window, else the peak-motion sample.
+        """
+        for segment in fast_path.get("segments", []):
+            if segment["label"] == incident_type.value:
+                return segment["start"], segment["end"]
+        peak_window = fast_path.get("peak_window")
+        if peak_window:
+            return peak_window["start"], peak_window["end"]
+        track = signals.get("track")
+        if track is not None and len(track):
+            return float(track.t[int(np.argmax(track.motion))]), None
+        return 0.0, None
 
-            return [
-                Incident(
-                    incident_type=incident_type,
-                    confidence=confidence,
-                    timestamp_seconds=1.5,
-                    evidence=" ".join(evidence_parts),
-                    recommended_action=action,
-                )
-            ]
+    @staticmethod
+    def _gemini_enabled() -> bool:
+        return settings.model_mode == "gemini" and bool(settings.gemini_api_key) and not settings.offline_mode
 
-        return []
+    def _call_llm(self, signals: dict, incident_type: IncidentType) -> tuple[list[Incident], str, str, str]:
+        """
+        LLM stage: (classified incidents, evidence, action, backend); Gemini classifies, local Gemma adds evidence.
+        backend is "" when no backend was reached (e.g. the local client's breaker is open).
+        """
+        if self._gemini_enabled():
+            return self._gemini_primary_classify(signals), "", "", "gemini"
+        if not self.local_gemma_client.available():
+            return [], "", "", ""
+        llm_evidence, action = self._get_llm_evidence(signals, incident_type)
+        return [], llm_evidence, action, "local_gemma"
 
     def _get_llm_evidence(self, signals: dict, detected_type: IncidentType) -> tuple[str, str]:
         """Ask the LoRA-tuned LLM for evidence text. Returns (evidence, action)."""
@@ -220,6 +434,9 @@ class IncidentAnalysisAgent:
             f"MULTIMODAL SUMMARY:\n{summary_text}\n\n"
             "JSON array:"
         )
+        # Deferred: the Google GenAI client is heavy and only needed in online gemini mode.
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         llm = ChatGoogleGenerativeAI(
             model=settings.gemini_model_name,
             google_api_key=settings.gemini_api_key,
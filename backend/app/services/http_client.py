@@ -0,0 +1,163 @@
+import http.client
+import queue
+import threading
+import time
+import urllib.parse
+
+# Transport failures callers should treat as "endpoint unhealthy".
+TRANSPORT_ERRORS = (OSError, http.client.HTTPException)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; open calls
+    are refused until `reset_seconds` pass, then one caller at a time gets a
+    half-open trial whose outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._stats = {"opened": 0, "rejected": 0, "successes": 0, "failures": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allows(self) -> bool:
+        """Read-only: would `before_call` let a call (or the half-open trial) through right now?"""
+        with self._lock:
+            if self._state == "closed":
+                return True
+            return (
+                self._state == "open"
+                and not self._trial_in_flight
+                and time.monotonic() - self._opened_at >= self.reset_seconds
+            )
+
+    def before_call(self) -> str:
+        """Returns "closed" (call normally), "half_open" (this caller runs the trial) or "open" (skip)."""
+        with self._lock:
+            if self._state == "closed":
+                return "closed"
+            if (
+                self._state == "open"
+                and not self._trial_in_flight
+                and time.monotonic() - self._opened_at >= self.reset_seconds
+            ):
+                self._state = "half_open"
+                self._trial_in_flight = True
+                return "half_open"
+            self._stats["rejected"] += 1
+            return "open"
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+            self._stats["successes"] += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._stats["failures"] += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self._stats["opened"] += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"state": self._state, "consecutive_failures": self._failures, **self._stats}
+
+
+class KeepAliveHTTPClient:
+    """
+    Small pool of persistent HTTP/1.1 connections to one host. Connections
+    are opened with `connect_timeout` and each request sets its own read
+    timeout; a reused connection the server already closed is retried once
+    on a fresh one. Raises TRANSPORT_ERRORS on failure.
+    """
+
+    def __init__(self, base_url: str, pool_size: int, connect_timeout: float) -> None:
+        parts = urllib.parse.urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port
+        self.connect_timeout = connect_timeout
+        self._pool: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue(maxsize=max(1, pool_size))
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "connections_opened": 0, "connections_reused": 0}
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        read_timeout: float = 15.0,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, bytes]:
+        """Returns (status, body)."""
+        for attempt in range(2):
+            conn, reused = self._acquire()
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                conn.sock.settimeout(read_timeout)
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            with self._lock:
+                self._stats["requests"] += 1
+            return response.status, data
+        raise http.client.HTTPException("unreachable")
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {**self._stats, "idle_connections": self._pool.qsize()}
+
+    def _acquire(self) -> tuple[http.client.HTTPConnection, bool]:
+        try:
+            conn = self._pool.get_nowait()
+            reused = True
+        except queue.Empty:
+            factory = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            conn = factory(self.host, self.port, timeout=self.connect_timeout)
+            reused = False
+        with self._lock:
+            self._stats["connections_reused" if reused else "connections_opened"] += 1
+        return conn, reused
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
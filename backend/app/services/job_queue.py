@@ -0,0 +1,100 @@
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable
+from uuid import uuid4
+
+from app.schemas import AnalysisJob, IncidentReport, JobState
+
+ProgressCallback = Callable[[str, float], None]
+JobFunction = Callable[[ProgressCallback], IncidentReport]
+
+ACTIVE_STATES = {JobState.queued, JobState.running}
+
+
+class JobQueueFullError(RuntimeError):
+    pass
+
+
+class AnalysisJobQueue:
+    """
+    Bounded worker pool for the blocking analysis pipeline (OpenCV decode,
+    TensorFlow inference, LLM and SMTP calls), so the event loop stays free.
+    Job state lives in memory and is polled through the jobs API.
+    """
+
+    def __init__(self, max_workers: int, queue_limit: int, history_limit: int) -> None:
+        self.queue_limit = max(1, queue_limit)
+        self.history_limit = max(1, history_limit)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="analysis")
+        self._jobs: OrderedDict[str, AnalysisJob] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, source_filename: str, fn: JobFunction) -> AnalysisJob:
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job.state in ACTIVE_STATES)
+            if active >= self.queue_limit:
+                raise JobQueueFullError(f"{active} analysis jobs already in flight.")
+            job = AnalysisJob(
+                job_id=uuid4().hex,
+                source_filename=source_filename,
+                state=JobState.queued,
+                created_at=datetime.now(tz=timezone.utc),
+            )
+            self._jobs[job.job_id] = job
+            self._evict_finished()
+            snapshot = job.model_copy()
+        self._executor.submit(self._run, job.job_id, fn)
+        return snapshot
+
+    def get(self, job_id: str) -> AnalysisJob | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.model_copy() if job else None
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job_id: str, fn: JobFunction) -> None:
+        self._update(job_id, state=JobState.running, stage="starting", started_at=datetime.now(tz=timezone.utc))
+
+        def progress(stage: str, fraction: float) -> None:
+            self._update(job_id, stage=stage, progress=min(1.0, max(0.0, fraction)))
+
+        try:
+            report = fn(progress)
+        except Exception as exc:
+            traceback.print_exc()
+            self._update(
+                job_id,
+                state=JobState.failed,
+                stage="failed",
+                error=str(exc) or exc.__class__.__name__,
+                finished_at=datetime.now(tz=timezone.utc),
+            )
+            return
+        self._update(
+            job_id,
+            state=JobState.succeeded,
+            stage="done",
+            progress=1.0,
+            report=report,
+            finished_at=datetime.now(tz=timezone.utc),
+        )
+
+    def _update(self, job_id: str, **changes) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            for key, value in changes.items():
+                setattr(job, key, value)
+
+    def _evict_finished(self) -> None:
+        overflow = len(self._jobs) - self.history_limit
+        if overflow <= 0:
+            return
+        for job_id in [jid for jid, job in self._jobs.items() if job.state not in ACTIVE_STATES][:overflow]:
+            del self._jobs[job_id]
@@ -0,0 +1,109 @@
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app.services.pose_runtime import load_tflite_interpreter
+
+KEYPOINT_COUNT = 17
+# Per-keypoint (x, y, score) in COCO order, the layout of prepare_poselift_windows._to_feature_frame slots 0..50.
+KEYPOINT_FEATURES: tuple[str, ...] = tuple(
+    f"kp{i}_{axis}" for i in range(KEYPOINT_COUNT) for axis in ("x", "y", "score")
+)
+
+
+class KeypointModel:
+    """
+    Local single-person pose model with a MoveNet-style contract: square RGB
+    NHWC input (uint8, int32 or 0..255 float32) and (N, 1, 17, 3) or
+    (N, 17, 3) output of normalized (y, x, score). `.tflite` files run on the
+    TFLite interpreter, `.onnx` files on onnxruntime; nothing is downloaded.
+    Batches are run in one call when the model accepts a resized batch
+    dimension, otherwise frame by frame. `input_size` is used when the model
+    leaves its spatial input dimension dynamic.
+    """
+
+    def __init__(self, model_path: str | Path, num_threads: int | None = None, input_size: int = 192) -> None:
+        self.model_path = Path(model_path)
+        self._lock = threading.Lock()
+        if self.model_path.suffix == ".onnx":
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            if num_threads:
+                options.intra_op_num_threads = num_threads
+            self._session = ort.InferenceSession(
+                str(self.model_path), sess_options=options, providers=["CPUExecutionProvider"]
+            )
+            model_input = self._session.get_inputs()[0]
+            self._input_name = model_input.name
+            # Exported ONNX models often leave H/W dynamic (None or a symbolic name).
+            dim = model_input.shape[1]
+            self.input_size = dim if isinstance(dim, int) and dim > 0 else input_size
+            self.input_dtype = {"tensor(uint8)": np.uint8, "tensor(int32)": np.int32}.get(model_input.type, np.float32)
+            self._interpreter = None
+        else:
+            interpreter_cls, _ = load_tflite_interpreter()
+            self._interpreter = interpreter_cls(model_path=str(self.model_path), num_threads=num_threads)
+            self._interpreter.allocate_tensors()
+            self._input = self._interpreter.get_input_details()[0]
+            self.input_size = int(self._input["shape"][1])
+            self.input_dtype = self._input["dtype"]
+            self._batch = int(self._input["shape"][0])
+            self._resizable = True
+
+    def infer(self, images: np.ndarray) -> np.ndarray:
+        """(n, size, size, 3) RGB uint8 -> (n, 17, 3) normalized (y, x, score)."""
+        images = images.astype(self.input_dtype, copy=False)
+        with self._lock:
+            if self._interpreter is None:
+                out = self._session.run(None, {self._input_name: images})[0]
+            else:
+                out = self._invoke_tflite(images)
+        return np.asarray(out, dtype=np.float32).reshape(len(images), KEYPOINT_COUNT, 3)
+
+    def _invoke_tflite(self, images: np.ndarray) -> np.ndarray:
+        if len(images) != self._batch and self._resizable:
+            try:
+                self._interpreter.resize_tensor_input(self._input["index"], [len(images), *images.shape[1:]])
+                self._interpreter.allocate_tensors()
+                self._batch = len(images)
+            except (RuntimeError, ValueError):
+                # Fixed-batch model: fall back to one frame per invoke.
+                self._resizable = False
+                self._interpreter.resize_tensor_input(self._input["index"], [1, *images.shape[1:]])
+                self._interpreter.allocate_tensors()
+                self._batch = 1
+        if len(images) != self._batch:
+            return np.concatenate([self._invoke_tflite(images[i : i + 1]) for i in range(len(images))])
+        output = self._interpreter.get_output_details()[0]
+        self._interpreter.set_tensor(self._input["index"], images)
+        self._interpreter.invoke()
+        return self._interpreter.get_tensor(output["index"]).copy()
+
+
+_MODELS: dict[str, KeypointModel] = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def get_keypoint_model(model_path: str | Path, input_size: int = 192) -> KeypointModel:
+    """One loaded model per process and path, shared by every pipeline and stream."""
+    key = str(Path(model_path).resolve())
+    with _MODELS_LOCK:
+        if key not in _MODELS:
+            _MODELS[key] = KeypointModel(model_path, num_threads=1, input_size=input_size)
+        return _MODELS[key]
+
+
+def letterbox(image: np.ndarray, size: int) -> tuple[np.ndarray, float, int, int]:
+    """Resize BGR `image` into a size x size RGB square, keeping aspect; returns (square, scale, pad_x, pad_y)."""
+    h, w = image.shape[:2]
+    scale = size / max(h, w)
+    nw, nh = max(1, round(w * scale)), max(1, round(h * scale))
+    pad_x, pad_y = (size - nw) // 2, (size - nh) // 2
+    square = np.zeros((size, size, 3), dtype=np.uint8)
+    square[pad_y : pad_y + nh, pad_x : pad_x + nw] = cv2.cvtColor(
+        cv2.resize(image, (nw, nh), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB
+    )
+    return square, scale, pad_x, pad_y
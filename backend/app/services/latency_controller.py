@@ -0,0 +1,144 @@
+from collections import deque
+
+import numpy as np
+
+from app.config import settings
+
+# Quality ladder from best to cheapest: (downscale, sampling stride).
+DEFAULT_LEVELS: tuple[tuple[float, int], ...] = (
+    (0.5, 1),
+    (0.4, 1),
+    (0.3, 1),
+    (0.25, 1),
+    (0.25, 2),
+    (0.25, 3),
+    (0.25, 4),
+)
+
+
+class LatencyController:
+    """
+    Closed-loop per-frame quality controller.
+
+    Keeps a sliding window of frame latencies and steers a quality ladder:
+      - degrade one level when the window p95 exceeds `degrade_ratio * target`
+      - recover one level after `recover_frames` consecutive frames whose
+        window p95 sits below `recover_ratio * target`
+    The window is cleared after every change and decisions wait for
+    `min_samples` fresh frames, so a single GC pause cannot move the level and
+    each level is judged only on its own latencies. The band between the two
+    ratios is the hysteresis that stops oscillation; a recovery that is undone
+    within `recover_frames` frames doubles the wait before the next one (up to
+    8x), and a recovery that holds for that long, or a full wait of headroom at
+    the top level, halves it back toward `recover_frames`. `history` bounds
+    the kept level series and events for long-running streams (None keeps all).
+    """
+
+    def __init__(
+        self,
+        target_ms: float,
+        window: int = 30,
+        min_samples: int = 8,
+        degrade_ratio: float = 0.9,
+        recover_ratio: float = 0.6,
+        recover_frames: int = 30,
+        levels: tuple[tuple[float, int], ...] = DEFAULT_LEVELS,
+        history: int | None = None,
+    ) -> None:
+        self.target_ms = target_ms
+        self.min_samples = max(1, min(min_samples, window))
+        self.degrade_ratio = degrade_ratio
+        self.recover_ratio = recover_ratio
+        self.recover_frames = recover_frames
+        self.levels = levels
+        self.level = 0
+        self._window: deque[float] = deque(maxlen=max(1, window))
+        self._headroom_streak = 0
+        self._recover_wait = recover_frames
+        # Frames observed since the last recovery; None once it has held (or been undone).
+        self._since_recover: int | None = None
+
+        self.level_series: deque[int] = deque(maxlen=history)
+        self.events: deque[dict] = deque(maxlen=history)
+
+    @classmethod
+    def from_settings(cls, history: int | None = None) -> "LatencyController":
+        return cls(
+            target_ms=float(settings.emergency_latency_target_ms),
+            window=settings.latency_controller_window,
+            degrade_ratio=settings.latency_degrade_ratio,
+            recover_ratio=settings.latency_recover_ratio,
+            recover_frames=settings.latency_recover_frames,
+            history=history,
+        )
+
+    @property
+    def downscale(self) -> float:
+        return self.levels[self.level][0]
+
+    @property
+    def stride(self) -> int:
+        return self.levels[self.level][1]
+
+    def p95_ms(self) -> float:
+        return float(np.percentile(np.fromiter(self._window, dtype=np.float32), 95)) if self._window else 0.0
+
+    def observe(self, latency_ms: float, frame_index: int) -> None:
+        """Record one processed frame (at the current level) and adjust the level for the next one."""
+        self.level_series.append(self.level)
+        self._window.append(latency_ms)
+        if self._since_recover is not None:
+            # Counted in observed frames, not index distance, so the back-off window does not shrink with the stride.
+            self._since_recover += 1
+            if self._since_recover > self.recover_frames:
+                # The last recovery held: relax the back-off.
+                self._since_recover = None
+                self._relax_wait()
+        if len(self._window) < self.min_samples:
+            return
+
+        p95 = self.p95_ms()
+        if p95 > self.degrade_ratio * self.target_ms:
+            self._headroom_streak = 0
+            if self.level < len(self.levels) - 1:
+                if self._since_recover is not None:
+                    # Still counting only within `recover_frames` of the last recovery: it was undone.
+                    self._since_recover = None
+                    self._recover_wait = min(self._recover_wait * 2, self.recover_frames * 8)
+                self._change(self.level + 1, "degrade", p95, frame_index)
+        elif p95 < self.recover_ratio * self.target_ms:
+            self._headroom_streak += 1
+            if self._headroom_streak >= self._recover_wait:
+                if self.level > 0:
+                    self._change(self.level - 1, "recover", p95, frame_index)
+                    self._since_recover = 0
+                else:
+                    self._headroom_streak = 0
+                    self._relax_wait()
+        else:
+            self._headroom_streak = 0
+
+    def summary(self) -> dict:
+        return {
+            "level_final": self.level,
+            "levels": [list(level) for level in self.levels],
+            "level_series": list(self.level_series),
+            "events": list(self.events),
+        }
+
+    def _relax_wait(self) -> None:
+        self._recover_wait = max(self.recover_frames, self._recover_wait // 2)
+
+    def _change(self, level: int, action: str, p95: float, frame_index: int) -> None:
+        self.events.append(
+            {
+                "frame": frame_index,
+                "action": action,
+                "from": self.level,
+                "to": level,
+                "window_p95_ms": round(p95, 3),
+            }
+        )
+        self.level = level
+        self._window.clear()
+        self._headroom_streak = 0
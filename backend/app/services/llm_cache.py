@@ -0,0 +1,127 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+
+def normalize_summary(summary: str, significant_digits: int = 2) -> str:
+    """
+    Canonical form of a multimodal summary: every number rounded to
+    `significant_digits` and whitespace collapsed, so prompts that differ only
+    in noise-level decimals share one cache entry.
+    """
+    quantized = _NUMBER.sub(lambda m: f"{float(m.group()):.{significant_digits}g}", summary)
+    return " ".join(quantized.split())
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of parsed LLM classifier responses keyed on the normalized
+    summary plus model name: an in-memory LRU of `max_entries`, backed by one
+    JSON file per key under `root` that survives restarts. Entries expire
+    after `max_age_seconds`; the disk tier is trimmed to `max_bytes`, oldest
+    first. Only non-empty responses are stored, so transient LLM failures are
+    retried rather than cached.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_entries: int,
+        max_bytes: int,
+        max_age_seconds: float,
+        significant_digits: int = 2,
+    ) -> None:
+        self.root = root
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.significant_digits = significant_digits
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, tuple[float, list[dict[str, Any]]]] = OrderedDict()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def key_for(self, summary: str, model_name: str) -> str:
+        normalized = normalize_summary(summary, self.significant_digits)
+        return hashlib.sha256(f"{model_name}\n{normalized}".encode("utf-8")).hexdigest()[:32]
+
+    def get(self, key: str) -> list[dict[str, Any]] | None:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] <= self.max_age_seconds:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[1]
+            self._memory.pop(key, None)
+
+        path = self._path(key)
+        try:
+            stored_at = path.stat().st_mtime
+            if now - stored_at > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                raise FileNotFoundError(path)
+            value = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._remember(key, stored_at, value)
+            self._stats["disk_hits"] += 1
+        return value
+
+    def put(self, key: str, value: list[dict[str, Any]]) -> None:
+        if not value:
+            return
+        path = self._path(key)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(value, default=str), encoding="utf-8")
+        tmp.replace(path)
+        with self._lock:
+            self._remember(key, time.time(), value)
+            self._stats["stores"] += 1
+        self._evict()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key: str, stored_at: float, value: list[dict[str, Any]]) -> None:
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _evict(self) -> None:
+        now = time.time()
+        entries = []
+        for path in self.root.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
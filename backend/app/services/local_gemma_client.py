@@ -1,9 +1,11 @@
 import json
-import urllib.error
-import urllib.request
+import urllib.parse
 
 from app.config import settings
 from app.schemas import Incident, IncidentType
+from app.services.http_client import TRANSPORT_ERRORS, CircuitBreaker, KeepAliveHTTPClient
+from app.services.llm_cache import LLMResponseCache
+from app.services.signals import to_jsonable
 
 # Must match build_gemma_sft_dataset.CLASSIFIER_RULES and gemma_agent prompt for LoRA-tuned model.
 PRIMARY_CLASSIFIER_RULES = (
@@ -17,43 +19,119 @@ PRIMARY_CLASSIFIER_RULES = (
     "Allowed incident_type: shoplifting, suspicious_activity, violent_activity, intrusion, none.\n\n"
 )
 
+# JSON schema for the primary classifier's answer, sent as `format` (Ollama structured outputs);
+# property order matches the SFT targets.
+INCIDENT_ARRAY_SCHEMA = {
+    "type": "array",
+    "minItems": 1,
+    "maxItems": 1,
+    "items": {
+        "type": "object",
+        "properties": {
+            "incident_type": {
+                "type": "string",
+                "enum": ["shoplifting", "suspicious_activity", "violent_activity", "intrusion", "none"],
+            },
+            "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+            "timestamp_seconds": {"type": "number", "minimum": 0},
+            "evidence": {"type": "string", "maxLength": 240},
+            "recommended_action": {"type": "string", "maxLength": 160},
+        },
+        "required": ["incident_type", "confidence", "timestamp_seconds", "evidence", "recommended_action"],
+    },
+}
+
+
+def build_primary_prompt(multimodal_summary: str) -> str:
+    return PRIMARY_CLASSIFIER_RULES + f"MULTIMODAL SUMMARY:\n{multimodal_summary}\n\nJSON array:"
+
+
+class LLMEndpointError(RuntimeError):
+    pass
+
 
 class LocalGemmaClient:
     """
     Local Gemma runtime adapter.
     Expected endpoint format is Ollama-compatible /api/generate.
+    Requests reuse pooled keep-alive connections; after repeated transport
+    failures a circuit breaker makes `available()` false so callers skip the
+    LLM immediately. `available()` only reads the breaker; the request itself
+    takes the breaker slot, and in half-open state a health probe runs first
+    to decide whether to close it again.
+    With a cache, primary classifications are reused for summaries that match
+    after numeric quantization. Primary classification sends
+    INCIDENT_ARRAY_SCHEMA so the server can constrain its output.
     """
 
-    def available(self) -> bool:
+    def __init__(self, cache: LLMResponseCache | None = None) -> None:
+        self.cache = cache
+        self.http = KeepAliveHTTPClient(
+            settings.local_gemma_endpoint,
+            pool_size=settings.local_gemma_pool_size,
+            connect_timeout=settings.local_gemma_connect_timeout_seconds,
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.local_gemma_breaker_failures,
+            reset_seconds=settings.local_gemma_breaker_reset_seconds,
+        )
+        self._generate_path = urllib.parse.urlsplit(settings.local_gemma_endpoint).path or "/api/generate"
+
+    def configured(self) -> bool:
         return bool(settings.local_gemma_endpoint and settings.local_gemma_model_name)
 
+    def available(self) -> bool:
+        """Configured and the breaker would let a request (or its half-open trial) through; changes no state."""
+        return self.configured() and self.breaker.allows()
+
+    def probe(self, trial: bool = False) -> bool:
+        """GET the health path with the connect timeout; records the outcome on the breaker."""
+        try:
+            status, _ = self.http.request(
+                "GET",
+                settings.local_gemma_health_path,
+                read_timeout=settings.local_gemma_connect_timeout_seconds,
+            )
+            healthy = status < 500
+        except TRANSPORT_ERRORS:
+            healthy = False
+        if healthy:
+            self.breaker.record_success()
+        elif trial or self.breaker.state == "closed":
+            self.breaker.record_failure()
+        return healthy
+
+    def metrics(self) -> dict:
+        return {"breaker": self.breaker.metrics(), "pool": self.http.metrics()}
+
+    def close(self) -> None:
+        self.http.close()
+
     def primary_classify(self, multimodal_summary: str) -> list[Incident]:
         """
         Use LoRA-tuned model as primary classifier (same prompt as SFT).
         Call with summary from gemma_agent._build_multimodal_summary(signals).
         """
+        if not self.configured():
+            return []
+        key = None
+        if self.cache is not None:
+            key = self.cache.key_for(PRIMARY_CLASSIFIER_RULES + multimodal_summary, settings.local_gemma_model_name)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return [Incident.model_validate(item) for item in cached]
         if not self.available():
             return []
-        prompt = PRIMARY_CLASSIFIER_RULES + f"MULTIMODAL SUMMARY:\n{multimodal_summary}\n\nJSON array:"
-        body = {
-            "model": settings.local_gemma_model_name,
-            "prompt": prompt,
-            "stream": False,
-            "options": {"temperature": 0.1},
-        }
-        req = urllib.request.Request(
-            settings.local_gemma_endpoint,
-            data=json.dumps(body).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
+
+        prompt = build_primary_prompt(multimodal_summary)
         try:
-            with urllib.request.urlopen(req, timeout=15) as res:
-                payload = json.loads(res.read().decode("utf-8"))
-            content = str(payload.get("response", "")).strip()
-            return self._parse(content)
-        except (urllib.error.URLError, TimeoutError, json.JSONDecodeError, ValueError):
+            json_schema = INCIDENT_ARRAY_SCHEMA if settings.local_gemma_structured_output else None
+            incidents = self._parse(self._generate(prompt, settings.local_gemma_read_timeout_seconds, json_schema))
+        except LLMEndpointError:
             return []
+        if key is not None:
+            self.cache.put(key, [incident.model_dump(mode="json") for incident in incidents])
+        return incidents
 
     def refine_incidents(self, signals: dict, baseline: list[Incident]) -> list[Incident]:
         if not self.available():
@@ -64,29 +142,55 @@ class LocalGemmaClient:
             "Given multimodal input and baseline detections, return ONLY JSON array.\n"
             "Fields: incident_type, confidence, timestamp_seconds, evidence, recommended_action.\n"
             "Allowed incident_type: fainting, choking, violent_activity, shoplifting, suspicious_activity, intrusion, none.\n\n"
-            f"signals={json.dumps(signals, default=str)}\n"
+            f"signals={json.dumps(to_jsonable(signals), default=str)}\n"
             f"baseline={json.dumps([x.model_dump() for x in baseline], default=str)}\n"
         )
+        try:
+            parsed = self._parse(self._generate(prompt, settings.local_gemma_refine_timeout_seconds))
+        except LLMEndpointError:
+            return baseline
+        return parsed or baseline
+
+    def _generate(self, prompt: str, read_timeout: float, json_schema: dict | None = None) -> str:
+        """
+        POST one prompt; transport failures and 5xx count against the breaker and
+        raise LLMEndpointError, as does an open breaker or a failed half-open probe.
+        """
         body = {
             "model": settings.local_gemma_model_name,
             "prompt": prompt,
             "stream": False,
             "options": {"temperature": 0.1},
         }
-        req = urllib.request.Request(
-            settings.local_gemma_endpoint,
-            data=json.dumps(body).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
+        if json_schema is not None:
+            body["format"] = json_schema
+        state = self.breaker.before_call()
+        if state == "open":
+            raise LLMEndpointError("LLM endpoint circuit is open")
+        if state == "half_open" and not self.probe(trial=True):
+            raise LLMEndpointError("LLM endpoint failed its health probe")
         try:
-            with urllib.request.urlopen(req, timeout=8) as res:
-                payload = json.loads(res.read().decode("utf-8"))
-            content = str(payload.get("response", "")).strip()
-            parsed = self._parse(content)
-            return parsed or baseline
-        except (urllib.error.URLError, TimeoutError, json.JSONDecodeError, ValueError):
-            return baseline
+            status, raw = self.http.request(
+                "POST",
+                self._generate_path,
+                body=json.dumps(body).encode("utf-8"),
+                read_timeout=read_timeout,
+                headers={"Content-Type": "application/json"},
+            )
+        except TRANSPORT_ERRORS as exc:
+            self.breaker.record_failure()
+            raise LLMEndpointError(str(exc) or exc.__class__.__name__) from exc
+        if status >= 500:
+            self.breaker.record_failure()
+            raise LLMEndpointError(f"LLM endpoint returned HTTP {status}")
+        self.breaker.record_success()
+        if status >= 400:
+            raise LLMEndpointError(f"LLM endpoint returned HTTP {status}")
+        try:
+            payload = json.loads(raw.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+            raise LLMEndpointError("LLM endpoint returned invalid JSON") from exc
+        return str(payload.get("response", "")).strip()
 
     @staticmethod
     def _parse(content: str) -> list[Incident]:
@@ -1,27 +1,25 @@
 import smtplib
 from email.mime.text import MIMEText
+from uuid import uuid4
 
 from app.config import settings
-from app.schemas import IncidentReport, IncidentType
+from app.schemas import Incident, IncidentReport, IncidentType
 from app.services.storage import StorageService
 
+SEVERE_TYPES = {
+    IncidentType.fainting,
+    IncidentType.choking,
+    IncidentType.violent_activity,
+    IncidentType.shoplifting,
+}
+
 
 class AlertNotifier:
     def __init__(self, storage: StorageService) -> None:
         self.storage = storage
 
     def notify_if_needed(self, report: IncidentReport) -> None:
-        severe = [
-            i
-            for i in report.incidents
-            if i.incident_type in {
-                IncidentType.fainting,
-                IncidentType.choking,
-                IncidentType.violent_activity,
-                IncidentType.shoplifting,
-            }
-            and i.confidence >= 0.6
-        ]
+        severe = [i for i in report.incidents if self._is_severe(i)]
         if not severe:
             return
 
@@ -33,6 +31,24 @@ class AlertNotifier:
         self.storage.save_local_alert(report.report_id, payload)
         self._send_email_alert(payload)
 
+    def notify_stream_incident(self, stream_id: str, incident: Incident) -> None:
+        if not self._is_severe(incident):
+            return
+
+        alert_id = f"stream-{stream_id}-{uuid4().hex[:8]}"
+        payload = {
+            "report_id": alert_id,
+            "stream_id": stream_id,
+            "summary": f"Live stream {stream_id}: {incident.incident_type.value} ({incident.confidence:.2f}).",
+            "critical_incidents": [incident.model_dump()],
+        }
+        self.storage.save_local_alert(alert_id, payload)
+        self._send_email_alert(payload)
+
+    @staticmethod
+    def _is_severe(incident: Incident) -> bool:
+        return incident.incident_type in SEVERE_TYPES and incident.confidence >= 0.6
+
     def _send_email_alert(self, payload: dict) -> None:
         if not (settings.smtp_host and settings.alert_email_to and settings.smtp_username and settings.smtp_password):
             return
@@ -1,8 +1,13 @@
 import json
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
 
 import numpy as np
-import tensorflow as tf
+
+from app.services.pose_inference import PoseInferenceEngine
+from app.services.pose_runtime import load_pose_runtime
+from app.services.signals import SignalTrack
 
 
 class PoseEventDetector:
@@ -11,34 +16,136 @@ class PoseEventDetector:
     Returns class probabilities for low-latency emergency trigger decisions.
     """
 
-    def __init__(self, model_path: str, label_path: str, window_size: int = 32) -> None:
+    def __init__(
+        self,
+        model_path: str,
+        label_path: str,
+        window_size: int = 32,
+        window_hop: int = 8,
+        sample_hz: float = 30.0,
+        runtime: str = "keras",
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        lazy: bool = False,
+    ) -> None:
         self.window_size = window_size
-        self.model = None
+        self.window_hop = max(1, window_hop)
+        self.sample_hz = sample_hz
+        self.runtime = runtime
+        self.model_path = Path(model_path)
+        self.label_path = Path(label_path)
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.engine: PoseInferenceEngine | None = None
         self.labels: list[str] = []
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        if not lazy:
+            self.load()
+
+    def load(self) -> bool:
+        """Load labels and the runtime once; concurrent callers wait for the first load."""
+        with self._load_lock:
+            if self._loaded:
+                return self.engine is not None and bool(self.labels)
+            model_file = self.model_path
+            labels_file = self.label_path
+            print(
+                f"[PoseEventDetector] runtime={self.runtime} model_path={model_file.resolve()} exists={model_file.exists()}"
+            )
+            print(f"[PoseEventDetector] label_path={labels_file.resolve()} exists={labels_file.exists()}")
+            if model_file.exists() and labels_file.exists():
+                try:
+                    self.labels = json.loads(labels_file.read_text(encoding="utf-8"))
+                    self.engine = PoseInferenceEngine(
+                        load_pose_runtime(self.runtime, model_file),
+                        max_batch_size=self.max_batch_size,
+                        max_wait_ms=self.max_wait_ms,
+                    )
+                    print(f"[PoseEventDetector] Loaded OK — labels={self.labels}")
+                except Exception as e:
+                    print(f"[PoseEventDetector] FAILED to load: {e}")
+                    self.engine = None
+            self._loaded = True
+            return self.engine is not None and bool(self.labels)
 
-        model_file = Path(model_path)
-        labels_file = Path(label_path)
-        print(f"[PoseEventDetector] model_path={model_file.resolve()} exists={model_file.exists()}")
-        print(f"[PoseEventDetector] label_path={labels_file.resolve()} exists={labels_file.exists()}")
-        if model_file.exists() and labels_file.exists():
-            try:
-                self.model = tf.keras.models.load_model(model_file)
-                self.labels = json.loads(labels_file.read_text(encoding="utf-8"))
-                print(f"[PoseEventDetector] Loaded OK — labels={self.labels}")
-            except Exception as e:
-                print(f"[PoseEventDetector] FAILED to load: {e}")
-                self.model = None
+    def warm_up(self) -> dict:
+        """Load (if needed) and run one forward pass so the first request skips tracing / allocation."""
+        available = self.load()
+        if available:
+            self.engine.warm_up()
+        return {"available": available, "runtime": self.runtime}
 
     def available(self) -> bool:
-        return self.model is not None and bool(self.labels)
+        return self.load()
+
+    def metrics(self) -> dict:
+        if self.engine is None:
+            return {"available": False}
+        return {"available": True, **self.engine.metrics()}
+
+    def close(self) -> None:
+        if self.engine is not None:
+            self.engine.close()
 
     def predict(self, signals: dict) -> dict:
+        """
+        Score the clip. With a full per-sample SignalTrack longer than one window,
+        every strided window is scored in one batched forward pass; otherwise the
+        leading series samples form a single window.
+        """
+        if not self.available():
+            return {"available": False, "event_probs": {}}
+
+        try:
+            track = signals.get("track")
+            if track is not None and len(track) > self.window_size:
+                distress_score = float(signals.get("audio", {}).get("distress_score", 0.0))
+                return self._predict_track(track, distress_score)
+
+            window = self._build_window(signals)
+            probs = self.engine.infer(window[0]).tolist()
+        except FutureTimeoutError:
+            # A backed-up batcher must not fail the job; callers treat this like a missing model.
+            return {"available": False, "event_probs": {}, "skipped": "timeout"}
+        return self._window_result(probs)
+
+    def predict_samples(self, t: np.ndarray, features: np.ndarray) -> dict:
+        """
+        Score the window ending at the newest of the (t, row) samples (live
+        streams). Rows are resampled on time exactly as clip tracks are, so the
+        same footage scores the same live and uploaded; `peak_window` is the
+        span the window covers. Needs at least `window_size` samples.
+        """
         if not self.available():
             return {"available": False, "event_probs": {}}
+        grid, rows = self._resample(t, features)
+        try:
+            probs = self.engine.infer(rows[-self.window_size :]).tolist()
+        except FutureTimeoutError:
+            return {"available": False, "event_probs": {}, "skipped": "timeout"}
+        result = self._window_result(probs)
+        result["peak_window"] = {"start": float(grid[-self.window_size]), "end": float(grid[-1])}
+        return result
+
+    @staticmethod
+    def sample_features(
+        motion: np.ndarray,
+        horizontal: np.ndarray,
+        keypoints: np.ndarray | None = None,
+        distress_score: float = 0.0,
+    ) -> np.ndarray:
+        """Per-sample (n, 53) rows in the training layout; horizontal fills slot 0 when there are no keypoints."""
+        features = np.zeros((len(motion), 53), dtype=np.float32)
+        if keypoints is not None:
+            features[:, :51] = keypoints
+        else:
+            features[:, 0] = horizontal
+        features[:, 51] = motion
+        features[:, 52] = distress_score
+        return features
 
-        window = self._build_window(signals)
-        preds = self.model.predict(window, verbose=0)
-        probs = preds[0].tolist()
+    def _window_result(self, probs: list[float]) -> dict:
         event_probs = {self.labels[i]: float(probs[i]) for i in range(len(self.labels))}
         top_event = max(event_probs, key=event_probs.get)
         return {
@@ -48,11 +155,112 @@ class PoseEventDetector:
             "top_confidence": event_probs[top_event],
         }
 
+    def _predict_track(self, track: SignalTrack, distress_score: float) -> dict:
+        """
+        Sliding-window inference over the whole track. `event_probs` are those of
+        the peak window (least likely "none"); `segments` merge consecutive
+        windows that share a non-"none" argmax above the uniform prior, with real
+        start/end times; `window_track` is the per-window probability track.
+        Windows are cut on time: the track is first resampled to a uniform rate
+        (`sample_hz`, or the scan's own rate when that is sparser), so uneven
+        spacing from the controller or anytime mode does not stretch windows.
+        Windows go through the shared micro-batcher a batch at a time, so
+        memory does not grow with the window count.
+        """
+        features = self.sample_features(track.motion, track.horizontal, track.keypoints, distress_score)
+        t, features = self._resample(track.t, features)
+
+        starts = list(range(0, len(t) - self.window_size + 1, self.window_hop))
+        if starts[-1] != len(t) - self.window_size:
+            starts.append(len(t) - self.window_size)
+        views = np.lib.stride_tricks.sliding_window_view(features, self.window_size, axis=0)
+        chunk = self.engine.max_batch_size
+        probs = np.concatenate(
+            [
+                self.engine.infer_many(np.ascontiguousarray(views[starts[i : i + chunk]].transpose(0, 2, 1)))
+                for i in range(0, len(starts), chunk)
+            ]
+        )
+
+        window_start = t[starts]
+        window_end = t[np.asarray(starts) + self.window_size - 1]
+        none_idx = self.labels.index("none") if "none" in self.labels else None
+        alert_score = 1.0 - probs[:, none_idx] if none_idx is not None else probs.max(axis=1)
+        peak = int(np.argmax(alert_score))
+
+        uniform = 1.0 / len(self.labels)
+        segments: list[dict] = []
+        for i, row in enumerate(probs):
+            top = int(np.argmax(row))
+            if top == none_idx or row[top] <= uniform:
+                continue
+            label = self.labels[top]
+            last = segments[-1] if segments else None
+            if last is not None and last["label"] == label and last["last_window"] == i - 1:
+                last["end"] = float(window_end[i])
+                last["peak_prob"] = max(last["peak_prob"], float(row[top]))
+                last["last_window"] = i
+                last["windows"] += 1
+            else:
+                segments.append(
+                    {
+                        "label": label,
+                        "start": float(window_start[i]),
+                        "end": float(window_end[i]),
+                        "peak_prob": float(row[top]),
+                        "windows": 1,
+                        "last_window": i,
+                    }
+                )
+        for segment in segments:
+            del segment["last_window"]
+        segments.sort(key=lambda x: x["peak_prob"], reverse=True)
+
+        event_probs = {self.labels[i]: float(probs[peak, i]) for i in range(len(self.labels))}
+        top_event = max(event_probs, key=event_probs.get)
+        return {
+            "available": True,
+            "event_probs": event_probs,
+            "top_event": top_event,
+            "top_confidence": event_probs[top_event],
+            "windows": len(starts),
+            "window_hop": self.window_hop,
+            "peak_window": {"start": float(window_start[peak]), "end": float(window_end[peak])},
+            "segments": segments,
+            # Columnar arrays; rounded to lists only when the report is serialized.
+            "window_track": {
+                "start": window_start,
+                "end": window_end,
+                **{label: probs[:, j] for j, label in enumerate(self.labels)},
+            },
+        }
+
+    def _resample(self, t: np.ndarray, features: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Linearly interpolate per-sample rows onto a uniform grid over the track's
+        span (at least one window long; the last sample is held past the end).
+        The grid rate is `sample_hz` capped at the median observed rate, so rows
+        are never invented between samples the scan skipped. Returns (grid
+        times, rows); unchanged when `sample_hz` <= 0.
+        """
+        if self.sample_hz <= 0 or len(t) < 2:
+            return t, features
+        spacing = float(np.median(np.diff(t)))
+        rate = min(self.sample_hz, 1.0 / spacing) if spacing > 0 else self.sample_hz
+        steps = int((t[-1] - t[0]) * rate) + 1
+        grid = t[0] + np.arange(max(steps, self.window_size)) / rate
+        pos = np.interp(grid, t, np.arange(len(t), dtype=np.float64))
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, len(t) - 1)
+        weight = (pos - lo).astype(np.float32)[:, None]
+        return np.minimum(grid, t[-1]), features[lo] * (1.0 - weight) + features[hi] * weight
+
     def _build_window(self, signals: dict) -> np.ndarray:
         """
         Build (1, window_size, 53) to match training: 17*3 keypoints + motion + audio.
-        At runtime we have no keypoints; we use horizontal_series, motion_series, distress
-        in the same slots as training (keypoints 0..50 zeroed, motion at 51, audio at 52).
+        Keypoints come from `pose.keypoint_series` (rows of 51) when a keypoint model
+        is configured; otherwise slots 0..50 stay zero except horizontal_series in
+        slot 0. Motion goes to 51 and audio distress to 52.
         """
         pose = signals.get("pose", {})
         video = signals.get("video", {})
@@ -60,14 +268,18 @@ class PoseEventDetector:
 
         horizontal_series = np.array(pose.get("horizontal_series", []), dtype=np.float32)
         motion_series = np.array(video.get("motion_series", []), dtype=np.float32)
+        keypoint_series = np.array(pose.get("keypoint_series", []), dtype=np.float32).reshape(-1, 51)
         distress_score = float(audio.get("distress_score", 0.0))
 
         # Training shape: (batch, 32, 53) with 0..50 = keypoints, 51 = motion, 52 = audio
         features = np.zeros((self.window_size, 53), dtype=np.float32)
-        for i in range(self.window_size):
-            hs = horizontal_series[i] if i < len(horizontal_series) else 0.0
-            ms = motion_series[i] if i < len(motion_series) else 0.0
-            features[i, 0] = hs
-            features[i, 51] = ms
-            features[i, 52] = distress_score
+        if len(keypoint_series):
+            n = min(self.window_size, len(keypoint_series))
+            features[:n, :51] = keypoint_series[:n]
+        else:
+            n = min(self.window_size, len(horizontal_series))
+            features[:n, 0] = horizontal_series[:n]
+        n = min(self.window_size, len(motion_series))
+        features[:n, 51] = motion_series[:n]
+        features[:, 52] = distress_score
         return np.expand_dims(features, axis=0)
@@ -1,9 +1,9 @@
 from pathlib import Path
 
-import cv2
-import numpy as np
 import tensorflow as tf
 
+from app.services.feature_pipeline import ContourPostureStage, FeaturePipeline
+
 
 class TensorflowPoseSignalExtractor:
     """
@@ -16,42 +16,9 @@ class TensorflowPoseSignalExtractor:
         self.max_sample_frames = max_sample_frames
 
     def extract(self, video_path: Path) -> dict:
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            raise ValueError(f"Unable to open video: {video_path}")
-
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
-        frame_stride = max(1, total_frames // self.max_sample_frames) if total_frames else 1
-
-        aspect_ratios = []
-        areas = []
-        idx = 0
-
-        while True:
-            ok, frame = cap.read()
-            if not ok:
-                break
-            if idx % frame_stride != 0:
-                idx += 1
-                continue
-
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            blur = cv2.GaussianBlur(gray, (5, 5), 0)
-            _, th = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            contours, _ = cv2.findContours(th, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-            if contours:
-                cnt = max(contours, key=cv2.contourArea)
-                x, y, w, h = cv2.boundingRect(cnt)
-                aspect_ratios.append(float(w) / max(float(h), 1.0))
-                areas.append(float(w * h))
-            else:
-                aspect_ratios.append(0.0)
-                areas.append(0.0)
-
-            idx += 1
-
-        cap.release()
+        series = FeaturePipeline([ContourPostureStage(blur_kernel=5)]).scan(video_path, self.max_sample_frames)
+        aspect_ratios = series["aspect_ratio"]
+        areas = series["area"]
 
         aspect_tensor = tf.convert_to_tensor(aspect_ratios if aspect_ratios else [0.0], dtype=tf.float32)
         area_tensor = tf.convert_to_tensor(areas if areas else [0.0], dtype=tf.float32)
@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from app.services.pose_runtime import KerasPoseRuntime, TFLitePoseRuntime
+
+
+class PoseInferenceEngine:
+    """
+    Micro-batched inference for the pose event model.
+
+    `runtime` is a loaded backend from `app.services.pose_runtime` (a traced
+    `tf.function` over the Keras model, or a TFLite interpreter). Windows
+    submitted concurrently (upload jobs, camera streams) are merged by a
+    background batcher into one forward pass of up to `max_batch_size`,
+    waiting at most `max_wait_ms` for a batch to fill.
+    """
+
+    def __init__(
+        self,
+        runtime: KerasPoseRuntime | TFLitePoseRuntime,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+    ) -> None:
+        self.runtime = runtime
+        self.window_size = runtime.window_size
+        self.feature_dim = runtime.feature_dim
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: queue.Queue[tuple[np.ndarray, Future, float] | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+
+        self._metrics_lock = threading.Lock()
+        self._batches = 0
+        self._windows = 0
+        self._batch_latency_ms: deque[float] = deque(maxlen=512)
+        self._queue_wait_ms: deque[float] = deque(maxlen=512)
+        self._batch_sizes: deque[int] = deque(maxlen=512)
+
+    def warm_up(self) -> None:
+        """Run one forward pass so the first real request does not pay for tracing / allocation."""
+        self.run_batch(np.zeros((1, self.window_size, self.feature_dim), dtype=np.float32))
+
+    def run_batch(self, windows: np.ndarray) -> np.ndarray:
+        """Direct forward pass for callers that already hold a batch: (n, window, features) -> (n, classes)."""
+        start = time.perf_counter()
+        probs = self.runtime(windows)
+        self._record(len(windows), (time.perf_counter() - start) * 1000.0)
+        return probs
+
+    def submit(self, window: np.ndarray) -> Future:
+        """Queue one (window, features) array for the next micro-batch."""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((np.asarray(window, dtype=np.float32), future, time.perf_counter()))
+        return future
+
+    def infer(self, window: np.ndarray, timeout: float | None = 5.0) -> np.ndarray:
+        return self.submit(window).result(timeout=timeout)
+
+    def infer_many(self, windows: np.ndarray, timeout: float | None = 5.0) -> np.ndarray:
+        """Queue several windows at once (they share micro-batches with other callers): (n, window, features) -> (n, classes)."""
+        futures = [self.submit(window) for window in windows]
+        return np.stack([future.result(timeout=timeout) for future in futures])
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            latency = np.array(self._batch_latency_ms, dtype=np.float32)
+            waits = np.array(self._queue_wait_ms, dtype=np.float32)
+            sizes = np.array(self._batch_sizes, dtype=np.float32)
+            return {
+                "runtime": self.runtime.name,
+                "batches_total": self._batches,
+                "windows_total": self._windows,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_s * 1000.0,
+                "mean_batch_size": float(sizes.mean()) if sizes.size else 0.0,
+                "occupancy": float(sizes.mean() / self.max_batch_size) if sizes.size else 0.0,
+                "batch_latency_p50_ms": float(np.percentile(latency, 50)) if latency.size else 0.0,
+                "batch_latency_p95_ms": float(np.percentile(latency, 95)) if latency.size else 0.0,
+                "queue_wait_p95_ms": float(np.percentile(waits, 95)) if waits.size else 0.0,
+                "queue_depth": self._queue.qsize(),
+            }
+
+    def close(self) -> None:
+        with self._thread_lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join(timeout=2.0)
+                self._thread = None
+
+    def _ensure_worker(self) -> None:
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="pose-batcher", daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            items = [first]
+            deadline = time.perf_counter() + self.max_wait_s
+            while len(items) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                items.append(item)
+
+            dispatched = time.perf_counter()
+            with self._metrics_lock:
+                self._queue_wait_ms.extend((dispatched - queued) * 1000.0 for _, _, queued in items)
+            try:
+                probs = self.run_batch(np.stack([window for window, _, _ in items]))
+            except Exception as exc:
+                for _, future, _ in items:
+                    future.set_exception(exc)
+                continue
+            for (_, future, _), row in zip(items, probs):
+                future.set_result(row)
+
+    def _record(self, batch_size: int, latency_ms: float) -> None:
+        with self._metrics_lock:
+            self._batches += 1
+            self._windows += batch_size
+            self._batch_sizes.append(batch_size)
+            self._batch_latency_ms.append(latency_ms)
@@ -0,0 +1,104 @@
+import threading
+from pathlib import Path
+
+import numpy as np
+
+RUNTIME_BACKENDS = ("keras", "tflite")
+
+
+class KerasPoseRuntime:
+    """Keras model wrapped in a `tf.function` with one fixed input signature (traced once)."""
+
+    name = "keras"
+
+    def __init__(self, model_path: str | Path) -> None:
+        import tensorflow as tf
+
+        self._tf = tf
+        model = tf.keras.models.load_model(model_path)
+        self.window_size = int(model.input_shape[1])
+        self.feature_dim = int(model.input_shape[2])
+        spec = tf.TensorSpec([None, self.window_size, self.feature_dim], tf.float32)
+        self._forward = tf.function(lambda x: model(x, training=False), input_signature=[spec])
+
+    def __call__(self, windows: np.ndarray) -> np.ndarray:
+        return self._forward(self._tf.convert_to_tensor(windows, dtype=self._tf.float32)).numpy()
+
+
+class TFLitePoseRuntime:
+    """
+    TFLite interpreter for models written by `app.training.export_pose_event_model`.
+
+    Prefers the standalone interpreters (`ai_edge_litert`, then `tflite_runtime`)
+    so the API process never imports TensorFlow; falls back to `tf.lite` only if
+    neither is installed. Handles float and int8-quantized input/output tensors.
+    The interpreter is not thread-safe, so calls are serialized.
+    """
+
+    name = "tflite"
+
+    def __init__(self, model_path: str | Path, num_threads: int | None = None) -> None:
+        interpreter_cls, self.interpreter_module = load_tflite_interpreter()
+        self._interpreter = interpreter_cls(model_path=str(model_path), num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        _, self.window_size, self.feature_dim = (int(x) for x in self._input["shape"])
+        self._batch = int(self._input["shape"][0])
+        self._lock = threading.Lock()
+
+    def __call__(self, windows: np.ndarray) -> np.ndarray:
+        windows = np.asarray(windows, dtype=np.float32)
+        with self._lock:
+            if len(windows) != self._batch:
+                self._interpreter.resize_tensor_input(
+                    self._input["index"], [len(windows), self.window_size, self.feature_dim]
+                )
+                self._interpreter.allocate_tensors()
+                self._input = self._interpreter.get_input_details()[0]
+                self._output = self._interpreter.get_output_details()[0]
+                self._batch = len(windows)
+            self._interpreter.set_tensor(self._input["index"], _quantize(windows, self._input))
+            self._interpreter.invoke()
+            return _dequantize(self._interpreter.get_tensor(self._output["index"]), self._output)
+
+
+def load_pose_runtime(backend: str, model_path: str | Path) -> KerasPoseRuntime | TFLitePoseRuntime:
+    if backend == "keras":
+        return KerasPoseRuntime(model_path)
+    if backend == "tflite":
+        return TFLitePoseRuntime(model_path)
+    raise ValueError(f"Unknown pose runtime backend {backend!r}; expected one of {RUNTIME_BACKENDS}")
+
+
+def load_tflite_interpreter() -> tuple[type, str]:
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+
+        return Interpreter, "ai_edge_litert"
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+
+        return Interpreter, "tflite_runtime"
+    except ImportError:
+        pass
+    import tensorflow as tf
+
+    return tf.lite.Interpreter, "tensorflow"
+
+
+def _quantize(values: np.ndarray, detail: dict) -> np.ndarray:
+    if detail["dtype"] == np.float32:
+        return values
+    scale, zero_point = detail["quantization"]
+    info = np.iinfo(detail["dtype"])
+    return np.clip(np.round(values / scale + zero_point), info.min, info.max).astype(detail["dtype"])
+
+
+def _dequantize(values: np.ndarray, detail: dict) -> np.ndarray:
+    if detail["dtype"] == np.float32:
+        return values.copy()
+    scale, zero_point = detail["quantization"]
+    return (values.astype(np.float32) - zero_point) * scale
@@ -0,0 +1,113 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from app.schemas import EnrichmentState, IncidentReport
+from app.services.gemma_agent import IncidentAnalysisAgent
+from app.services.result_cache import ResultCache
+from app.services.storage import StorageService
+
+
+class ReportEnricher:
+    """
+    Background workers for deferred LLM evidence. Fast-path reports marked
+    enrichment_state "pending" are enriched by the agent and re-saved over the
+    stored report; `wait` wakes report event streams once that has happened.
+    Reports submitted with a result-cache key also update that cache entry,
+    so later hits for the same content start out enriched; a report whose key
+    is already being enriched (a job that waited on the same in-flight
+    computation) subscribes to that result instead of calling the LLM again.
+    """
+
+    def __init__(
+        self,
+        agent: IncidentAnalysisAgent,
+        storage: StorageService,
+        max_workers: int,
+        cache: ResultCache | None = None,
+    ) -> None:
+        self.agent = agent
+        self.storage = storage
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="enrichment")
+        self._lock = threading.Lock()
+        self._pending: dict[str, threading.Event] = {}
+        # Cache key -> reports waiting on the enrichment already running for that key.
+        self._subscribers: dict[str, list[IncidentReport]] = {}
+        self._stats = {"submitted": 0, "shared": 0, "done": 0, "failed": 0}
+
+    def submit(self, report: IncidentReport, cache_key: str | None = None) -> None:
+        with self._lock:
+            if report.report_id in self._pending:
+                return
+            self._pending[report.report_id] = threading.Event()
+            self._stats["submitted"] += 1
+            if cache_key is not None:
+                if cache_key in self._subscribers:
+                    self._subscribers[cache_key].append(report)
+                    self._stats["shared"] += 1
+                    return
+                self._subscribers[cache_key] = []
+        self._executor.submit(self._run, report, cache_key)
+
+    def is_pending(self, report_id: str) -> bool:
+        with self._lock:
+            return report_id in self._pending
+
+    def wait(self, report_id: str, timeout: float) -> bool:
+        """True once the report is no longer being enriched."""
+        with self._lock:
+            event = self._pending.get(report_id)
+        return event is None or event.wait(timeout)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {**self._stats, "pending": len(self._pending)}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, report: IncidentReport, cache_key: str | None) -> None:
+        try:
+            enriched = self.agent.enrich(report)
+        except Exception:
+            traceback.print_exc()
+            enriched = report.model_copy(update={"enrichment_state": EnrichmentState.failed})
+
+        finished = [report]
+        try:
+            enriched_json = enriched.model_dump(mode="json")
+            self.storage.save_report(enriched.report_id, enriched_json)
+            if cache_key and self.cache is not None and enriched.enrichment_state == EnrichmentState.done:
+                self.cache.replace_report(cache_key, enriched_json)
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.pop(cache_key, []) if cache_key is not None else []
+            finished.extend(subscribers)
+            try:
+                for subscriber in subscribers:
+                    shared = self._share(enriched, subscriber)
+                    self.storage.save_report(shared.report_id, shared.model_dump(mode="json"))
+            finally:
+                outcome = "done" if enriched.enrichment_state == EnrichmentState.done else "failed"
+                with self._lock:
+                    events = [self._pending.pop(item.report_id, None) for item in finished]
+                    self._stats[outcome] += len(finished)
+                for event in events:
+                    if event is not None:
+                        event.set()
+
+    @staticmethod
+    def _share(enriched: IncidentReport, subscriber: IncidentReport) -> IncidentReport:
+        """The enriched findings under the subscriber's own identity and cache provenance."""
+        raw_signals = {key: value for key, value in enriched.raw_signals.items() if key != "cache"}
+        if "cache" in subscriber.raw_signals:
+            raw_signals["cache"] = subscriber.raw_signals["cache"]
+        return enriched.model_copy(
+            update={
+                "report_id": subscriber.report_id,
+                "source_filename": subscriber.source_filename,
+                "created_at": subscriber.created_at,
+                "raw_signals": raw_signals,
+            }
+        )
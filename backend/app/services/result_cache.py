@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable
+
+from app.config import settings
+from app.services.signals import to_jsonable
+
+CACHE_FORMAT_VERSION = 1
+
+
+def model_fingerprint() -> str:
+    """Changes whenever the loaded pose event model, its label file or the keypoint model is replaced."""
+    model_path = (
+        settings.pose_event_tflite_path if settings.pose_event_runtime == "tflite" else settings.pose_event_model_path
+    )
+    parts = [f"runtime={settings.pose_event_runtime}"]
+    for raw in (model_path, settings.pose_event_label_path, settings.keypoint_model_path):
+        if not raw:
+            parts.append("none")
+            continue
+        path = Path(raw)
+        try:
+            stat = path.stat()
+            parts.append(f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def thresholds_fingerprint() -> str:
+    """Decision settings that change the report for identical signals."""
+    fields = {
+        name: value
+        for name, value in settings.model_dump().items()
+        if name.startswith(("threshold_", "guardrail_", "cascade_", "pose_window_"))
+    }
+    fields.update(
+        cache_format=CACHE_FORMAT_VERSION,
+        emergency_latency_target_ms=settings.emergency_latency_target_ms,
+        model_mode=settings.model_mode,
+        local_gemma_model_name=settings.local_gemma_model_name,
+        llm_enrichment_deferred=settings.llm_enrichment_deferred,
+        # Segmented scans run the latency controller per segment, so the scan mode is part of the result.
+        parallel_analysis_workers=settings.parallel_analysis_workers,
+        parallel_min_segment_seconds=settings.parallel_min_segment_seconds,
+    )
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class ResultCache:
+    """
+    Content-addressed cache of analysis results (signal bundle + report).
+    Keys combine the upload SHA-256 with model and threshold fingerprints;
+    entry filenames are prefixed with the model fingerprint so a model swap
+    purges everything computed with the old one. Concurrent misses for the
+    same key share one computation.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, max_age_seconds: float) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+        self._model_fingerprint = model_fingerprint()
+        self._purge_other_models()
+
+    def key_for(self, content_sha256: str) -> str:
+        current = model_fingerprint()
+        if current != self._model_fingerprint:
+            with self._lock:
+                self._model_fingerprint = current
+                self._purge_other_models()
+        return f"{current}_{content_sha256[:32]}_{thresholds_fingerprint()}"
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                return None
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        os.utime(path)
+        return payload
+
+    def put(self, key: str, payload: dict[str, Any]) -> None:
+        path = self._path(key)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(to_jsonable(payload), default=str), encoding="utf-8")
+        tmp.replace(path)
+        self._evict()
+
+    def replace_report(self, key: str, report: dict[str, Any]) -> None:
+        """Swaps in an updated report (e.g. after deferred enrichment), keeping the rest of the entry."""
+        cached = self.get(key)
+        if cached is not None:
+            self.put(key, {**cached, "report": report})
+
+    def get_or_compute(self, key: str, compute: Callable[[], dict[str, Any]]) -> tuple[dict[str, Any], bool]:
+        """Returns (payload, hit). A waiter on an in-flight computation counts as a hit."""
+        cached = self.get(key)
+        if cached is not None:
+            return cached, True
+
+        with self._lock:
+            pending = self._in_flight.get(key)
+            if pending is None:
+                owner = True
+                pending = Future()
+                self._in_flight[key] = pending
+            else:
+                owner = False
+        if not owner:
+            return pending.result(), True
+
+        try:
+            payload = compute()
+            self.put(key, payload)
+            pending.set_result(payload)
+            return payload, False
+        except BaseException as exc:
+            pending.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _purge_other_models(self) -> None:
+        for path in self.root.glob("*.json"):
+            if not path.name.startswith(f"{self._model_fingerprint}_"):
+                path.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        now = time.time()
+        entries = []
+        for path in self.root.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
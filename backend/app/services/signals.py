@@ -0,0 +1,62 @@
+from typing import Any
+
+import numpy as np
+from pydantic import BaseModel
+
+# Decimal places kept when series are serialized into reports and cache entries.
+SERIES_DECIMALS = 4
+
+
+class SignalTrack:
+    """
+    Per-sample series of one analysis, aligned by index: sample time (s),
+    motion, horizontal-posture probability and optional (n, 51) keypoints.
+    Held as NumPy arrays from the frame analyzer through the detector and
+    agent; converted to JSON only by `to_jsonable` at the persistence/API edge.
+    """
+
+    __slots__ = ("t", "motion", "horizontal", "keypoints")
+
+    def __init__(
+        self,
+        t: np.ndarray,
+        motion: np.ndarray,
+        horizontal: np.ndarray,
+        keypoints: np.ndarray | None = None,
+    ) -> None:
+        self.t = np.asarray(t, dtype=np.float64)
+        self.motion = np.asarray(motion, dtype=np.float32)
+        self.horizontal = np.asarray(horizontal, dtype=np.float32)
+        self.keypoints = None if keypoints is None else np.asarray(keypoints, dtype=np.float32).reshape(-1, 51)
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def to_json(self) -> dict[str, list]:
+        out = {
+            "t": np.round(self.t, SERIES_DECIMALS).tolist(),
+            "motion": np.round(self.motion.astype(np.float64), SERIES_DECIMALS).tolist(),
+            "horizontal": np.round(self.horizontal.astype(np.float64), SERIES_DECIMALS).tolist(),
+        }
+        if self.keypoints is not None:
+            out["keypoints"] = np.round(self.keypoints.astype(np.float64), 3).tolist()
+        return out
+
+
+def to_jsonable(value: Any) -> Any:
+    """Recursively convert arrays, NumPy scalars, tracks and models into plain JSON types (rounding series)."""
+    if isinstance(value, dict):
+        return {key: to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        if np.issubdtype(value.dtype, np.floating):
+            return np.round(value.astype(np.float64), SERIES_DECIMALS).tolist()
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, SignalTrack):
+        return value.to_json()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return value
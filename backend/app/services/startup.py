@@ -0,0 +1,76 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+
+class StartupTracker:
+    """
+    Loads heavy components (models, worker pools, optional LLM clients) on a
+    background thread after the API starts listening, recording per-component
+    state and timings for the readiness probe. `/health` answers immediately;
+    `/ready` stays false until every required component has loaded.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loaders: dict[str, Callable[[], dict | None]] = {}
+        self._components: dict[str, dict] = {}
+        self._thread: threading.Thread | None = None
+        self._started_at: datetime | None = None
+
+    def register(self, name: str, loader: Callable[[], dict | None], required: bool = True) -> None:
+        """`loader` may return a small dict of details to expose on /ready."""
+        with self._lock:
+            self._loaders[name] = loader
+            self._components[name] = {
+                "state": "pending",
+                "required": required,
+                "elapsed_ms": None,
+                "error": None,
+                "detail": None,
+            }
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._started_at = datetime.now(timezone.utc)
+            self._thread = threading.Thread(target=self._run, name="startup-loader", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        return self.ready()
+
+    def ready(self) -> bool:
+        with self._lock:
+            return all(c["state"] == "ready" for c in self._components.values() if c["required"])
+
+    def status(self) -> dict:
+        with self._lock:
+            components = {name: dict(c) for name, c in self._components.items()}
+        return {
+            "ready": all(c["state"] == "ready" for c in components.values() if c["required"]),
+            "started_at": self._started_at.isoformat() if self._started_at else None,
+            "components": components,
+        }
+
+    def _run(self) -> None:
+        for name, loader in list(self._loaders.items()):
+            self._update(name, state="loading")
+            start = time.perf_counter()
+            try:
+                detail = loader()
+            except Exception as exc:
+                self._update(name, state="failed", elapsed_ms=(time.perf_counter() - start) * 1000.0, error=str(exc))
+                print(f"[Startup] {name} FAILED: {exc}")
+                continue
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            self._update(name, state="ready", elapsed_ms=elapsed_ms, detail=detail)
+            print(f"[Startup] {name} ready in {elapsed_ms:.0f} ms")
+
+    def _update(self, name: str, **fields) -> None:
+        with self._lock:
+            self._components[name].update(fields)
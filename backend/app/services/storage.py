@@ -1,29 +1,72 @@
+import hashlib
 import json
 import uuid
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 from app.config import settings
 
 
+class UploadTooLargeError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    path: Path
+    size_bytes: int
+    sha256: str
+
+
 class StorageService:
     def __init__(self) -> None:
         self.root = Path(settings.storage_root)
         self.uploads = self.root / settings.uploads_dir_name
         self.reports = self.root / settings.reports_dir_name
         self.alerts = self.root / settings.alerts_dir_name
+        self.cache = self.root / settings.cache_dir_name
         self.uploads.mkdir(parents=True, exist_ok=True)
         self.reports.mkdir(parents=True, exist_ok=True)
         self.alerts.mkdir(parents=True, exist_ok=True)
 
     def save_upload(self, filename: str, content: bytes) -> Path:
-        suffix = Path(filename).suffix or ".mp4"
-        safe_name = f"{datetime.now(tz=timezone.utc).strftime('%Y%m%dT%H%M%SZ')}_{uuid.uuid4().hex}{suffix}"
-        file_path = self.uploads / safe_name
+        file_path = self._new_upload_path(filename)
         file_path.write_bytes(content)
         return file_path
 
+    def save_upload_stream(self, filename: str, stream: BinaryIO, max_bytes: int, chunk_size: int) -> StoredUpload:
+        """
+        Copy an upload to disk in fixed-size chunks, enforcing the size limit and
+        hashing the content as it arrives. Peak memory is one chunk per request.
+        """
+        file_path = self._new_upload_path(filename)
+        partial_path = file_path.with_name(file_path.name + ".part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with partial_path.open("wb") as out:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes.")
+                    digest.update(chunk)
+                    out.write(chunk)
+            partial_path.replace(file_path)
+        except BaseException:
+            partial_path.unlink(missing_ok=True)
+            raise
+        return StoredUpload(path=file_path, size_bytes=size, sha256=digest.hexdigest())
+
+    def _new_upload_path(self, filename: str) -> Path:
+        suffix = Path(filename).suffix or ".mp4"
+        safe_name = f"{datetime.now(tz=timezone.utc).strftime('%Y%m%dT%H%M%SZ')}_{uuid.uuid4().hex}{suffix}"
+        return self.uploads / safe_name
+
     def save_report(self, report_id: str, payload: dict[str, Any]) -> Path:
         out = self.reports / f"{report_id}.json"
         out.write_text(json.dumps(payload, indent=2, default=str), encoding="utf-8")
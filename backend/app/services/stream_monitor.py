@@ -0,0 +1,273 @@
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable
+from uuid import uuid4
+
+import numpy as np
+
+from app.config import settings
+from app.schemas import Incident, IncidentType, StreamStatus
+from app.services.frame_stream_analyzer import FrameStreamAnalyzer
+from app.services.gemma_agent import STRIP_TYPES, IncidentAnalysisAgent
+from app.services.keypoint_extractor import KEYPOINT_FEATURES
+from app.services.pose_event_detector import PoseEventDetector
+
+IncidentCallback = Callable[[str, Incident], None]
+
+# Column layout of FeatureRingBuffer rows; keypoint columns stay zero when no keypoint model is configured.
+T, MOTION, BRIGHTNESS, HORIZONTAL, AREA_CHANGE = range(5)
+KEYPOINTS = slice(5, 5 + len(KEYPOINT_FEATURES))
+ROW_WIDTH = KEYPOINTS.stop
+
+
+class FeatureRingBuffer:
+    """
+    Fixed-capacity ring of per-frame feature rows. Storage is allocated once,
+    so memory stays constant however long the stream runs.
+    """
+
+    def __init__(self, capacity: int, width: int = ROW_WIDTH) -> None:
+        self.capacity = max(1, capacity)
+        self._data = np.zeros((self.capacity, width), dtype=np.float64)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, row: tuple[float, ...] | np.ndarray) -> None:
+        self._data[self._next] = row
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def latest(self, n: int) -> np.ndarray:
+        """Last `n` rows in chronological order."""
+        n = min(n, self._count)
+        idx = (np.arange(self._next - n, self._next)) % self.capacity
+        return self._data[idx]
+
+
+class StreamMonitor:
+    """
+    Continuous monitor for one video source. Every `hop` samples it scores
+    the newest window with PoseEventDetector, cut on time like uploaded clips,
+    and reports incidents through `on_incident` with a per-type cooldown to
+    avoid repeat alerts. `on_incident` runs on a separate alert thread so slow
+    delivery (SMTP) never stalls frame capture.
+    """
+
+    def __init__(
+        self,
+        source: str | int,
+        analyzer: FrameStreamAnalyzer,
+        detector: PoseEventDetector,
+        on_incident: IncidentCallback,
+        realtime: bool = True,
+    ) -> None:
+        self.stream_id = uuid4().hex[:12]
+        self.source = source
+        self.analyzer = analyzer
+        self.detector = detector
+        self.on_incident = on_incident
+        self.realtime = realtime
+        self.window_size = detector.window_size
+        self.hop = max(1, settings.stream_window_hop)
+
+        self.state = "starting"
+        self.error: str | None = None
+        self.started_at = datetime.now(tz=timezone.utc)
+        self.frames_processed = 0
+        self.windows_scored = 0
+        self.last_timestamp = 0.0
+
+        self._has_keypoints = False
+        self._buffer = FeatureRingBuffer(max(settings.stream_ring_buffer_size, self.window_size))
+        self._detection_latencies_ms: deque[float] = deque(maxlen=256)
+        self._recent_incidents: deque[Incident] = deque(maxlen=settings.stream_recent_incident_limit)
+        self._last_emitted: dict[str, float] = {}
+        # Guards the counters and deques above: the monitor thread writes them while status() reads.
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"stream-{self.stream_id}", daemon=True)
+        self._alerts = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"stream-alerts-{self.stream_id}")
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+
+    def is_active(self) -> bool:
+        return self._thread.is_alive()
+
+    def status(self) -> StreamStatus:
+        with self._lock:
+            latencies = np.array(self._detection_latencies_ms, dtype=np.float32)
+            recent_incidents = list(self._recent_incidents)
+            state, error = self.state, self.error
+            frames_processed, windows_scored = self.frames_processed, self.windows_scored
+            last_timestamp = self.last_timestamp
+        return StreamStatus(
+            stream_id=self.stream_id,
+            source=str(self.source),
+            state=state,
+            started_at=self.started_at,
+            frames_processed=frames_processed,
+            windows_scored=windows_scored,
+            last_timestamp_seconds=last_timestamp,
+            detection_latency_p95_ms=float(np.percentile(latencies, 95)) if latencies.size else 0.0,
+            detection_latency_budget_ms=settings.emergency_latency_target_ms,
+            recent_incidents=recent_incidents,
+            error=error,
+        )
+
+    def _run(self) -> None:
+        with self._lock:
+            self.state = "running"
+        since_window = 0
+        try:
+            for sample in self.analyzer.stream(self.source, self._stop, realtime=self.realtime):
+                row = np.zeros(ROW_WIDTH, dtype=np.float64)
+                row[:KEYPOINTS.start] = (
+                    sample["t"],
+                    sample["motion"],
+                    sample["brightness"],
+                    sample["horizontal"],
+                    sample["area_change"],
+                )
+                if KEYPOINT_FEATURES[0] in sample:
+                    self._has_keypoints = True
+                    row[KEYPOINTS] = [sample[name] for name in KEYPOINT_FEATURES]
+                self._buffer.append(row)
+                with self._lock:
+                    self.frames_processed += 1
+                    self.last_timestamp = sample["t"]
+                since_window += 1
+                if len(self._buffer) >= self.window_size and since_window >= self.hop:
+                    since_window = 0
+                    self._score_window(sample["captured_at"])
+            with self._lock:
+                self.state = "stopped" if self._stop.is_set() else "ended"
+        except Exception as exc:
+            with self._lock:
+                self.state = "failed"
+                self.error = str(exc)
+        finally:
+            # Queued alerts are still delivered; the alert thread exits afterwards.
+            self._alerts.shutdown(wait=False)
+
+    def _score_window(self, captured_at: float) -> None:
+        # The whole buffer goes in: at high capture rates one window spans more than `window_size` samples.
+        rows = self._buffer.latest(len(self._buffer))
+        features = self.detector.sample_features(
+            rows[:, MOTION],
+            rows[:, HORIZONTAL],
+            rows[:, KEYPOINTS] if self._has_keypoints else None,
+            min(1.0, float(np.std(rows[-self.window_size :, MOTION])) / 25.0),
+        )
+        result = self.detector.predict_samples(rows[:, T], features)
+        latency_ms = (time.perf_counter() - captured_at) * 1000.0
+        with self._lock:
+            self._detection_latencies_ms.append(latency_ms)
+            self.windows_scored += 1
+
+        if not result.get("available"):
+            return
+        top_event = str(result["top_event"])
+        confidence = float(result["top_confidence"])
+        if top_event == IncidentType.none.value or confidence < settings.stream_incident_threshold:
+            return
+        try:
+            incident_type = IncidentType(top_event)
+        except ValueError:
+            incident_type = IncidentType.suspicious_activity
+        if incident_type in STRIP_TYPES:
+            return
+
+        window_start, window_end = result["peak_window"]["start"], result["peak_window"]["end"]
+        last = self._last_emitted.get(incident_type.value)
+        if last is not None and window_end - last < settings.stream_incident_cooldown_seconds:
+            return
+        self._last_emitted[incident_type.value] = window_end
+
+        incident = Incident(
+            incident_type=incident_type,
+            confidence=min(1.0, confidence),
+            timestamp_seconds=max(0.0, window_start),
+            evidence=(
+                f"Live window {window_start:.1f}-{window_end:.1f}s: TF pose detector "
+                f"{incident_type.value}={confidence:.1%} (detection latency {latency_ms:.0f}ms)."
+            ),
+            recommended_action=IncidentAnalysisAgent._default_action(incident_type),
+        )
+        with self._lock:
+            self._recent_incidents.append(incident)
+        self._alerts.submit(self._deliver, incident)
+
+    def _deliver(self, incident: Incident) -> None:
+        try:
+            self.on_incident(self.stream_id, incident)
+        except Exception:
+            traceback.print_exc()
+
+
+class StreamMonitorRegistry:
+    """Tracks running stream monitors and enforces the active-stream cap."""
+
+    def __init__(
+        self,
+        analyzer: FrameStreamAnalyzer,
+        detector: PoseEventDetector,
+        on_incident: IncidentCallback,
+        max_active: int,
+    ) -> None:
+        self.analyzer = analyzer
+        self.detector = detector
+        self.on_incident = on_incident
+        self.max_active = max(1, max_active)
+        self._monitors: dict[str, StreamMonitor] = {}
+        self._lock = threading.Lock()
+
+    def start(self, source: str, realtime: bool = True) -> StreamMonitor:
+        parsed: str | int = int(source) if source.isdigit() else source
+        with self._lock:
+            self._monitors = {k: m for k, m in self._monitors.items() if m.is_active()}
+            if len(self._monitors) >= self.max_active:
+                raise RuntimeError(f"Stream limit reached ({self.max_active} active).")
+            monitor = StreamMonitor(
+                source=parsed,
+                analyzer=self.analyzer,
+                detector=self.detector,
+                on_incident=self.on_incident,
+                realtime=realtime,
+            )
+            self._monitors[monitor.stream_id] = monitor
+        monitor.start()
+        return monitor
+
+    def get(self, stream_id: str) -> StreamMonitor | None:
+        with self._lock:
+            return self._monitors.get(stream_id)
+
+    def monitors(self) -> list[StreamMonitor]:
+        with self._lock:
+            return list(self._monitors.values())
+
+    def stop(self, stream_id: str) -> StreamMonitor | None:
+        with self._lock:
+            monitor = self._monitors.pop(stream_id, None)
+        if monitor is not None:
+            monitor.stop()
+        return monitor
+
+    def stop_all(self) -> None:
+        with self._lock:
+            monitors = list(self._monitors.values())
+            self._monitors.clear()
+        for monitor in monitors:
+            monitor.stop()
@@ -3,6 +3,8 @@ from pathlib import Path
 import cv2
 import numpy as np
 
+from app.services.feature_pipeline import BrightnessStage, FeaturePipeline, MotionStage
+
 
 def _safe_float(value: float) -> float:
     if np.isnan(value) or np.isinf(value):
@@ -23,38 +25,17 @@ class VideoSignalExtractor:
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
         duration_seconds = (total_frames / fps) if fps > 0 else 0.0
 
-        frame_stride = max(1, total_frames // self.max_sample_frames) if total_frames else 1
-        sampled_frames = []
-        frame_idx = 0
-
-        while True:
-            ok, frame = cap.read()
-            if not ok:
-                break
-            if frame_idx % frame_stride == 0:
-                sampled_frames.append(frame)
-            frame_idx += 1
-
         cap.release()
 
-        grayscale_means = []
-        motion_scores = []
-        prev_gray = None
-        for frame in sampled_frames:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            grayscale_means.append(_safe_float(float(gray.mean())))
-            if prev_gray is None:
-                motion_scores.append(0.0)
-            else:
-                diff = cv2.absdiff(gray, prev_gray)
-                motion_scores.append(_safe_float(float(diff.mean())))
-            prev_gray = gray
+        series = FeaturePipeline([BrightnessStage(), MotionStage()]).scan(video_path, self.max_sample_frames)
+        grayscale_means = [_safe_float(x) for x in series["brightness"]]
+        motion_scores = [_safe_float(x) for x in series["motion"]]
 
         return {
             "fps": _safe_float(fps),
             "total_frames": total_frames,
             "duration_seconds": _safe_float(duration_seconds),
-            "sample_count": len(sampled_frames),
+            "sample_count": len(grayscale_means),
             "brightness_mean": _safe_float(float(np.mean(grayscale_means))) if grayscale_means else 0.0,
             "motion_mean": _safe_float(float(np.mean(motion_scores))) if motion_scores else 0.0,
             "motion_std": _safe_float(float(np.std(motion_scores))) if motion_scores else 0.0,
@@ -0,0 +1,124 @@
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+
+from app.services.pose_runtime import TFLitePoseRuntime
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export the pose event model to TFLite (float and int8).")
+    parser.add_argument("--model", default="models/pose_event_detector.keras", help="Trained Keras model")
+    parser.add_argument(
+        "--dataset",
+        default=None,
+        help="NPZ from prepare_poselift_windows.py; used for int8 calibration and the parity check",
+    )
+    parser.add_argument("--out-dir", default="models", help="Directory for the .tflite files and export report")
+    parser.add_argument("--calibration-samples", type=int, default=256)
+    parser.add_argument("--parity-samples", type=int, default=512)
+    parser.add_argument("--skip-int8", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def load_windows(dataset: str | None, window: int, features: int, count: int, seed: int) -> np.ndarray:
+    """Real windows from the NPZ when given; otherwise synthetic windows shaped like runtime input."""
+    rng = np.random.default_rng(seed)
+    if dataset:
+        X = np.load(dataset, allow_pickle=True)["X"].astype(np.float32)
+        return X[rng.permutation(len(X))[:count]]
+    X = np.zeros((count, window, features), dtype=np.float32)
+    X[:, :, 0] = rng.uniform(0.0, 1.0, size=(count, window))
+    X[:, :, 51] = rng.gamma(2.0, 6.0, size=(count, window))
+    X[:, :, 52] = rng.uniform(0.0, 1.0, size=(count, 1))
+    return X
+
+
+def convert(saved_model_dir: Path, calibration: np.ndarray | None) -> bytes:
+    converter = tf.lite.TFLiteConverter.from_saved_model(str(saved_model_dir))
+    if calibration is not None:
+        # Full-integer post-training quantization; input/output stay float32 so callers are unchanged.
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: ([calibration[i : i + 1]] for i in range(len(calibration)))
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    return converter.convert()
+
+
+def time_per_window_ms(fn, windows: np.ndarray, repeats: int = 200) -> dict:
+    single = windows[:1]
+    fn(single)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(single)
+    single_ms = (time.perf_counter() - start) * 1000.0 / repeats
+    fn(windows)
+    start = time.perf_counter()
+    for _ in range(10):
+        fn(windows)
+    batch_ms = (time.perf_counter() - start) * 1000.0 / 10
+    return {"single_window_ms": single_ms, "batch_ms": batch_ms, "batch_size": int(len(windows))}
+
+
+def parity(reference: np.ndarray, probs: np.ndarray) -> dict:
+    diff = np.abs(reference - probs)
+    return {
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "top1_agreement": float(np.mean(reference.argmax(axis=1) == probs.argmax(axis=1))),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    model_path = Path(args.model)
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    model = tf.keras.models.load_model(model_path)
+    window, features = int(model.input_shape[1]), int(model.input_shape[2])
+    windows = load_windows(args.dataset, window, features, args.parity_samples, args.seed)
+    reference = model.predict(windows, verbose=0)
+
+    variants = {"float": None}
+    if not args.skip_int8:
+        variants["int8"] = load_windows(args.dataset, window, features, args.calibration_samples, args.seed + 1)
+
+    keras_forward = tf.function(
+        lambda x: model(x, training=False),
+        input_signature=[tf.TensorSpec([None, window, features], tf.float32)],
+    )
+    report = {
+        "source_model": str(model_path),
+        "source_size_bytes": model_path.stat().st_size,
+        "calibration": "dataset" if args.dataset else "synthetic",
+        "keras": time_per_window_ms(lambda x: keras_forward(x).numpy(), windows[:32]),
+        "variants": {},
+    }
+    for name, calibration in variants.items():
+        out_path = out_dir / f"{model_path.stem}_{name}.tflite"
+        # Keras 3 models convert reliably only through an exported SavedModel.
+        with tempfile.TemporaryDirectory(prefix="pose_event_savedmodel_") as saved_model_dir:
+            model.export(saved_model_dir, verbose=False)
+            out_path.write_bytes(convert(Path(saved_model_dir), calibration))
+        runtime = TFLitePoseRuntime(out_path)
+        report["variants"][name] = {
+            "path": str(out_path),
+            "size_bytes": out_path.stat().st_size,
+            **parity(reference, runtime(windows)),
+            **time_per_window_ms(runtime, windows[:32]),
+        }
+        print(f"Saved {name} model: {out_path} ({out_path.stat().st_size / 1024:.1f} KiB)")
+
+    report_path = out_dir / f"{model_path.stem}_export_report.json"
+    report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(json.dumps(report, indent=2))
+    print(f"Saved report: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark decode cost of FrameSampler against the read-and-discard loop.
+
+Compares, over the same video and sampling stride:
+  - baseline: cap.read() on every frame, keep every Nth (previous extractor code)
+  - grab:     FrameSampler with grab()/retrieve(), no seeking
+  - seek:     FrameSampler with keyframe seeking across large gaps
+
+Reports wall time and source frames/s (frames of video covered per second).
+Without --video a synthetic clip is generated first.
+
+Usage (from backend/):
+    python scripts/benchmark_frame_sampler.py --synthetic-seconds 300 --stride 4
+    python scripts/benchmark_frame_sampler.py --video data/uploads/clip.mp4 --interval 0.5
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.frame_sampler import FrameSampler  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark decode-aware frame sampling")
+    p.add_argument("--video", default="", help="Video to benchmark; a synthetic clip is generated if omitted")
+    p.add_argument("--synthetic-seconds", type=int, default=120)
+    p.add_argument("--fps", type=float, default=30.0)
+    p.add_argument("--width", type=int, default=1280)
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--stride", type=int, default=4, help="Keep every Nth frame")
+    p.add_argument("--interval", type=float, default=0.0, help="Time-based sampling (seconds); overrides --stride")
+    p.add_argument("--seek-min-gap", type=int, default=60, help="Gap (frames) above which the seek mode seeks")
+    return p.parse_args()
+
+
+def make_synthetic_video(path: Path, seconds: int, fps: float, width: int, height: int) -> None:
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 60, size=(height, width, 3), dtype=np.uint8)
+    for i in range(int(seconds * fps)):
+        frame = background.copy()
+        x = int((i * 7) % max(1, width - 120))
+        cv2.rectangle(frame, (x, height // 3), (x + 120, height // 3 + 260), (200, 180, 160), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def run_baseline(video: Path, stride: int) -> tuple[int, int]:
+    cap = cv2.VideoCapture(str(video))
+    idx = 0
+    kept = 0
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if idx % stride == 0:
+            kept += 1
+        idx += 1
+    cap.release()
+    return idx, kept
+
+
+def run_sampler(video: Path, stride: int, interval: float, seek_min_gap: int) -> tuple[int, int]:
+    cap = cv2.VideoCapture(str(video))
+    sampler = FrameSampler(cap, stride=stride, interval_seconds=interval or None, seek_min_gap=seek_min_gap)
+    kept = sum(1 for _ in sampler)
+    covered = sampler.total_frames or (sampler.frames_decoded + sampler.frames_grabbed)
+    cap.release()
+    return covered, kept
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        video = Path(args.video) if args.video else Path(tmp) / "synthetic.mp4"
+        if not args.video:
+            print(f"Generating {args.synthetic_seconds}s synthetic clip at {args.width}x{args.height}...")
+            make_synthetic_video(video, args.synthetic_seconds, args.fps, args.width, args.height)
+
+        stride = args.stride
+        if args.interval:
+            cap = cv2.VideoCapture(str(video))
+            stride = max(1, int(round(args.interval * (cap.get(cv2.CAP_PROP_FPS) or 30.0))))
+            cap.release()
+
+        modes = [
+            ("baseline read()", lambda: run_baseline(video, stride)),
+            ("sampler grab()", lambda: run_sampler(video, args.stride, args.interval, seek_min_gap=0)),
+            ("sampler seek", lambda: run_sampler(video, args.stride, args.interval, seek_min_gap=args.seek_min_gap)),
+        ]
+        baseline_fps = None
+        print(f"{'mode':<18}{'sampled':>9}{'seconds':>10}{'src frames/s':>15}{'speedup':>9}")
+        for name, fn in modes:
+            t0 = time.perf_counter()
+            covered, kept = fn()
+            elapsed = time.perf_counter() - t0
+            fps = covered / elapsed if elapsed > 0 else 0.0
+            baseline_fps = baseline_fps or fps
+            print(f"{name:<18}{kept:>9}{elapsed:>10.2f}{fps:>15.1f}{fps / baseline_fps:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measure keypoint extraction cost per frame against the per-frame latency budget.
+
+Runs the default feature pipeline with a KeypointStage over synthetic frames
+for each batch size and latency-controller downscale level, and reports the
+amortized per-frame time (the figure `_scan_range` charges each frame) next
+to EMERGENCY_LATENCY_TARGET_MS.
+
+Usage (from backend/):
+    python scripts/benchmark_keypoint_stage.py --model models/movenet_lightning.tflite
+    python scripts/benchmark_keypoint_stage.py --model models/movenet.onnx --batch-sizes 1 8 --width 1920 --height 1080
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.config import settings  # noqa: E402
+from app.services.feature_pipeline import (  # noqa: E402
+    BrightnessStage,
+    ContourPostureStage,
+    FeaturePipeline,
+    KeypointStage,
+    MotionStage,
+)
+from app.services.latency_controller import DEFAULT_LEVELS  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark the keypoint feature stage")
+    p.add_argument("--model", required=True, help="Local pose model (.tflite or .onnx)")
+    p.add_argument("--width", type=int, default=1280)
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--frames", type=int, default=128)
+    p.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(args.frames)]
+    budget = settings.emergency_latency_target_ms
+    downscales = sorted({level[0] for level in DEFAULT_LEVELS}, reverse=True)
+
+    print(f"budget {budget} ms/frame, {args.width}x{args.height}, {args.frames} frames")
+    print(f"{'batch':>5} {'downscale':>9} {'ms/frame':>9} {'keypoints only':>15} {'within':>7}")
+    for batch_size in args.batch_sizes:
+        for downscale in downscales:
+            full = FeaturePipeline(
+                [BrightnessStage(), MotionStage(), ContourPostureStage(), KeypointStage(args.model, batch_size)]
+            )
+            only = FeaturePipeline([KeypointStage(args.model, batch_size)])
+            timings = []
+            for pipeline in (full, only):
+                pipeline.process_batch(frames[:batch_size], downscale)
+                start = time.perf_counter()
+                for i in range(0, len(frames), batch_size):
+                    pipeline.process_batch(frames[i : i + batch_size], downscale)
+                timings.append((time.perf_counter() - start) * 1000.0 / len(frames))
+            print(
+                f"{batch_size:5d} {downscale:9.2f} {timings[0]:9.2f} {timings[1]:15.2f} "
+                f"{'yes' if timings[0] <= budget else 'no':>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Load test for an Ollama-compatible /api/generate endpoint (serve_peft_model.py,
+Ollama, or the bundled stub) with incident-classification traffic.
+
+Prompts are LocalGemmaClient primary-classifier prompts built from
+synthetic signals through IncidentAnalysisAgent._build_multimodal_summary,
+with a retail-like mix (mostly normal activity, some suspicious,
+shoplifting and violent windows, some with the fast detector skipped).
+They are sent either closed-loop (--rate 0: each of --concurrency workers
+sends back to back) or open-loop with Poisson arrivals at --rate req/s, at
+most --concurrency in flight. Open-loop latency is measured from each
+request's scheduled arrival, so time spent waiting for a free worker
+counts (no coordinated omission).
+
+Reported: time-to-first-token and total latency percentiles, requests/s,
+output tokens/s, and error and parse-failure rates. TTFT comes from the
+first streamed chunk; for servers that do not stream (serve_peft_model.py)
+it is total latency minus the server-reported eval_duration. --stub
+starts scripts/stub_llm_server.py in-process so the harness runs on any
+CPU-only machine.
+
+Usage (from backend/):
+    python scripts/benchmark_llm_endpoint.py --stub --requests 200 --concurrency 8
+    python scripts/benchmark_llm_endpoint.py --endpoint http://127.0.0.1:11434/api/generate \\
+        --model instamind-shoplifting --rate 4 --requests 100 --structured
+"""
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_ROOT))
+sys.path.insert(0, str(BACKEND_ROOT / "scripts"))
+
+from app.config import settings  # noqa: E402
+from app.services.gemma_agent import IncidentAnalysisAgent  # noqa: E402
+from app.services.http_client import TRANSPORT_ERRORS  # noqa: E402
+from app.services.local_gemma_client import (  # noqa: E402
+    INCIDENT_ARRAY_SCHEMA,
+    LocalGemmaClient,
+    build_primary_prompt,
+)
+
+# (scenario, share of traffic); "gated" windows skipped the fast detector.
+SCENARIOS = [
+    ("none", 0.6),
+    ("gated", 0.1),
+    ("suspicious_activity", 0.15),
+    ("shoplifting", 0.12),
+    ("violent_activity", 0.03),
+]
+FAST_LABELS = ["none", "shoplifting", "suspicious_activity", "violent_activity"]
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Load-test an Ollama-compatible /api/generate endpoint")
+    p.add_argument("--endpoint", default=settings.local_gemma_endpoint)
+    p.add_argument("--model", default=settings.local_gemma_model_name)
+    p.add_argument("--requests", type=int, default=200)
+    p.add_argument("--concurrency", type=int, default=8, help="Maximum requests in flight")
+    p.add_argument("--rate", type=float, default=0.0, help="Open-loop Poisson arrivals per second (0 = closed loop)")
+    p.add_argument("--warmup", type=int, default=2, help="Requests sent (and not measured) before the run")
+    p.add_argument("--max-tokens", type=int, default=160)
+    p.add_argument("--temperature", type=float, default=0.1)
+    p.add_argument("--stream", action=argparse.BooleanOptionalAction, default=True)
+    p.add_argument("--structured", action="store_true", help="Send INCIDENT_ARRAY_SCHEMA as `format`")
+    p.add_argument("--timeout", type=float, default=60.0, help="Per-request read timeout (seconds)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json-out", default="", help="Also write the summary and per-request results here")
+    p.add_argument("--stub", action="store_true", help="Benchmark an in-process stub model instead of --endpoint")
+    p.add_argument("--stub-prefill-ms", type=float, default=0.5)
+    p.add_argument("--stub-decode-ms", type=float, default=15.0)
+    p.add_argument("--stub-slots", type=int, default=1)
+    p.add_argument("--stub-error-rate", type=float, default=0.0)
+    return p.parse_args()
+
+
+def make_signals(rng: np.random.Generator) -> dict:
+    names = [name for name, _ in SCENARIOS]
+    scenario = names[rng.choice(len(SCENARIOS), p=[share for _, share in SCENARIOS])]
+    active = scenario not in ("none", "gated")
+    signals = {
+        "video": {
+            "fps": float(rng.choice([15.0, 25.0, 30.0])),
+            "duration_seconds": float(rng.uniform(5, 60)),
+            "motion_mean": float(rng.uniform(4, 12) if active else rng.uniform(0, 4)),
+            "motion_std": float(rng.uniform(1, 4) if active else rng.uniform(0, 1.5)),
+            "brightness_mean": float(rng.uniform(60, 180)),
+        },
+        "pose": {
+            "horizontal_posture_score": float(rng.uniform(0, 0.3)),
+            "area_change_mean": float(rng.uniform(50, 400) if active else rng.uniform(0, 80)),
+        },
+        "audio": {
+            "distress_score": float(rng.uniform(0.4, 0.9) if scenario == "violent_activity" else rng.uniform(0, 0.3)),
+        },
+    }
+    if scenario == "gated":
+        signals["fast_path"] = {"available": False, "event_probs": {}, "skipped": "motion_gate"}
+    else:
+        logits = rng.normal(0, 0.5, len(FAST_LABELS))
+        logits[FAST_LABELS.index(scenario)] += rng.uniform(1.0, 3.0)
+        probs = np.exp(logits) / np.exp(logits).sum()
+        event_probs = {label: round(float(p), 3) for label, p in zip(FAST_LABELS, probs)}
+        signals["fast_path"] = {"available": True, "event_probs": event_probs}
+    return signals
+
+
+def make_prompts(n: int, seed: int) -> list[str]:
+    rng = np.random.default_rng(seed)
+    return [build_primary_prompt(IncidentAnalysisAgent._build_multimodal_summary(make_signals(rng))) for _ in range(n)]
+
+
+class EndpointClient:
+    """One keep-alive connection per worker thread."""
+
+    def __init__(self, endpoint: str, timeout: float) -> None:
+        parts = urllib.parse.urlsplit(endpoint)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port
+        self.path = parts.path or "/api/generate"
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def post(self, body: dict, scheduled: float) -> dict:
+        """Sends one request; times are measured from `scheduled` (perf_counter)."""
+        result = {"ok": False, "error": "", "parsed": False, "ttft_s": None, "total_s": None, "tokens": None}
+        conn = self._connection()
+        try:
+            headers = {"Content-Type": "application/json"}
+            conn.request("POST", self.path, body=json.dumps(body).encode(), headers=headers)
+            response = conn.getresponse()
+            if response.status != 200:
+                response.read()
+                result["error"] = f"HTTP {response.status}"
+                return result
+            first_at, text, final = None, "", {}
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    # A single non-streamed response arrives with done=true: no stream timing.
+                    if first_at is None and not chunk.get("done"):
+                        first_at = time.perf_counter()
+                    text += chunk["response"]
+                if chunk.get("done"):
+                    final = chunk
+                    break
+            response.read()
+        except TRANSPORT_ERRORS + (ValueError,) as exc:
+            self._local.conn = None
+            conn.close()
+            result["error"] = exc.__class__.__name__
+            return result
+
+        end = time.perf_counter()
+        result["ok"] = bool(final)
+        result["error"] = "" if final else "incomplete"
+        result["total_s"] = end - scheduled
+        if first_at is not None:
+            result["ttft_s"], result["ttft_source"] = first_at - scheduled, "stream"
+        elif "eval_duration" in final:
+            result["ttft_s"], result["ttft_source"] = max(0.0, end - scheduled - final["eval_duration"] / 1e9), "server"
+        result["tokens"] = final.get("eval_count")
+        if final.get("eval_count") and final.get("eval_duration"):
+            result["decode_tok_s"] = final["eval_count"] / (final["eval_duration"] / 1e9)
+        result["parsed"] = bool(LocalGemmaClient._parse(text))
+        return result
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            factory = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            conn = factory(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+
+def run(args: argparse.Namespace, endpoint: str) -> tuple[dict, list[dict]]:
+    client = EndpointClient(endpoint, args.timeout)
+    prompts = make_prompts(args.requests + args.warmup, args.seed)
+
+    def body(prompt: str) -> dict:
+        payload = {
+            "model": args.model,
+            "prompt": prompt,
+            "stream": args.stream,
+            "options": {"temperature": args.temperature, "num_predict": args.max_tokens},
+        }
+        if args.structured:
+            payload["format"] = INCIDENT_ARRAY_SCHEMA
+        return payload
+
+    for prompt in prompts[: args.warmup]:
+        client.post(body(prompt), time.perf_counter())
+    prompts = prompts[args.warmup:]
+
+    rng = np.random.default_rng(args.seed + 1)
+    offsets = np.cumsum(rng.exponential(1.0 / args.rate, len(prompts))) if args.rate > 0 else None
+
+    def job(i: int) -> dict:
+        if offsets is None:
+            scheduled = time.perf_counter()
+        else:
+            scheduled = start + float(offsets[i])
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return client.post(body(prompts[i]), scheduled)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        results = list(pool.map(job, range(len(prompts))))
+    wall = time.perf_counter() - start
+    return summarize(results, wall, args), results
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    ms = np.array(values) * 1000.0
+    return {f"p{q}": float(np.percentile(ms, q)) for q in (50, 90, 95, 99)} | {"max": float(ms.max())}
+
+
+def summarize(results: list[dict], wall: float, args: argparse.Namespace) -> dict:
+    ok = [r for r in results if r["ok"]]
+    tokens = [r["tokens"] for r in ok if r["tokens"] is not None]
+    decode = [r["decode_tok_s"] for r in ok if r.get("decode_tok_s")]
+    return {
+        "requests": len(results),
+        "concurrency": args.concurrency,
+        "offered_rate": args.rate or None,
+        "wall_s": wall,
+        "req_per_s": len(ok) / wall,
+        "output_tok_per_s": sum(tokens) / wall if tokens else None,
+        "decode_tok_per_s_per_request": float(np.mean(decode)) if decode else None,
+        "error_rate": 1 - len(ok) / len(results) if results else 0.0,
+        "errors": sorted({r["error"] for r in results if r["error"]}),
+        "parse_failure_rate": sum(not r["parsed"] for r in ok) / len(ok) if ok else None,
+        "ttft_ms": percentiles([r["ttft_s"] for r in ok if r["ttft_s"] is not None]),
+        "ttft_source": sorted({r.get("ttft_source", "none") for r in ok}),
+        "latency_ms": percentiles([r["total_s"] for r in ok]),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    endpoint = args.endpoint
+    server = None
+    if args.stub:
+        from stub_llm_server import start_stub_server
+
+        server = start_stub_server(
+            prefill_ms=args.stub_prefill_ms,
+            decode_ms=args.stub_decode_ms,
+            slots=args.stub_slots,
+            error_rate=args.stub_error_rate,
+            seed=args.seed,
+        )
+        endpoint = f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+
+    summary, results = run(args, endpoint)
+    if server is not None:
+        server.shutdown()
+
+    mode = f"open loop {args.rate:g} req/s" if args.rate > 0 else "closed loop"
+    print(f"\n{endpoint} model={args.model} stream={args.stream} structured={args.structured}")
+    print(f"{summary['requests']} requests, {mode}, concurrency {args.concurrency}, max_tokens {args.max_tokens}")
+    print(
+        f"throughput {summary['req_per_s']:.2f} req/s"
+        + (f", {summary['output_tok_per_s']:.1f} output tok/s" if summary["output_tok_per_s"] else "")
+        + (
+            f", {summary['decode_tok_per_s_per_request']:.1f} tok/s per request while decoding"
+            if summary["decode_tok_per_s_per_request"]
+            else ""
+        )
+    )
+    failures = summary["parse_failure_rate"]
+    print(
+        f"errors {summary['error_rate']:.1%} {summary['errors'] or ''}  "
+        f"parse failures {failures:.1%}" if failures is not None else f"errors {summary['error_rate']:.1%}"
+    )
+    print(f"{'':>12} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for label, key in (("ttft ms", "ttft_ms"), ("latency ms", "latency_ms")):
+        row = summary[key]
+        if row:
+            print(f"{label:>12} " + " ".join(f"{row[k]:>8.0f}" for k in ("p50", "p90", "p95", "p99", "max")))
+    print(f"(ttft from: {', '.join(summary['ttft_source'])})")
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps({"summary": summary, "results": results}, indent=2), encoding="utf-8")
+        print(f"Wrote {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
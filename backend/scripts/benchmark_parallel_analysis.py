@@ -0,0 +1,66 @@
+"""
+Measure how segment-parallel FrameStreamAnalyzer scales with worker count.
+
+Runs the full-video parallel scan at each worker count and reports wall time,
+processed frames/s and speedup over one worker, plus a check that the merged
+motion statistics agree across worker counts (boundary continuity).
+
+Usage (from backend/):
+    python scripts/benchmark_parallel_analysis.py --synthetic-seconds 600 --workers 1 2 4 8 16
+    python scripts/benchmark_parallel_analysis.py --video data/uploads/clip.mp4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.frame_stream_analyzer import FrameStreamAnalyzer  # noqa: E402
+from benchmark_frame_sampler import make_synthetic_video  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark segment-parallel video analysis")
+    p.add_argument("--video", default="", help="Video to benchmark; a synthetic clip is generated if omitted")
+    p.add_argument("--synthetic-seconds", type=int, default=300)
+    p.add_argument("--fps", type=float, default=30.0)
+    p.add_argument("--width", type=int, default=1280)
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 4])
+    p.add_argument("--min-segment-seconds", type=float, default=5.0)
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        video = Path(args.video) if args.video else Path(tmp) / "synthetic.mp4"
+        if not args.video:
+            print(f"Generating {args.synthetic_seconds}s synthetic clip at {args.width}x{args.height}...")
+            make_synthetic_video(video, args.synthetic_seconds, args.fps, args.width, args.height)
+
+        baseline = None
+        print(f"{'workers':>8}{'segments':>10}{'frames':>9}{'seconds':>10}{'frames/s':>11}{'speedup':>9}{'motion_mean':>13}")
+        for workers in sorted(set(args.workers)):
+            analyzer = FrameStreamAnalyzer(parallel_workers=workers, min_segment_seconds=args.min_segment_seconds)
+            analyzer.analyze_parallel(video)  # warm the pool so process spawn is not timed
+            t0 = time.perf_counter()
+            bundle = analyzer.analyze_parallel(video)
+            elapsed = time.perf_counter() - t0
+            analyzer.close()
+
+            frames = bundle["latency"]["frame_count_processed"]
+            fps = frames / elapsed if elapsed > 0 else 0.0
+            baseline = baseline or fps
+            print(
+                f"{workers:>8}{bundle['latency']['segments']:>10}{frames:>9}{elapsed:>10.2f}"
+                f"{fps:>11.1f}{fps / baseline:>8.2f}x{bundle['video']['motion_mean']:>13.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+CPU serving modes of serve_peft_model: the PEFT-wrapped adapter (current
+path) vs. the adapter merged into the base weights vs. merged plus dynamic
+int8 quantization.
+
+Each mode runs in a fresh process so load time and resident memory are
+not shared. Merged modes are loaded twice, first with an empty merged
+model cache (merge + save) and then from the cache (restart). For each
+mode we report load seconds, resident memory after generation and at
+peak, generated tokens/s on greedy classifier prompts, and how often the
+output matches the unmerged path (exact, and mean shared-prefix
+fraction).
+
+Usage (from backend/):
+    pip install torch peft transformers accelerate
+    python scripts/benchmark_peft_cpu_modes.py --base-model Qwen/Qwen2-0.5B-Instruct --adapter-dir ./adapter
+    python scripts/benchmark_peft_cpu_modes.py --adapter-dir ./adapter --modes merged int8 --requests 8
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_ROOT))
+sys.path.insert(0, str(BACKEND_ROOT / "scripts"))
+
+MODES = {
+    "unmerged": {"merge_adapter": False, "quantize": "none"},
+    "merged": {"merge_adapter": True, "quantize": "none"},
+    "int8": {"merge_adapter": True, "quantize": "int8"},
+}
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark unmerged vs. merged vs. int8 PEFT serving on CPU")
+    p.add_argument("--base-model", default="Qwen/Qwen2-0.5B-Instruct")
+    p.add_argument("--adapter-dir", default="./adapter")
+    p.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    p.add_argument("--requests", type=int, default=16)
+    p.add_argument("--batch-size", type=int, default=1)
+    p.add_argument("--max-tokens", type=int, default=64)
+    p.add_argument("--merged-cache-dir", default="", help="Default: a fresh temporary directory")
+    p.add_argument("--worker", choices=list(MODES), help=argparse.SUPPRESS)
+    return p.parse_args()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb() -> float:
+    """VmRSS from /proc (Linux); peak RSS elsewhere."""
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def worker(args: argparse.Namespace) -> dict:
+    import serve_peft_model
+    from benchmark_peft_batching import make_prompts
+
+    t0 = time.perf_counter()
+    serve_peft_model.load_model(
+        args.base_model, args.adapter_dir, merged_cache_dir=args.merged_cache_dir, **MODES[args.worker]
+    )
+    load_s = time.perf_counter() - t0
+
+    batcher = serve_peft_model.GenerationBatcher(args.batch_size, max_wait_ms=10.0)
+    prompts = make_prompts(args.requests)
+    batcher.submit(prompts[0], 0.0, args.max_tokens).result()
+    before = batcher.metrics()["generated_tokens"]
+    t0 = time.perf_counter()
+    futures = [batcher.submit(prompt, 0.0, args.max_tokens) for prompt in prompts]
+    texts = [future.result() for future in futures]
+    wall = time.perf_counter() - t0
+    return {
+        "load_s": load_s,
+        "rss_mb": current_rss_mb(),
+        "peak_rss_mb": peak_rss_mb(),
+        "tok_per_s": (batcher.metrics()["generated_tokens"] - before) / wall,
+        "texts": texts,
+    }
+
+
+def run_mode(mode: str, args: argparse.Namespace) -> dict:
+    cmd = [
+        sys.executable, __file__, "--worker", mode,
+        "--base-model", args.base_model, "--adapter-dir", args.adapter_dir,
+        "--requests", str(args.requests), "--batch-size", str(args.batch_size),
+        "--max-tokens", str(args.max_tokens), "--merged-cache-dir", args.merged_cache_dir,
+    ]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True, env={**os.environ, "PYTHONWARNINGS": "ignore"})
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def shared_prefix(a: str, b: str) -> float:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n / max(len(a), len(b), 1)
+
+
+def main() -> None:
+    args = parse_args()
+    if args.worker:
+        print(json.dumps(worker(args)))
+        return
+
+    args.merged_cache_dir = args.merged_cache_dir or tempfile.mkdtemp(prefix="merged_models_")
+    reference = run_mode("unmerged", args)["texts"] if "unmerged" not in args.modes else None
+    rows = []
+    for mode in args.modes:
+        cold = run_mode(mode, args)
+        row = run_mode(mode, args) if MODES[mode]["merge_adapter"] else cold
+        row["mode"] = mode
+        row["load_cold_s"] = cold["load_s"]
+        if reference is None:
+            reference = row["texts"]
+        row["exact"] = sum(a == b for a, b in zip(reference, row["texts"])) / len(reference)
+        row["prefix"] = sum(shared_prefix(a, b) for a, b in zip(reference, row["texts"])) / len(reference)
+        rows.append(row)
+
+    print(f"\n{args.requests} requests, batch size {args.batch_size}, max_tokens {args.max_tokens}, greedy")
+    print(
+        f"{'mode':>9} {'load s':>7} {'cached s':>8} {'RSS MB':>7} {'peak MB':>8} {'tok/s':>8} "
+        f"{'exact':>6} {'prefix':>7} {'speedup':>8}"
+    )
+    baseline = rows[0]["tok_per_s"]
+    for row in rows:
+        cached = f"{row['load_s']:>8.2f}" if MODES[row["mode"]]["merge_adapter"] else f"{'-':>8}"
+        print(
+            f"{row['mode']:>9} {row['load_cold_s']:>7.2f} {cached} {row['rss_mb']:>7.0f} {row['peak_rss_mb']:>8.0f} "
+            f"{row['tok_per_s']:>8.1f} "
+            f"{row['exact']:>6.0%} {row['prefix']:>7.0%} {row['tok_per_s'] / baseline:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
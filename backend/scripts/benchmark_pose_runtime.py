@@ -0,0 +1,114 @@
+"""
+Compare pose event runtimes (Keras/TensorFlow vs TFLite float vs TFLite int8).
+
+Each backend is loaded in a fresh subprocess so startup time and resident
+memory are measured in isolation: load time, peak RSS after warm-up, whether
+TensorFlow ended up imported, and single-window / batched latency.
+
+Usage (from backend/, after app.training.export_pose_event_model):
+    python scripts/benchmark_pose_runtime.py
+    python scripts/benchmark_pose_runtime.py --keras models/pose_event_detector.keras \\
+        --tflite models/pose_event_detector_float.tflite models/pose_event_detector_int8.tflite
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark pose event runtime backends")
+    p.add_argument("--keras", default="models/pose_event_detector.keras")
+    p.add_argument(
+        "--tflite",
+        nargs="*",
+        default=["models/pose_event_detector_float.tflite", "models/pose_event_detector_int8.tflite"],
+    )
+    p.add_argument("--batch-size", type=int, default=32)
+    p.add_argument("--repeats", type=int, default=200)
+    p.add_argument("--child", nargs=2, metavar=("BACKEND", "MODEL"), help=argparse.SUPPRESS)
+    return p.parse_args()
+
+
+def measure(backend: str, model_path: str, batch_size: int, repeats: int) -> dict:
+    """Runs inside the child process."""
+    start = time.perf_counter()
+    import numpy as np
+
+    from app.services.pose_runtime import load_pose_runtime
+
+    runtime = load_pose_runtime(backend, model_path)
+    windows = np.random.default_rng(0).random((batch_size, runtime.window_size, runtime.feature_dim), dtype=np.float32)
+    runtime(windows[:1])
+    load_ms = (time.perf_counter() - start) * 1000.0
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        runtime(windows[:1])
+    single_ms = (time.perf_counter() - t0) * 1000.0 / repeats
+    runtime(windows)
+    t0 = time.perf_counter()
+    for _ in range(max(1, repeats // 10)):
+        runtime(windows)
+    batch_ms = (time.perf_counter() - t0) * 1000.0 / max(1, repeats // 10)
+
+    return {
+        "backend": backend,
+        "model": model_path,
+        "interpreter": getattr(runtime, "interpreter_module", "tensorflow"),
+        "tensorflow_imported": "tensorflow" in sys.modules,
+        "load_and_warm_up_ms": load_ms,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        "single_window_ms": single_ms,
+        "batch_ms": batch_ms,
+        "batch_size": batch_size,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    if args.child:
+        print(json.dumps(measure(args.child[0], args.child[1], args.batch_size, args.repeats)))
+        return
+
+    runs = [("keras", args.keras)] + [("tflite", path) for path in args.tflite]
+    print(f"{'backend':8} {'model':44} {'load ms':>9} {'rss MB':>8} {'tf':>3} {'1-win ms':>9} {'batch ms':>9}")
+    for backend, model_path in runs:
+        if not Path(model_path).exists():
+            print(f"{backend:8} {model_path:44} missing, skipped")
+            continue
+        proc = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--child",
+                backend,
+                model_path,
+                "--batch-size",
+                str(args.batch_size),
+                "--repeats",
+                str(args.repeats),
+            ],
+            capture_output=True,
+            text=True,
+            cwd=BACKEND_ROOT,
+        )
+        if proc.returncode != 0:
+            print(f"{backend:8} {model_path:44} failed: {proc.stderr.strip().splitlines()[-1:]}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(
+            f"{backend:8} {Path(model_path).name:44} {r['load_and_warm_up_ms']:9.0f} {r['peak_rss_mb']:8.0f} "
+            f"{'y' if r['tensorflow_imported'] else 'n':>3} {r['single_window_ms']:9.3f} {r['batch_ms']:9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Character-level grammar for schema-constrained JSON generation (used by
+serve_peft_model.py).
+
+A supported schema compiles to a fixed sequence of segments (literal
+punctuation and keys, enum values, bounded numbers, bounded strings) laid
+out exactly as `json.dumps` writes it, which is also the layout the SFT
+targets use. Supported: an array with exactly one object whose properties
+are strings (enum or maxLength) or non-negative numbers (optional maximum),
+all required, in declaration order. Anything else compiles to None and is
+generated unconstrained.
+"""
+
+import json
+
+# A state is (segment index, segment sub-state); sub-states are hashable.
+State = tuple[int, object]
+
+
+class Literal:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def start(self):
+        return 0
+
+    def step(self, sub: int, ch: str):
+        return sub + 1 if sub < len(self.text) and self.text[sub] == ch else None
+
+    def can_end(self, sub: int) -> bool:
+        return sub == len(self.text)
+
+    def memo_key(self, sub: int):
+        return sub
+
+
+class Choice:
+    """One of `options`, each including its closing quote."""
+
+    def __init__(self, options: list[str]) -> None:
+        self.options = options
+
+    def start(self):
+        return ""
+
+    def step(self, sub: str, ch: str):
+        typed = sub + ch
+        return typed if any(option.startswith(typed) for option in self.options) else None
+
+    def can_end(self, sub: str) -> bool:
+        return sub in self.options
+
+    def memo_key(self, sub: str):
+        return sub
+
+
+class Number:
+    """Non-negative JSON number without exponent, at most `maximum` and `decimals` fraction digits."""
+
+    def __init__(self, maximum: float | None, decimals: int = 4, int_digits: int = 6) -> None:
+        self.maximum = maximum
+        self.decimals = decimals
+        self.int_digits = int_digits
+
+    def start(self):
+        return ""
+
+    def step(self, sub: str, ch: str):
+        typed = sub + ch
+        int_part, dot, frac = typed.partition(".")
+        if not int_part or not int_part.isdigit() or len(int_part) > self.int_digits:
+            return None
+        if len(int_part) > 1 and int_part[0] == "0":
+            return None
+        if dot and (len(frac) > self.decimals or (frac and not frac.isdigit())):
+            return None
+        # Appending digits never lowers the value, so the prefix itself is the smallest completion.
+        if self.maximum is not None and float(typed.rstrip(".")) > self.maximum:
+            return None
+        return typed
+
+    def can_end(self, sub: str) -> bool:
+        return bool(sub) and not sub.endswith(".")
+
+    def memo_key(self, sub: str):
+        return sub
+
+
+class String:
+    """String body plus closing quote; no escapes or control characters, at most `max_length` characters."""
+
+    def __init__(self, max_length: int) -> None:
+        self.max_length = max_length
+
+    def start(self):
+        return (0, False)
+
+    def step(self, sub: tuple[int, bool], ch: str):
+        length, closed = sub
+        if closed:
+            return None
+        if ch == '"':
+            return (length, True)
+        if length >= self.max_length or ch == "\\" or ord(ch) < 0x20:
+            return None
+        return (length + 1, False)
+
+    def can_end(self, sub: tuple[int, bool]) -> bool:
+        return sub[1]
+
+    def memo_key(self, sub: tuple[int, bool]):
+        # Allowed tokens only depend on whether the string is closed and how much room is left
+        # (capped: no single token is that long).
+        return (sub[1], min(self.max_length - sub[0], 64))
+
+
+class JSONGrammar:
+    def __init__(self, segments: list) -> None:
+        self.segments = segments
+
+    def start(self) -> State:
+        return (0, self.segments[0].start())
+
+    def feed(self, state: State, text: str) -> State | None:
+        """State after appending `text`, or None if that breaks the grammar."""
+        index, sub = state
+        for ch in text:
+            while True:
+                if index == len(self.segments):
+                    return None
+                segment = self.segments[index]
+                nxt = segment.step(sub, ch)
+                if nxt is not None:
+                    sub = nxt
+                    break
+                if not segment.can_end(sub):
+                    return None
+                index += 1
+                if index < len(self.segments):
+                    sub = self.segments[index].start()
+        return (index, sub)
+
+    def is_done(self, state: State) -> bool:
+        index, sub = state
+        last = len(self.segments) - 1
+        return index == len(self.segments) or (index == last and self.segments[last].can_end(sub))
+
+    def memo_key(self, state: State):
+        index, sub = state
+        if index == len(self.segments):
+            return (index, None)
+        return (index, self.segments[index].memo_key(sub))
+
+
+def compile_schema(schema) -> JSONGrammar | None:
+    """Grammar for a supported schema; None for anything else, including malformed schemas."""
+    try:
+        return _compile(schema)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _compile(schema) -> JSONGrammar | None:
+    if not isinstance(schema, dict) or schema.get("type") != "array":
+        return None
+    if schema.get("minItems") != 1 or schema.get("maxItems") != 1:
+        return None
+    item = schema.get("items")
+    if not isinstance(item, dict):
+        return None
+    properties = item.get("properties")
+    required = item.get("required", [])
+    if item.get("type") != "object" or not isinstance(properties, dict) or not properties:
+        return None
+    if not isinstance(required, list) or set(map(str, required)) != set(properties):
+        return None
+
+    segments: list = []
+    text = "[{"
+    for i, (name, spec) in enumerate(properties.items()):
+        if not isinstance(spec, dict):
+            return None
+        text += ("" if i == 0 else ", ") + json.dumps(name) + ": "
+        kind = spec.get("type")
+        enum = spec.get("enum")
+        if kind == "string" and enum:
+            if not isinstance(enum, list):
+                return None
+            segments += [Literal(text + '"'), Choice([json.dumps(str(v))[1:] for v in enum])]
+        elif kind == "string":
+            max_length = int(spec.get("maxLength", 200))
+            if max_length < 0:
+                return None
+            segments += [Literal(text + '"'), String(max_length)]
+        elif kind == "number" and float(spec.get("minimum", 0)) >= 0:
+            maximum = spec.get("maximum")
+            segments += [Literal(text), Number(float(maximum) if maximum is not None else None)]
+        else:
+            return None
+        text = ""
+    segments.append(Literal("}]"))
+    return JSONGrammar(segments)
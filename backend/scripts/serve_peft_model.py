@@ -3,64 +3,826 @@ Lightweight Ollama-compatible server for PEFT LoRA adapters.
 
 Loads base model + LoRA adapter via transformers/peft and exposes
 POST /api/generate with the same request/response shape as Ollama,
-so the existing LocalGemmaClient works unchanged.
+so the existing LocalGemmaClient works unchanged. GET / answers the
+client's health probe, and connections are kept alive (HTTP/1.1) so the
+client's pooled connections are reused.
+
+Requests are handled concurrently and queued; a single generation thread
+runs padded batched `generate` over whatever is waiting, up to
+--max-batch-size prompts or --max-wait-ms after the first one arrives.
+--max-batch-size 1 reproduces the old one-prompt-at-a-time behaviour
+(compare with scripts/benchmark_peft_batching.py).
+
+Prompt prefixes shared by many requests (LocalGemmaClient's fixed
+classifier rules) are encoded once: their past_key_values are cached and
+reused, so prefill only covers each summary (--prefix-min-tokens,
+--prefix-file; compare time-to-first-token with --prefix-cache both in
+the benchmark).
+
+A JSON schema in the request's `format` field (as LocalGemmaClient sends
+for classification) constrains decoding to that schema via
+json_grammar.py: only tokens that keep the output valid are allowed and
+generation stops as soon as the JSON closes.
+
+On CPU, --merge-adapter folds the LoRA weights into the base model once
+(no PEFT wrappers on the forward pass) and --quantize int8 additionally
+applies dynamic int8 quantization to the Linear layers. The merged model
+is saved under --merged-cache-dir, keyed by base model and adapter
+contents, so restarts load it directly (compare modes with
+scripts/benchmark_peft_cpu_modes.py).
+
+With --adapter NAME=PATH and/or --adapter-root, one base model serves
+several LoRA adapters: the request's `model` field picks the adapter
+("base" = none), adapters load on first use and at most
+--max-loaded-adapters stay in memory (least recently used are unloaded).
+As in Ollama, an empty prompt preloads a model, and with keep_alive 0
+unloads it; GET /api/tags lists adapters and GET /api/ps the loaded ones.
 
 Usage:
     pip install torch peft transformers accelerate
     python scripts/serve_peft_model.py \
         --base-model Qwen/Qwen2-0.5B-Instruct \
         --adapter-dir ./adapter \
-        --port 11434
+        --port 11434 --max-batch-size 8 --max-wait-ms 10
+    python scripts/serve_peft_model.py --adapter-dir ./adapter --merge-adapter --quantize int8
+    python scripts/serve_peft_model.py --adapter-dir ./adapter --adapter-root ./adapters --max-loaded-adapters 2
 """
 
 import argparse
+import copy
+import hashlib
 import json
+import os
+import queue
+import shutil
+import threading
 import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from threading import Lock
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
 
 import torch
+import transformers
 from peft import PeftModel
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoTokenizer, DynamicCache, LogitsProcessor, LogitsProcessorList
+from transformers.generation.streamers import BaseStreamer
+
+from json_grammar import JSONGrammar, compile_schema
 
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Serve PEFT LoRA model with Ollama-compatible API")
     p.add_argument("--base-model", default="Qwen/Qwen2-0.5B-Instruct", help="HuggingFace base model ID")
-    p.add_argument("--adapter-dir", default="./adapter", help="Path to PEFT adapter directory")
+    p.add_argument("--adapter-dir", default="./adapter", help="Path to PEFT adapter directory ('' = base model only)")
     p.add_argument("--host", default="127.0.0.1")
     p.add_argument("--port", type=int, default=11434)
     p.add_argument("--max-tokens", type=int, default=512)
-    return p.parse_args()
+    p.add_argument(
+        "--request-timeout", type=float, default=300.0, help="Seconds a request may wait for generation (504 after)"
+    )
+    p.add_argument("--max-batch-size", type=int, default=8, help="Prompts per generate call (1 = serial)")
+    p.add_argument("--max-wait-ms", type=float, default=10.0, help="How long a batch waits to fill after its first prompt")
+    p.add_argument(
+        "--prefix-file",
+        action="append",
+        default=[],
+        help="Text file with a prompt prefix to precompute past_key_values for (repeatable)",
+    )
+    p.add_argument(
+        "--prefix-min-tokens",
+        type=int,
+        default=64,
+        help="Auto-cache prefixes at least this long shared by consecutive prompts (0 = prefix cache off)",
+    )
+    p.add_argument("--prefix-max-entries", type=int, default=4)
+    p.add_argument("--merge-adapter", action="store_true", help="Merge the LoRA adapter into the base weights")
+    p.add_argument(
+        "--quantize",
+        choices=["none", "int8"],
+        default="none",
+        help="Dynamic int8 quantization of Linear layers (CPU only; implies --merge-adapter)",
+    )
+    p.add_argument(
+        "--adapter",
+        action="append",
+        default=[],
+        metavar="NAME=PATH",
+        help="Extra LoRA adapter selectable by the request's `model` field (repeatable)",
+    )
+    p.add_argument(
+        "--adapter-root", default="", help="Directory whose subdirectories are adapters, loaded by name on demand"
+    )
+    p.add_argument("--max-loaded-adapters", type=int, default=4, help="Adapters kept in memory (LRU)")
+    p.add_argument(
+        "--merged-cache-dir", default="./merged_models", help="Where merged models are cached ('' = no cache)"
+    )
+    args = p.parse_args()
+    for spec in args.adapter:
+        if "=" not in spec:
+            p.error(f"--adapter expects NAME=PATH, got {spec!r}")
+    if (args.adapter or args.adapter_root) and (args.merge_adapter or args.quantize != "none"):
+        p.error(
+            "--merge-adapter/--quantize bake one adapter into the weights; "
+            "they cannot be combined with --adapter/--adapter-root"
+        )
+    return args
 
 
 _model = None
 _tokenizer = None
-_lock = Lock()
+_token_texts: list[str] | None = None
 
 
-def load_model(base_model: str, adapter_dir: str):
+def load_model(
+    base_model: str,
+    adapter_dir: str,
+    merge_adapter: bool = False,
+    quantize: str = "none",
+    merged_cache_dir: str = "",
+):
     global _model, _tokenizer
 
     device = "mps" if torch.backends.mps.is_available() else ("cuda" if torch.cuda.is_available() else "cpu")
     dtype = torch.bfloat16 if device != "cpu" else torch.float32
+    if quantize != "none" and device != "cpu":
+        print(f"Dynamic {quantize} quantization is CPU-only; serving unquantized on {device}.")
+        quantize = "none"
+    merge_adapter = bool(adapter_dir) and (merge_adapter or quantize != "none")
 
     print(f"Loading base model: {base_model} (device={device}, dtype={dtype})")
     _tokenizer = AutoTokenizer.from_pretrained(base_model, use_fast=True)
     if _tokenizer.pad_token is None:
         _tokenizer.pad_token = _tokenizer.eos_token
+    # Decoder-only batching: pad on the left so every prompt ends where generation starts.
+    _tokenizer.padding_side = "left"
 
-    base = AutoModelForCausalLM.from_pretrained(
-        base_model, torch_dtype=dtype, device_map=device, low_cpu_mem_usage=True,
-    )
-    print(f"Loading LoRA adapter from: {adapter_dir}")
-    _model = PeftModel.from_pretrained(base, adapter_dir)
+    cached = None
+    if merge_adapter and merged_cache_dir:
+        cached = Path(merged_cache_dir) / merged_model_key(base_model, adapter_dir, dtype)
+    if cached is not None and (cached / "config.json").exists():
+        print(f"Loading merged model from cache: {cached}")
+        _model = AutoModelForCausalLM.from_pretrained(
+            cached, torch_dtype=dtype, device_map=device, low_cpu_mem_usage=True,
+        )
+    else:
+        base = AutoModelForCausalLM.from_pretrained(
+            base_model, torch_dtype=dtype, device_map=device, low_cpu_mem_usage=True,
+        )
+        if adapter_dir:
+            print(f"Loading LoRA adapter from: {adapter_dir}")
+            _model = PeftModel.from_pretrained(base, adapter_dir)
+        else:
+            _model = base
+        if merge_adapter:
+            print("Merging LoRA adapter into the base weights.")
+            _model = _model.merge_and_unload()
+            if cached is not None:
+                save_merged_model(_model, cached)
+
+    if quantize == "int8":
+        print("Applying dynamic int8 quantization to Linear layers.")
+        _model = torch.ao.quantization.quantize_dynamic(_model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
     _model.eval()
     print("Model ready.")
 
 
+def merged_model_key(base_model: str, adapter_dir: str, dtype: torch.dtype) -> str:
+    """Directory name for a merged model: changes with the base model, adapter files, dtype or library versions."""
+    digest = hashlib.sha256()
+    for part in (base_model, str(dtype), torch.__version__, transformers.__version__):
+        digest.update(part.encode("utf-8") + b"\0")
+    for path in sorted(Path(adapter_dir).glob("adapter_*")):
+        digest.update(path.name.encode("utf-8") + b"\0")
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def save_merged_model(model, target: Path) -> None:
+    # Write next to the target and rename, so an interrupted save never looks like a cached model.
+    tmp = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+    try:
+        model.save_pretrained(tmp)
+        if target.exists():
+            shutil.rmtree(target)
+        tmp.rename(target)
+        print(f"Saved merged model to {target}")
+    except OSError as exc:
+        print(f"[serve] Could not cache merged model: {exc}")
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+class PrefixCache:
+    """
+    past_key_values for token prefixes shared by many prompts (e.g. the fixed
+    classifier rules in front of every LocalGemmaClient summary), so prefill
+    only covers each prompt's varying suffix. Prefixes are registered up front
+    (--prefix-file) or detected when two consecutive prompts share at least
+    `min_tokens` leading tokens; at most `max_entries` are kept (LRU). The
+    cache is built per adapter (None = no adapter), since LoRA weights change
+    the keys and values; an unloaded adapter's caches are dropped.
+    """
+
+    def __init__(self, min_tokens: int, max_entries: int) -> None:
+        self.min_tokens = max(1, min_tokens)
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[tuple[int, ...], dict[str | None, DynamicCache]] = OrderedDict()
+        self._last_ids: list[int] | None = None
+        # Reentrant: match() registers detected prefixes.
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "prefixes_built": 0, "prefill_tokens_saved": 0}
+
+    def register(self, ids: list[int]) -> None:
+        if len(ids) >= self.min_tokens:
+            with self._lock:
+                self._entries.setdefault(tuple(ids), {})
+                self._trim()
+
+    def match(self, ids: list[int]) -> tuple[int, ...]:
+        """Longest cached prefix of `ids` that still leaves a token to prefill; () if none."""
+        with self._lock:
+            best: tuple[int, ...] = ()
+            for prefix in self._entries:
+                if len(best) < len(prefix) < len(ids) and tuple(ids[: len(prefix)]) == prefix:
+                    best = prefix
+            if not best and self._last_ids is not None:
+                common = 0
+                for a, b in zip(self._last_ids, ids):
+                    if a != b:
+                        break
+                    common += 1
+                common = min(common, len(ids) - 1)
+                if common >= self.min_tokens:
+                    best = tuple(ids[:common])
+                    self.register(list(best))
+            self._last_ids = ids
+            if best:
+                self._entries.move_to_end(best)
+                self._stats["hits"] += 1
+                self._stats["prefill_tokens_saved"] += len(best)
+            else:
+                self._stats["misses"] += 1
+            return best
+
+    def kv_for(self, prefix: tuple[int, ...], adapter: str | None = None) -> DynamicCache:
+        """
+        The prefix's cache for batch size 1 under the currently active adapter,
+        computed on first use. Callers must not mutate it.
+        """
+        with self._lock:
+            kv = self._entries.get(prefix, {}).get(adapter)
+            if kv is None:
+                with torch.no_grad():
+                    out = _model(
+                        input_ids=torch.tensor([prefix], device=_model.device),
+                        past_key_values=DynamicCache(),
+                        use_cache=True,
+                    )
+                kv = out.past_key_values
+                self._entries.setdefault(prefix, {})[adapter] = kv
+                self._trim()
+                self._stats["prefixes_built"] += 1
+            return kv
+
+    def drop_adapter(self, adapter: str | None) -> None:
+        with self._lock:
+            for caches in self._entries.values():
+                caches.pop(adapter, None)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "prefixes": len(self._entries),
+                "kv_caches": sum(len(caches) for caches in self._entries.values()),
+            }
+
+    def _trim(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class AdapterRegistry:
+    """
+    LoRA adapters sharing the one loaded base model, chosen per request by
+    the Ollama `model` field. Adapters come from --adapter NAME=PATH, the
+    --adapter-dir adapter ("default") and subdirectories of --adapter-root
+    (looked up by name, so new adapters can be dropped in without a
+    restart). They are loaded on first use; past `max_loaded`, the least
+    recently used other adapter is unloaded. "base" or the base model ID
+    selects the base model with adapters disabled, and any other unknown
+    name falls back to the default adapter (or the base model without one).
+    Loading, unloading and generation are serialized by one lock, held by
+    the generation thread for each batch.
+    """
+
+    base_name = "base"
+
+    def __init__(
+        self,
+        base_model: str,
+        paths: dict[str, str],
+        root: str,
+        max_loaded: int,
+        prefix_cache: PrefixCache | None = None,
+    ) -> None:
+        self.base_model = base_model
+        self.paths = dict(paths)
+        self.root = Path(root) if root else None
+        self.max_loaded = max(1, max_loaded)
+        self.prefix_cache = prefix_cache
+        self.default = "default" if "default" in self.paths else None
+        # load_model() already attached --adapter-dir as PEFT's "default" adapter.
+        self._loaded: OrderedDict[str, None] = OrderedDict()
+        if self.default is not None and isinstance(_model, PeftModel):
+            self._loaded[self.default] = None
+        self._names_lock = threading.Lock()
+        self._model_lock = threading.RLock()
+        self._stats = {"loads": 0, "unloads": 0, "evictions": 0, "unknown_model_requests": 0}
+
+    def resolve(self, model_name: str | None) -> str | None:
+        """Adapter name for a request's `model` field; None = base model."""
+        if model_name in (self.base_name, self.base_model):
+            return None
+        with self._names_lock:
+            if model_name in self.paths:
+                return model_name
+            if model_name and self.root is not None and "/" not in model_name and model_name not in (".", ".."):
+                candidate = self.root / model_name
+                if (candidate / "adapter_config.json").exists():
+                    self.paths[model_name] = str(candidate)
+                    return model_name
+            if model_name:
+                self._stats["unknown_model_requests"] += 1
+            return self.default
+
+    @contextmanager
+    def use(self, name: str | None):
+        """Holds the model lock with `name` active (loading it if needed) or adapters disabled."""
+        with self._model_lock:
+            if name is None:
+                if isinstance(_model, PeftModel):
+                    with _model.disable_adapter():
+                        yield
+                else:
+                    yield
+                return
+            self.load(name)
+            _model.set_adapter(self._peft_name(name), inference_mode=True)
+            yield
+
+    def load(self, name: str) -> None:
+        global _model
+        with self._model_lock:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                return
+            path = self.paths[name]
+            print(f"Loading LoRA adapter {name!r} from: {path}")
+            if isinstance(_model, PeftModel):
+                _model.load_adapter(path, adapter_name=self._peft_name(name))
+            else:
+                _model = PeftModel.from_pretrained(_model, path, adapter_name=self._peft_name(name))
+            _model.eval()
+            self._loaded[name] = None
+            with self._names_lock:
+                self._stats["loads"] += 1
+            while len(self._loaded) > self.max_loaded:
+                self._unload(next(iter(self._loaded)))
+                with self._names_lock:
+                    self._stats["evictions"] += 1
+
+    def unload(self, name: str) -> bool:
+        with self._model_lock:
+            if name not in self._loaded or len(self._loaded) == 1:
+                # PEFT keeps at least one adapter attached; the last one stays loaded.
+                return False
+            self._unload(name)
+            return True
+
+    def known(self) -> list[str]:
+        with self._names_lock:
+            names = set(self.paths)
+        if self.root is not None and self.root.is_dir():
+            names.update(p.parent.name for p in self.root.glob("*/adapter_config.json"))
+        return sorted(names)
+
+    def loaded(self) -> list[str]:
+        with self._model_lock:
+            return list(self._loaded)
+
+    def metrics(self) -> dict:
+        with self._names_lock:
+            stats = dict(self._stats)
+        return {**stats, "loaded": self.loaded(), "max_loaded": self.max_loaded}
+
+    def _unload(self, name: str) -> None:
+        print(f"Unloading LoRA adapter {name!r}")
+        _model.delete_adapter(self._peft_name(name))
+        del self._loaded[name]
+        if self.prefix_cache is not None:
+            self.prefix_cache.drop_adapter(name)
+        with self._names_lock:
+            self._stats["unloads"] += 1
+
+    @staticmethod
+    def _peft_name(name: str) -> str:
+        # PEFT stores adapters in ModuleDicts, whose keys cannot contain ".".
+        return name.replace(".", "_")
+
+
+def _batched_cache(kv: DynamicCache, batch_size: int) -> DynamicCache:
+    """A private copy for one generate call (generate appends to it), repeated per batch row."""
+    cache = copy.deepcopy(kv)
+    if batch_size > 1:
+        cache.batch_repeat_interleave(batch_size)
+    return cache
+
+
+class _FirstTokenTimer(BaseStreamer):
+    """generate() streams the prompt first, then each new token; the second put marks time-to-first-token."""
+
+    def __init__(self) -> None:
+        self.puts = 0
+        self.first_token_at: float | None = None
+
+    def put(self, value) -> None:
+        self.puts += 1
+        if self.puts == 2:
+            self.first_token_at = time.perf_counter()
+
+    def end(self) -> None:
+        pass
+
+
+def token_texts() -> list[str]:
+    """Text each token id adds when appended to other text ("" for special and partial-byte tokens)."""
+    global _token_texts
+    if _token_texts is None:
+        # Decoding after an anchor keeps leading spaces that single-token decode strips (SentencePiece).
+        anchor = _tokenizer("a", add_special_tokens=False)["input_ids"]
+        anchor_text = _tokenizer.decode(anchor)
+        special = set(_tokenizer.all_special_ids)
+        texts = []
+        for token_id in range(len(_tokenizer)):
+            text = "" if token_id in special else _tokenizer.decode(anchor + [token_id])
+            texts.append(text[len(anchor_text):] if text.startswith(anchor_text) and "\ufffd" not in text else "")
+        _token_texts = texts
+    return _token_texts
+
+
+class JSONConstraint(LogitsProcessor):
+    """
+    Per-row grammar state over one generate call: each step allows only
+    tokens whose text keeps the output inside the schema grammar and forces
+    EOS as soon as the JSON is complete. The best few candidates are checked
+    first; a full vocabulary scan runs only when none of them fit, and its
+    result is memoized per grammar state.
+    """
+
+    top_k = 32
+    memo_limit = 4096
+
+    def __init__(self, grammar: JSONGrammar, memo: dict, batch_size: int, prompt_width: int) -> None:
+        self.grammar = grammar
+        self.memo = memo
+        self.prompt_width = prompt_width
+        self.states = [grammar.start()] * batch_size
+        self.texts = token_texts()
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        if input_ids.shape[1] > self.prompt_width:
+            for row, token_id in enumerate(input_ids[:, -1].tolist()):
+                state = self.states[row]
+                if state is not None and not self.grammar.is_done(state):
+                    text = self.texts[token_id] if token_id < len(self.texts) else ""
+                    self.states[row] = self.grammar.feed(state, text) if text else None
+        mask = torch.full_like(scores, float("-inf"))
+        for row, state in enumerate(self.states):
+            mask[row, self._allowed(state, scores[row])] = 0.0
+        return scores + mask
+
+    def completed(self) -> int:
+        return sum(1 for state in self.states if state is not None and self.grammar.is_done(state))
+
+    def _allowed(self, state, row_scores: torch.Tensor) -> list[int]:
+        if state is None or self.grammar.is_done(state):
+            return [_tokenizer.eos_token_id]
+        candidates = torch.topk(row_scores, min(self.top_k, row_scores.shape[-1])).indices.tolist()
+        allowed = [t for t in candidates if self._fits(state, t)]
+        if allowed:
+            return allowed
+        key = self.grammar.memo_key(state)
+        allowed = self.memo.get(key)
+        if allowed is None:
+            allowed = [t for t in range(len(self.texts)) if self._fits(state, t)] or [_tokenizer.eos_token_id]
+            if len(self.memo) < self.memo_limit:
+                self.memo[key] = allowed
+        return allowed
+
+    def _fits(self, state, token_id: int) -> bool:
+        text = self.texts[token_id] if token_id < len(self.texts) else ""
+        return bool(text) and self.grammar.feed(state, text) is not None
+
+
+class GenerationRequest:
+    __slots__ = (
+        "prompt", "temperature", "max_tokens", "json_schema", "model", "future", "enqueued_at",
+        "input_ids", "prefix", "grammar_key", "adapter", "timings",
+    )
+
+    def __init__(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        json_schema: dict | None = None,
+        model: str | None = None,
+    ) -> None:
+        self.prompt = prompt
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.json_schema = json_schema
+        self.model = model
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+        self.input_ids: list[int] | None = None
+        self.prefix: tuple[int, ...] = ()
+        self.grammar_key: str | None = None
+        self.adapter: str | None = None
+        # Ollama's timing fields (nanoseconds) once generated.
+        self.timings: dict[str, int] = {}
+
+
+def _resolve(future: Future, result=None, exc: BaseException | None = None) -> None:
+    """Completes a request's Future unless its handler already cancelled it."""
+    try:
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class GenerationBatcher:
+    """
+    Single generation thread fed by a queue. Each step takes the oldest
+    request, waits up to `max_wait_ms` for more with the same sampling mode
+    (greedy vs. a given temperature) and cached prefix, and runs them as one
+    padded `generate`; every caller's Future gets its own decoded text, cut
+    to its own max_tokens. With a PrefixCache, rows start from the shared
+    prefix's past_key_values and pad between prefix and suffix. Requests
+    with a supported JSON schema (Ollama's `format`) share batches only with
+    the same schema and are decoded under its grammar. With an
+    AdapterRegistry, each batch runs under the one adapter its requests'
+    `model` selects.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int,
+        max_wait_ms: float,
+        prefix_cache: PrefixCache | None = None,
+        adapters: AdapterRegistry | None = None,
+    ) -> None:
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self.prefix_cache = prefix_cache
+        self.adapters = adapters
+        self._queue: queue.Queue[GenerationRequest] = queue.Queue()
+        self._deferred: list[GenerationRequest] = []
+        self._lock = threading.Lock()
+        self._grammars: dict[str, tuple[JSONGrammar, dict]] = {}
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "generated_tokens": 0,
+            "prefill_tokens": 0,
+            "ttft_ms_total": 0.0,
+            "constrained_requests": 0,
+            "constrained_completed": 0,
+        }
+        self._thread = threading.Thread(target=self._loop, name="generation", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        json_schema: dict | None = None,
+        model: str | None = None,
+    ) -> Future:
+        return self.enqueue(GenerationRequest(prompt, temperature, max_tokens, json_schema, model)).future
+
+    def enqueue(self, request: GenerationRequest) -> GenerationRequest:
+        self._queue.put(request)
+        return request
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        batches = stats.pop("batches")
+        ttft_total = stats.pop("ttft_ms_total")
+        stats["batches"] = batches
+        stats["mean_batch_size"] = stats["requests"] / batches if batches else 0.0
+        stats["mean_ttft_ms"] = ttft_total / batches if batches else 0.0
+        if self.prefix_cache is not None:
+            stats["prefix_cache"] = self.prefix_cache.metrics()
+        if self.adapters is not None:
+            stats["adapters"] = self.adapters.metrics()
+        return stats
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                texts, generated, prefill, ttft_ms, completed = self._generate(batch)
+            except Exception as exc:
+                for request in batch:
+                    _resolve(request.future, exc=exc)
+                continue
+            for request, text in zip(batch, texts):
+                _resolve(request.future, text)
+            with self._lock:
+                self._stats["requests"] += len(batch)
+                self._stats["batches"] += 1
+                self._stats["generated_tokens"] += generated
+                self._stats["prefill_tokens"] += prefill
+                self._stats["ttft_ms_total"] += ttft_ms
+                if batch[0].grammar_key is not None:
+                    self._stats["constrained_requests"] += len(batch)
+                    self._stats["constrained_completed"] += completed
+
+    def _next_batch(self) -> list[GenerationRequest]:
+        if self._deferred:
+            first = self._deferred.pop(0)
+        else:
+            first = self._queue.get()
+            while not self._prepare(first):
+                first = self._queue.get()
+        key = self._batch_key(first)
+        batch = [first]
+        # Requests set aside by an earlier step join first if they are compatible.
+        for request in list(self._deferred):
+            if len(batch) < self.max_batch_size and self._batch_key(request) == key:
+                self._deferred.remove(request)
+                batch.append(request)
+
+        deadline = first.enqueued_at + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if not self._prepare(request):
+                continue
+            if self._batch_key(request) == key:
+                batch.append(request)
+            else:
+                self._deferred.append(request)
+        return batch
+
+    def _prepare(self, request: GenerationRequest) -> bool:
+        """Tokenizes and keys one request; on bad input only that request fails (returns False)."""
+        if request.future.cancelled():
+            # The handler gave up waiting (--request-timeout).
+            return False
+        try:
+            self._prepare_request(request)
+        except Exception as exc:
+            _resolve(request.future, exc=exc)
+            return False
+        return True
+
+    def _prepare_request(self, request: GenerationRequest) -> None:
+        request.temperature = float(request.temperature)
+        request.max_tokens = int(request.max_tokens)
+        request.input_ids = _tokenizer(request.prompt)["input_ids"]
+        if self.adapters is not None:
+            request.adapter = self.adapters.resolve(request.model)
+        if self.prefix_cache is not None:
+            request.prefix = self.prefix_cache.match(request.input_ids)
+        if request.json_schema is not None:
+            key = json.dumps(request.json_schema)
+            if key not in self._grammars:
+                grammar = compile_schema(request.json_schema)
+                if grammar is None:
+                    print("[serve] Unsupported JSON schema in format; generating unconstrained.")
+                self._grammars[key] = (grammar, {})
+            if self._grammars[key][0] is not None:
+                request.grammar_key = key
+
+    @staticmethod
+    def _sampling_mode(request: GenerationRequest) -> float:
+        return float(request.temperature) if request.temperature > 0 else 0.0
+
+    @staticmethod
+    def _batch_key(request: GenerationRequest) -> tuple:
+        return GenerationBatcher._sampling_mode(request), request.prefix, request.grammar_key, request.adapter
+
+    def _generate(self, batch: list[GenerationRequest]) -> tuple[list[str], int, int, float, int]:
+        if self.adapters is None:
+            return self._generate_batch(batch)
+        with self.adapters.use(batch[0].adapter):
+            return self._generate_batch(batch)
+
+    def _generate_batch(self, batch: list[GenerationRequest]) -> tuple[list[str], int, int, float, int]:
+        """Returns (texts, generated tokens, prefill tokens, time-to-first-token ms, completed JSON rows)."""
+        prefix = list(batch[0].prefix)
+        suffixes = [r.input_ids[len(prefix):] for r in batch]
+        width = max(len(suffix) for suffix in suffixes)
+        pad = _tokenizer.pad_token_id
+        # [prefix][pad...][suffix]: with no prefix this is ordinary left padding.
+        input_ids = torch.tensor(
+            [prefix + [pad] * (width - len(suffix)) + suffix for suffix in suffixes], device=_model.device
+        )
+        attention_mask = torch.tensor(
+            [[1] * len(prefix) + [0] * (width - len(suffix)) + [1] * len(suffix) for suffix in suffixes],
+            device=_model.device,
+        )
+        temperature = self._sampling_mode(batch[0])
+        t0 = time.perf_counter()
+
+        gen_kwargs = dict(
+            max_new_tokens=max(r.max_tokens for r in batch),
+            do_sample=temperature > 0,
+            pad_token_id=pad,
+        )
+        if temperature > 0:
+            gen_kwargs["temperature"] = temperature
+        if prefix:
+            gen_kwargs["past_key_values"] = _batched_cache(
+                self.prefix_cache.kv_for(batch[0].prefix, batch[0].adapter), len(batch)
+            )
+
+        constraint = None
+        if batch[0].grammar_key is not None:
+            grammar, memo = self._grammars[batch[0].grammar_key]
+            constraint = JSONConstraint(grammar, memo, len(batch), input_ids.shape[1])
+            gen_kwargs["logits_processor"] = LogitsProcessorList([constraint])
+
+        timer = _FirstTokenTimer()
+        with torch.no_grad():
+            output_ids = _model.generate(
+                input_ids=input_ids, attention_mask=attention_mask, streamer=timer, **gen_kwargs
+            )
+
+        new_tokens = output_ids[:, input_ids.shape[1]:]
+        texts = [
+            _tokenizer.decode(row[: r.max_tokens], skip_special_tokens=True)
+            for row, r in zip(new_tokens, batch)
+        ]
+        generated = int((new_tokens != pad).sum())
+        prefill = sum(len(suffix) for suffix in suffixes)
+        ttft_ms = ((timer.first_token_at or time.perf_counter()) - t0) * 1000.0
+        elapsed = time.perf_counter() - t0
+        completed = constraint.completed() if constraint is not None else 0
+        done = time.perf_counter()
+        for row, request in zip(new_tokens, batch):
+            request.timings = {
+                "total_duration": int((done - request.enqueued_at) * 1e9),
+                "prompt_eval_count": len(request.input_ids),
+                "prompt_eval_duration": int(ttft_ms * 1e6),
+                "eval_count": int((row[: request.max_tokens] != pad).sum()),
+                "eval_duration": int(max(0.0, elapsed - ttft_ms / 1000.0) * 1e9),
+            }
+        label = f"[{batch[0].adapter or AdapterRegistry.base_name}] " if self.adapters is not None else ""
+        print(
+            f"{label}Generated {generated} tokens for {len(batch)} prompt(s) in {elapsed:.2f}s "
+            f"(prefill {prefill} tokens, {len(prefix)} cached; first token {ttft_ms:.0f}ms"
+            + (f"; {completed}/{len(batch)} schema-complete)" if constraint is not None else ")")
+        )
+        return texts, generated, prefill, ttft_ms, completed
+
+
 class OllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle + delayed ACK add ~40ms per keep-alive response.
+    disable_nagle_algorithm = True
     max_tokens = 512
+    request_timeout = 300.0
+    batcher: GenerationBatcher | None = None
+
+    def do_GET(self):
+        if self.path == "/":
+            self._send(200 if _model is not None else 503, b"PEFT server is running", "text/plain")
+        elif self.path == "/api/tags" and self.batcher.adapters is not None:
+            adapters = self.batcher.adapters
+            names = [AdapterRegistry.base_name] + adapters.known()
+            self._send_json({"models": [{"name": name, "model": name} for name in names]})
+        elif self.path == "/api/ps" and self.batcher.adapters is not None:
+            adapters = self.batcher.adapters
+            self._send_json({
+                "models": [{"name": name, "model": name} for name in adapters.loaded()],
+                "adapters": adapters.metrics(),
+            })
+        else:
+            self.send_error(404)
 
     def do_POST(self):
         if self.path != "/api/generate":
@@ -71,45 +833,56 @@ class OllamaHandler(BaseHTTPRequestHandler):
         body = json.loads(self.rfile.read(length)) if length else {}
 
         prompt = body.get("prompt", "")
+        model = body.get("model")
+        adapters = self.batcher.adapters
+        if not prompt and adapters is not None:
+            # Ollama semantics: an empty prompt loads the model, and with keep_alive 0 unloads it.
+            name = adapters.resolve(model)
+            if name is not None and body.get("keep_alive") in (0, "0", "0s"):
+                done_reason = "unload" if adapters.unload(name) else "unload_skipped"
+            else:
+                if name is not None:
+                    adapters.load(name)
+                done_reason = "load"
+            self._send_json({"model": model or "peft-local", "response": "", "done": True, "done_reason": done_reason})
+            return
+
         temperature = body.get("options", {}).get("temperature", 0.1)
         max_tokens = body.get("options", {}).get("num_predict", self.max_tokens)
 
-        with _lock:
-            response_text = self._generate(prompt, temperature, max_tokens)
+        # Ollama-style structured output: a JSON schema in `format` constrains decoding.
+        json_schema = body.get("format") if isinstance(body.get("format"), dict) else None
+
+        request = self.batcher.enqueue(GenerationRequest(prompt, temperature, max_tokens, json_schema, model))
+        try:
+            response_text = request.future.result(timeout=self.request_timeout)
+        except FutureTimeoutError:
+            # Drops it from the queue if generation has not picked it up yet.
+            request.future.cancel()
+            self._send_json({"error": "generation timed out"}, status=504)
+            return
+        except Exception as exc:
+            self._send_json({"error": f"{exc.__class__.__name__}: {exc}"}, status=500)
+            return
 
-        payload = json.dumps({
-            "model": body.get("model", "peft-local"),
+        # Never streams; the timing fields let clients derive time-to-first-token (total - eval_duration).
+        self._send_json({
+            "model": model or "peft-local",
             "response": response_text,
             "done": True,
-        }).encode()
+            **request.timings,
+        })
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        self._send(status, json.dumps(payload).encode(), "application/json")
 
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
+    def _send(self, status: int, payload: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
         self.send_header("Content-Length", str(len(payload)))
         self.end_headers()
         self.wfile.write(payload)
 
-    def _generate(self, prompt: str, temperature: float, max_tokens: int) -> str:
-        inputs = _tokenizer(prompt, return_tensors="pt").to(_model.device)
-        t0 = time.perf_counter()
-
-        gen_kwargs = dict(
-            max_new_tokens=max_tokens,
-            do_sample=temperature > 0,
-            pad_token_id=_tokenizer.pad_token_id,
-        )
-        if temperature > 0:
-            gen_kwargs["temperature"] = temperature
-
-        with torch.no_grad():
-            output_ids = _model.generate(**inputs, **gen_kwargs)
-
-        new_tokens = output_ids[0][inputs["input_ids"].shape[1]:]
-        text = _tokenizer.decode(new_tokens, skip_special_tokens=True)
-        elapsed = time.perf_counter() - t0
-        print(f"Generated {len(new_tokens)} tokens in {elapsed:.2f}s")
-        return text
-
     def log_message(self, fmt, *args):
         print(f"[serve] {fmt % args}")
 
@@ -117,10 +890,31 @@ class OllamaHandler(BaseHTTPRequestHandler):
 def main():
     args = parse_args()
     OllamaHandler.max_tokens = args.max_tokens
-    load_model(args.base_model, args.adapter_dir)
+    OllamaHandler.request_timeout = args.request_timeout
+    load_model(args.base_model, args.adapter_dir, args.merge_adapter, args.quantize, args.merged_cache_dir)
+    prefix_cache = None
+    if args.prefix_min_tokens > 0:
+        prefix_cache = PrefixCache(args.prefix_min_tokens, args.prefix_max_entries)
+        for path in args.prefix_file:
+            ids = _tokenizer(Path(path).read_text(encoding="utf-8"))["input_ids"]
+            # Drop the last token: it may merge with the suffix when the full prompt is tokenized.
+            prefix_cache.register(ids[:-1])
+    adapters = None
+    if args.adapter or args.adapter_root:
+        paths = dict(spec.split("=", 1) for spec in args.adapter)
+        if args.adapter_dir:
+            paths["default"] = args.adapter_dir
+        adapters = AdapterRegistry(args.base_model, paths, args.adapter_root, args.max_loaded_adapters, prefix_cache)
+        print(f"Adapters: {', '.join(adapters.known()) or '(none yet)'} (max {args.max_loaded_adapters} loaded)")
+    OllamaHandler.batcher = GenerationBatcher(args.max_batch_size, args.max_wait_ms, prefix_cache, adapters)
 
-    server = HTTPServer((args.host, args.port), OllamaHandler)
-    print(f"Serving on http://{args.host}:{args.port}/api/generate")
+    # Threaded so concurrent requests can queue for the same batch (and idle keep-alive
+    # connections do not block other clients).
+    server = ThreadingHTTPServer((args.host, args.port), OllamaHandler)
+    print(
+        f"Serving on http://{args.host}:{args.port}/api/generate "
+        f"(max_batch_size={args.max_batch_size}, max_wait_ms={args.max_wait_ms})"
+    )
     try:
         server.serve_forever()
     except KeyboardInterrupt:
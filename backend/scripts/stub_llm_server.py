@@ -0,0 +1,196 @@
+"""
+Stub Ollama-compatible /api/generate endpoint for exercising the LLM
+serving path without a model (CPU-only machines, CI, load tests).
+
+It answers LocalGemmaClient-style prompts with a valid incident JSON array
+(the type follows the fast-detector probabilities in the summary) after a
+simulated delay: prefill time per prompt token, then decode time per
+output token. Only --slots requests generate at once; the rest queue, so
+latency under concurrency behaves like a single-model server. Streaming
+(`"stream": true`, NDJSON chunks) and Ollama's timing fields are supported,
+and --error-rate makes a fraction of requests fail with HTTP 500.
+
+Usage (from backend/):
+    python scripts/stub_llm_server.py --port 11434 --decode-ms 15 --slots 1
+    python scripts/benchmark_llm_endpoint.py --stub
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Rough characters per token for prompt/response token counts.
+CHARS_PER_TOKEN = 4
+
+EVIDENCE = {
+    "shoplifting": (
+        "Item concealed near the shelf, then the person moves toward the exit.",
+        "Alert staff to review the aisle camera.",
+    ),
+    "suspicious_activity": (
+        "Repeated loitering and handling of items without purchase.",
+        "Keep monitoring and notify the floor team.",
+    ),
+    "violent_activity": ("Rapid aggressive motion between two people.", "Dispatch security immediately."),
+    "none": ("Normal browsing and movement.", "Continue monitoring."),
+}
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Stub Ollama-compatible LLM endpoint")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=11434)
+    p.add_argument("--prefill-ms", type=float, default=0.5, help="Simulated prefill time per prompt token")
+    p.add_argument("--decode-ms", type=float, default=15.0, help="Simulated time per generated token")
+    p.add_argument("--slots", type=int, default=1, help="Requests generated concurrently")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    return p.parse_args()
+
+
+class StubModel:
+    def __init__(self, prefill_ms: float, decode_ms: float, slots: int, error_rate: float = 0.0, seed: int = 0) -> None:
+        self.prefill_s = max(0.0, prefill_ms) / 1000.0
+        self.decode_s = max(0.0, decode_ms) / 1000.0
+        self.error_rate = error_rate
+        self._slots = threading.Semaphore(max(1, slots))
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def should_fail(self) -> bool:
+        with self._rng_lock:
+            return self._rng.random() < self.error_rate
+
+    def generate(self, prompt: str, max_tokens: int):
+        """Yields the answer a token at a time; blocks while all slots are busy."""
+        text = self.answer(prompt)
+        tokens = [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)][: max(1, max_tokens)]
+        with self._slots:
+            time.sleep(self.prefill_s * (len(prompt) // CHARS_PER_TOKEN))
+            for token in tokens:
+                time.sleep(self.decode_s)
+                yield token
+
+    @staticmethod
+    def answer(prompt: str) -> str:
+        incident_type, confidence = "none", 0.6
+        match = re.search(r"Fast detector probs: (\{.*?\})\.", prompt, re.DOTALL)
+        if match:
+            try:
+                probs = json.loads(match.group(1))
+                incident_type = max(probs, key=probs.get)
+                confidence = round(float(probs[incident_type]), 2)
+            except (ValueError, TypeError):
+                pass
+        evidence, action = EVIDENCE.get(incident_type, EVIDENCE["none"])
+        return json.dumps([{
+            "incident_type": incident_type,
+            "confidence": confidence,
+            "timestamp_seconds": 1.0,
+            "evidence": evidence,
+            "recommended_action": action,
+        }])
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    model: StubModel | None = None
+
+    def do_GET(self):
+        if self.path != "/":
+            self.send_error(404)
+            return
+        self._send_json(200, {"status": "stub"})
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length)) if length else {}
+        if self.model.should_fail():
+            self._send_json(500, {"error": "stub failure"})
+            return
+
+        prompt = str(body.get("prompt", ""))
+        max_tokens = int(body.get("options", {}).get("num_predict", 256))
+        name = body.get("model", "stub")
+        start = time.perf_counter()
+        first_at = None
+        chunks = []
+        # Ollama streams unless "stream" is false.
+        streaming = body.get("stream", True) is not False
+        if streaming:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+        for chunk in self.model.generate(prompt, max_tokens):
+            first_at = first_at or time.perf_counter()
+            chunks.append(chunk)
+            if streaming:
+                self._write_chunk({"model": name, "response": chunk, "done": False})
+        end = time.perf_counter()
+        first_at = first_at or end
+        final = {
+            "model": name,
+            "response": "" if streaming else "".join(chunks),
+            "done": True,
+            "total_duration": int((end - start) * 1e9),
+            "prompt_eval_count": len(prompt) // CHARS_PER_TOKEN,
+            "prompt_eval_duration": int((first_at - start) * 1e9),
+            "eval_count": len(chunks),
+            "eval_duration": int((end - first_at) * 1e9),
+        }
+        if streaming:
+            self._write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self._send_json(200, final)
+
+    def _write_chunk(self, payload: dict) -> None:
+        data = json.dumps(payload).encode() + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, **model_kwargs) -> ThreadingHTTPServer:
+    """Serves in a daemon thread; port 0 picks a free port (server.server_address[1])."""
+    handler = type("BoundStubHandler", (StubHandler,), {"model": StubModel(**model_kwargs)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True).start()
+    return server
+
+
+def main():
+    args = parse_args()
+    server = start_stub_server(
+        args.host, args.port,
+        prefill_ms=args.prefill_ms, decode_ms=args.decode_ms, slots=args.slots, error_rate=args.error_rate,
+    )
+    print(f"Stub LLM serving on http://{args.host}:{server.server_address[1]}/api/generate")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ export type ResultData = {
   summary: string
   insights: string[]
   videoName?: string
+  /** Deferred LLM evidence: 'pending' while the backend is still generating it. */
+  enrichmentState?: 'not_needed' | 'pending' | 'done' | 'failed'
 }
 
 type ResultCardProps = {
@@ -78,6 +80,12 @@ export function ResultCard({ data }: ResultCardProps) {
               · {data.videoName}
             </span>
           )}
+          {data.enrichmentState === 'pending' && (
+            <span className="ml-2 text-xs font-normal text-amber-400 animate-pulse">Adding LLM evidence…</span>
+          )}
+          {data.enrichmentState === 'failed' && (
+            <span className="ml-2 text-xs font-normal text-neutral-500">LLM evidence unavailable</span>
+          )}
         </h3>
         <CopyButton text={fullText} />
       </div>
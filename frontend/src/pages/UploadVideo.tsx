@@ -16,6 +16,7 @@ type ApiIncident = {
   incident_type: string
   confidence: number
   timestamp_seconds: number
+  end_timestamp_seconds?: number | null
   evidence: string
   recommended_action: string
 }
@@ -28,6 +29,15 @@ type ApiReport = {
   met_latency_target: boolean
   summary: string
   incidents: ApiIncident[]
+  degraded?: boolean
+  enrichment_state?: 'not_needed' | 'pending' | 'done' | 'failed'
+  coverage?: {
+    mode: string
+    span_fraction: number
+    sampled_fraction: number
+    downscale_min: number
+    degraded_reasons: string[]
+  } | null
   raw_signals?: {
     latency?: {
       p95_ms?: number
@@ -37,13 +47,48 @@ type ApiReport = {
   }
 }
 
+type ApiJob = {
+  job_id: string
+  state: 'queued' | 'running' | 'succeeded' | 'failed'
+  stage: string
+  progress: number
+  report?: ApiReport | null
+  error?: string | null
+}
+
+const JOB_POLL_INTERVAL_MS = 1000
+
+async function waitForJob(jobId: string): Promise<ApiReport> {
+  for (;;) {
+    const res = await fetch(`${API_BASE}/api/v1/jobs/${jobId}`)
+    const job = (await res.json()) as ApiJob & { detail?: string }
+    if (!res.ok) throw new Error(job.detail || 'Could not load analysis job')
+    if (job.state === 'succeeded' && job.report) return job.report
+    if (job.state === 'failed') throw new Error(job.error || 'Analysis failed')
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+  }
+}
+
+/** Push updates for a report until deferred LLM enrichment settles; returns a cleanup function. */
+function watchEnrichment(reportId: string, onReport: (report: ApiReport) => void): () => void {
+  const source = new EventSource(`${API_BASE}/api/v1/reports/${reportId}/events`)
+  source.addEventListener('report', (event) => {
+    const report = JSON.parse((event as MessageEvent<string>).data) as ApiReport
+    onReport(report)
+    if (report.enrichment_state !== 'pending') source.close()
+  })
+  return () => source.close()
+}
+
 function reportToResult(report: ApiReport): ResultData {
   const incidentLines = report.incidents
     .filter((x) => x.incident_type !== 'none')
     .slice(0, 4)
     .map(
       (x) =>
-        `${x.incident_type} (${Math.round(x.confidence * 100)}%) at ${x.timestamp_seconds.toFixed(1)}s: ${x.evidence}`,
+        `${x.incident_type} (${Math.round(x.confidence * 100)}%) at ${x.timestamp_seconds.toFixed(1)}s${
+          x.end_timestamp_seconds != null ? `–${x.end_timestamp_seconds.toFixed(1)}s` : ''
+        }: ${x.evidence}`,
     )
 
   const latency = report.raw_signals?.latency
@@ -51,12 +96,23 @@ function reportToResult(report: ApiReport): ResultData {
     ? `Frame latency p95 ${Number(latency.p95_ms || 0).toFixed(1)}ms, max ${Number(latency.max_ms || 0).toFixed(1)}ms, violations ${latency.violations || 0}.`
     : `Upload analysis latency ${report.processing_time_ms.toFixed(1)}ms.`
 
+  const coverage = report.coverage
+  const coverageLines =
+    report.degraded && coverage
+      ? [
+          `Partial analysis (${coverage.mode}): ${Math.round(coverage.span_fraction * 100)}% of the video spanned, ${(coverage.sampled_fraction * 100).toFixed(1)}% of frames sampled at ${coverage.downscale_min}x resolution.`,
+          ...coverage.degraded_reasons,
+        ]
+      : []
+
   return {
     videoName: report.source_filename,
+    enrichmentState: report.enrichment_state,
     summary: report.summary,
     insights: [
       latencyLine,
       `Latency target met: ${report.met_latency_target ? 'Yes' : 'No'}.`,
+      ...coverageLines,
       ...(incidentLines.length > 0 ? incidentLines : ['No critical incidents detected.']),
     ],
   }
@@ -70,6 +126,10 @@ export function UploadVideo() {
   const [toast, setToast] = useState<{ type: 'success' | 'error'; message: string } | null>(null)
   const [currentResult, setCurrentResult] = useState<ResultData | null>(null)
   const [history, setHistory] = useState<HistoryItem[]>([])
+  const stopWatchingRef = useRef<(() => void) | null>(null)
+  const currentReportIdRef = useRef<string | null>(null)
+
+  useEffect(() => () => stopWatchingRef.current?.(), [])
 
   const fetchReports = useCallback(async () => {
     try {
@@ -133,6 +193,8 @@ export function UploadVideo() {
     setProcessing(true)
     setToast(null)
     setCurrentResult(null)
+    stopWatchingRef.current?.()
+    stopWatchingRef.current = null
 
     const form = new FormData()
     form.append('file', file)
@@ -141,10 +203,11 @@ export function UploadVideo() {
       const data = await res.json()
       if (!res.ok) throw new Error(data.detail || data.error || 'Upload failed')
 
-      const report = data.report as ApiReport
+      const report = await waitForJob((data.job as ApiJob).job_id)
       const result = reportToResult(report)
       setSelectedFile(null)
       setCurrentResult(result)
+      currentReportIdRef.current = report.report_id
 
       const historyItem: HistoryItem = {
         id: report.report_id,
@@ -154,6 +217,16 @@ export function UploadVideo() {
       }
       setHistory((prev) => [historyItem, ...prev])
       setToast({ type: 'success', message: 'Video analyzed successfully' })
+
+      if (report.enrichment_state === 'pending') {
+        stopWatchingRef.current = watchEnrichment(report.report_id, (updated) => {
+          const enriched = reportToResult(updated)
+          if (currentReportIdRef.current === updated.report_id) setCurrentResult(enriched)
+          setHistory((prev) =>
+            prev.map((item) => (item.id === updated.report_id ? { ...item, result: enriched } : item)),
+          )
+        })
+      }
     } catch (e) {
       setToast({ type: 'error', message: e instanceof Error ? e.message : 'Upload failed' })
     } finally {
@@ -162,7 +235,10 @@ export function UploadVideo() {
   }, [selectedFile])
 
   const handleHistorySelect = useCallback((item: HistoryItem) => {
-    if (item.result) setCurrentResult(item.result)
+    if (item.result) {
+      currentReportIdRef.current = item.id
+      setCurrentResult(item.result)
+    }
   }, [])
 
   return (